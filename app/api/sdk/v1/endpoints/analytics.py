@@ -1,39 +1,44 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.sdk_auth import get_api_key_auth
 from app.models.project import Project
 from app.schemas.sdk import AnalyticsEventBatch, SDKResponse
+from app.services.analytics_event_service import AnalyticsEventService
 
 router = APIRouter()
 
 @router.post("/events")
-async def send_analytics_events(
+def send_analytics_events(
     events_data: AnalyticsEventBatch,
     project: Project = Depends(get_api_key_auth),
     db: Session = Depends(get_db)
 ):
     """Envoyer des événements analytics en batch."""
-    
-    processed = 0
-    failed = 0
-    
-    for event in events_data.events:
-        try:
-            # TODO: Implémenter le stockage des événements analytics
-            # Créer un modèle AnalyticsEvent et stocker en base
-            processed += 1
-        except Exception as e:
-            failed += 1
-            # TODO: Logger l'erreur
-            pass
-    
+
+    if len(events_data.events) > settings.ANALYTICS_EVENTS_MAX_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "success": False,
+                "message": f"Un batch ne peut pas dépasser {settings.ANALYTICS_EVENTS_MAX_BATCH} événements",
+                "code": "BATCH_TOO_LARGE"
+            }
+        )
+
+    results = AnalyticsEventService.ingest(db, str(project.id), events_data.events)
+
+    processed = sum(1 for result in results if result["status"] == "accepted")
+    duplicates = sum(1 for result in results if result["status"] == "duplicate")
+
     return SDKResponse(
         success=True,
         data={
             "processed": processed,
-            "failed": failed
+            "duplicates": duplicates,
+            "failed": len(results) - processed - duplicates,
+            "results": results
         }
     )
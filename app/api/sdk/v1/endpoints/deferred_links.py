@@ -1,16 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import Optional
-from datetime import datetime, timedelta
 
 from app.core.database import get_db
 from app.core.sdk_auth import get_api_key_auth
 from app.models.project import Project
 from app.models.dynamic_link import DynamicLink
-from app.models.deferred_link import DeferredLink
-from app.schemas.sdk import DeferredLinkCreate, DeferredLinkQuery, SDKResponse, DeepLinkResponse
-from app.services.link_generator import LinkGenerator
-from app.core.config import settings
+from app.schemas.sdk import DeferredLinkCreate, DeferredLinkMatchRequest, SDKResponse
+from app.services.deferred_link_store import deferred_link_store
+from app.services.fingerprint_matcher import fingerprint_matcher, screen_class
+from app.api.v1.endpoints.redirect import get_client_ip
 
 router = APIRouter()
 
@@ -25,14 +23,8 @@ async def get_deferred_link(
 ):
     """Récupérer un lien différé pour un appareil."""
     
-    # Chercher un lien différé non consommé et non expiré
-    deferred_link = db.query(DeferredLink).filter(
-        DeferredLink.device_id == deviceId,
-        DeferredLink.package_name == packageName,
-        DeferredLink.platform == platform,
-        DeferredLink.is_consumed == False,
-        DeferredLink.expires_at > datetime.utcnow()
-    ).order_by(DeferredLink.created_at.desc()).first()
+    # Un seul aller-retour Redis : lecture et consommation atomiques
+    deferred_link = deferred_link_store.consume(db, str(project.id), deviceId, packageName, platform)
     
     if not deferred_link:
         raise HTTPException(
@@ -44,23 +36,57 @@ async def get_deferred_link(
             }
         )
     
-    # Marquer comme consommé
-    deferred_link.is_consumed = True
-    deferred_link.consumed_at = datetime.utcnow()
-    db.commit()
-    
     # Retourner les données du lien
-    return DeepLinkResponse(
+    return SDKResponse(
         success=True,
         data={
-            "id": deferred_link.link_id,
-            "originalUrl": deferred_link.original_url,
-            "parameters": deferred_link.parameters or {},
-            "timestamp": deferred_link.timestamp.isoformat(),
+            "id": deferred_link["link_id"],
+            "originalUrl": deferred_link["original_url"],
+            "parameters": deferred_link.get("parameters") or {},
+            "timestamp": deferred_link["timestamp"],
             "consumed": True
         }
     )
 
+@router.post("/match")
+async def match_deferred_link(
+    match_data: DeferredLinkMatchRequest,
+    request: Request,
+    project: Project = Depends(get_api_key_auth)
+):
+    """Retrouver par empreinte le clic à l'origine d'une première ouverture (sans deviceId)."""
+    
+    candidate = fingerprint_matcher.match(
+        project_id=str(project.id),
+        ip=get_client_ip(request),
+        platform=match_data.platform,
+        os_version=match_data.osVersion,
+        locale=match_data.locale or request.headers.get("accept-language"),
+        screen=screen_class(match_data.screenWidth, match_data.screenHeight)
+    )
+    
+    if not candidate:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": "Aucun clic correspondant trouvé",
+                "code": "NO_MATCH"
+            }
+        )
+    
+    return SDKResponse(
+        success=True,
+        data={
+            "id": candidate["link_id"],
+            "originalUrl": candidate["original_url"],
+            "parameters": candidate.get("parameters") or {},
+            "timestamp": candidate["clicked_at"],
+            "score": candidate["score"],
+            "matchType": "fingerprint"
+        }
+    )
+
 @router.post("", status_code=201, include_in_schema=False)
 @router.post("/", status_code=201)
 async def store_deferred_link(
@@ -86,30 +112,18 @@ async def store_deferred_link(
             }
         )
     
-    # Supprimer les anciens liens différés pour ce device (éviter les doublons)
-    db.query(DeferredLink).filter(
-        DeferredLink.device_id == deferred_data.deviceId,
-        DeferredLink.package_name == deferred_data.packageName,
-        DeferredLink.platform == deferred_data.platform
-    ).delete()
-    
-    # Créer le nouveau lien différé
-    deferred_link = DeferredLink(
-        device_id=deferred_data.deviceId,
-        package_name=deferred_data.packageName,
-        platform=deferred_data.platform,
-        link_id=deferred_data.linkId,
-        original_url=str(link.original_url),
-        parameters=deferred_data.parameters or {},
-        ip_address=getattr(deferred_data, 'metadata', {}).get('ip_address'),
-        user_agent=getattr(deferred_data, 'metadata', {}).get('userAgent'),
-        timestamp=datetime.fromisoformat(deferred_data.timestamp.replace('Z', '+00:00')),
-        expires_at=datetime.utcnow() + timedelta(hours=24)  # Expire après 24h
-    )
-    
-    db.add(deferred_link)
-    db.commit()
-    db.refresh(deferred_link)
+    # Remplace le lien différé précédent de cet appareil ; la base est alimentée en différé
+    deferred_link_store.store(db, str(project.id), {
+        "device_id": deferred_data.deviceId,
+        "package_name": deferred_data.packageName,
+        "platform": deferred_data.platform,
+        "link_id": deferred_data.linkId,
+        "original_url": str(link.original_url),
+        "parameters": deferred_data.parameters or {},
+        "ip_address": deferred_data.metadata.get("ip_address"),
+        "user_agent": deferred_data.metadata.get("userAgent"),
+        "timestamp": deferred_data.timestamp.isoformat()
+    })
     
     return SDKResponse(success=True)
 
@@ -124,11 +138,6 @@ async def clean_deferred_link(
     """Nettoyer les données de lien différé."""
     
     # Supprimer tous les liens différés pour ce device
-    deleted_count = db.query(DeferredLink).filter(
-        DeferredLink.device_id == deviceId,
-        DeferredLink.package_name == packageName
-    ).delete()
-    
-    db.commit()
+    deleted_count = deferred_link_store.delete(db, str(project.id), deviceId, packageName)
     
     return {"deleted": deleted_count}
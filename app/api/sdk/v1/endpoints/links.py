@@ -1,21 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import desc
 from typing import List, Optional
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.pagination import keyset_page, cached_count, InvalidCursor
+from app.core.responses import sdk_success
 from app.core.sdk_auth import get_api_key_auth
 from app.models.project import Project
 from app.models.dynamic_link import DynamicLink
 from app.schemas.sdk import (
     DeepLinkCreate, 
+    DeepLinkBatchCreate,
+    DeepLinkBulkSelection,
+    DeepLinkBulkUpdate,
+    LinkSelection,
     DeepLinkUpdate, 
-    DeepLinkResponse, 
     SDKResponse,
-    PaginatedResponse,
     AnalyticsResponse
 )
 from app.services.link_generator import LinkGenerator
+from app.services.link_serializer import LinkSerializer
+from app.services.bulk_link_service import BulkLinkService
+from app.services.rollup_service import RollupService
 from app.core.config import settings
 
 router = APIRouter()
@@ -70,29 +78,125 @@ async def create_link(
     db.commit()
     db.refresh(link)
     
-    short_url = LinkGenerator.build_short_url(
-        link.short_code, 
-        project.custom_domain or settings.DOMAIN
+    return sdk_success(
+        data=LinkSerializer.sdk_link(
+            link,
+            project.custom_domain or settings.DOMAIN,
+            parameters=link_data.parameters,
+            campaign_id=link_data.campaignId,
+            referral_code=link_data.referralCode
+        ),
+        status_code=201
     )
+
+@router.post("/batch", status_code=201)
+def create_links_batch(
+    batch: DeepLinkBatchCreate,
+    project: Project = Depends(get_api_key_auth),
+    db: Session = Depends(get_db)
+):
+    """Créer des liens dynamiques en lot, avec un résultat par lien."""
+    
+    if len(batch.links) > settings.LINKS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "success": False,
+                "message": f"Un lot ne peut pas dépasser {settings.LINKS_BATCH_MAX_SIZE} liens",
+                "code": "BATCH_TOO_LARGE"
+            }
+        )
+    
+    results = BulkLinkService.create_sdk_links(db, project, batch.links)
+    created = sum(1 for result in results if result["status"] == "created")
     
     return SDKResponse(
         success=True,
-        data=DeepLinkResponse(
-            id=str(link.id),
-            originalUrl=link.original_url,
-            shortUrl=short_url,
-            parameters=link_data.parameters,
-            fallbackUrl=link.desktop_fallback_url,
-            iosAppStoreUrl=link.ios_fallback_url,
-            androidPlayStoreUrl=link.android_fallback_url,
-            createdAt=link.created_at,
-            expiresAt=link.expires_at,
-            isActive=link.is_active,
-            campaignId=link_data.campaignId,
-            referralCode=link_data.referralCode
-        )
+        data={
+            "created": created,
+            "failed": len(results) - created,
+            "results": [
+                {
+                    "index": result["index"],
+                    "status": result["status"],
+                    "id": result.get("id"),
+                    "shortCode": result.get("short_code"),
+                    "shortUrl": result.get("short_url"),
+                    "error": result.get("error"),
+                    "code": result.get("code")
+                }
+                for result in results
+            ]
+        }
     )
 
+# Champs SDK -> colonnes du modèle
+SELECTION_FIELDS = {
+    "ids": "ids",
+    "utmCampaign": "utm_campaign",
+    "utmSource": "utm_source",
+    "utmMedium": "utm_medium",
+    "urlContains": "url_contains",
+    "isActive": "is_active",
+    "createdAfter": "created_after",
+    "createdBefore": "created_before"
+}
+UPDATE_FIELDS = {
+    "originalUrl": "original_url",
+    "fallbackUrl": "desktop_fallback_url",
+    "iosAppStoreUrl": "ios_fallback_url",
+    "androidPlayStoreUrl": "android_fallback_url",
+    "expiresAt": "expires_at",
+    "isActive": "is_active"
+}
+
+def _selection_criteria(selection: LinkSelection) -> dict:
+    criteria = {
+        SELECTION_FIELDS[field]: value
+        for field, value in selection.model_dump(exclude_none=True).items()
+    }
+    if not criteria:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "message": "Au moins un critère de sélection est requis",
+                "code": "EMPTY_SELECTION"
+            }
+        )
+    return criteria
+
+@router.post("/batch/update")
+def bulk_update_links(
+    payload: DeepLinkBulkUpdate,
+    project: Project = Depends(get_api_key_auth),
+    db: Session = Depends(get_db)
+):
+    """Mettre à jour en masse les liens sélectionnés (ids, campagne UTM, filtres)."""
+    
+    criteria = _selection_criteria(payload.selection)
+    values = {
+        UPDATE_FIELDS[field]: value
+        for field, value in payload.values.model_dump(exclude_unset=True).items()
+        if field in UPDATE_FIELDS
+    }
+    updated = BulkLinkService.update_links(db, str(project.id), criteria, values)
+    
+    return SDKResponse(success=True, data={"updated": updated})
+
+@router.post("/batch/delete")
+def bulk_delete_links(
+    payload: DeepLinkBulkSelection,
+    project: Project = Depends(get_api_key_auth),
+    db: Session = Depends(get_db)
+):
+    """Supprimer en masse les liens sélectionnés."""
+    
+    criteria = _selection_criteria(payload.selection)
+    deleted = BulkLinkService.delete_links(db, str(project.id), criteria)
+    
+    return SDKResponse(success=True, data={"deleted": deleted})
+
 @router.get("/{linkId}")
 async def get_link(
     linkId: str,
@@ -116,28 +220,7 @@ async def get_link(
             }
         )
     
-    short_url = LinkGenerator.build_short_url(
-        link.short_code, 
-        project.custom_domain or settings.DOMAIN
-    )
-    
-    return SDKResponse(
-        success=True,
-        data=DeepLinkResponse(
-            id=str(link.id),
-            originalUrl=link.original_url,
-            shortUrl=short_url,
-            parameters={},  # TODO: extraire des paramètres stockés
-            fallbackUrl=link.desktop_fallback_url,
-            iosAppStoreUrl=link.ios_fallback_url,
-            androidPlayStoreUrl=link.android_fallback_url,
-            createdAt=link.created_at,
-            expiresAt=link.expires_at,
-            isActive=link.is_active,
-            campaignId=None,  # TODO: ajouter campaign_id au modèle
-            referralCode=None  # TODO: ajouter referral_code au modèle
-        )
-    )
+    return sdk_success(data=LinkSerializer.sdk_link(link, project.custom_domain or settings.DOMAIN))
 
 @router.get("", include_in_schema=False)
 @router.get("/")
@@ -146,10 +229,17 @@ async def list_links(
     db: Session = Depends(get_db),
     limit: int = Query(50, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    includeTotal: bool = Query(False),
     campaignId: Optional[str] = Query(None),
     isActive: Optional[bool] = Query(None)
 ):
-    """Lister les liens avec filtres optionnels."""
+    """
+    Lister les liens avec filtres optionnels.
+
+    Le total (`total`) n'est calculé que sur demande (`includeTotal=true`) ;
+    sinon il vaut null et la page suivante s'obtient avec `nextCursor`.
+    """
     
     query = db.query(DynamicLink).filter(DynamicLink.project_id == project.id)
     
@@ -158,39 +248,33 @@ async def list_links(
     
     # TODO: Ajouter filtre campaignId quand le champ sera ajouté
     
-    total = query.count()
-    links = query.offset(offset).limit(limit).all()
-    
-    link_responses = []
-    for link in links:
-        short_url = LinkGenerator.build_short_url(
-            link.short_code, 
-            project.custom_domain or settings.DOMAIN
-        )
-        
-        link_responses.append(DeepLinkResponse(
-            id=str(link.id),
-            originalUrl=link.original_url,
-            shortUrl=short_url,
-            parameters={},
-            fallbackUrl=link.desktop_fallback_url,
-            iosAppStoreUrl=link.ios_fallback_url,
-            androidPlayStoreUrl=link.android_fallback_url,
-            createdAt=link.created_at,
-            expiresAt=link.expires_at,
-            isActive=link.is_active,
-            campaignId=None,
-            referralCode=None
-        ))
-    
-    return SDKResponse(
-        success=True,
-        data=PaginatedResponse(
-            links=link_responses,
-            total=total,
-            limit=limit,
-            offset=offset
-        )
+    total = cached_count(query, project.id) if includeTotal else None
+    
+    next_cursor = None
+    if offset and not cursor:
+        # Compatibilité : pagination par décalage
+        links = query.order_by(desc(DynamicLink.created_at), desc(DynamicLink.id)).offset(offset).limit(limit).all()
+    else:
+        try:
+            links, next_cursor = keyset_page(query, DynamicLink.created_at, DynamicLink.id, cursor, limit)
+        except InvalidCursor as e:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "message": str(e),
+                    "code": "INVALID_CURSOR"
+                }
+            )
+    
+    return sdk_success(
+        data={
+            "links": LinkSerializer.sdk_links(project, links),
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "nextCursor": next_cursor
+        }
     )
 
 @router.put("/{linkId}")
@@ -236,26 +320,13 @@ async def update_link(
     db.commit()
     db.refresh(link)
     
-    short_url = LinkGenerator.build_short_url(
-        link.short_code, 
-        project.custom_domain or settings.DOMAIN
-    )
-    
-    return SDKResponse(
-        success=True,
-        data=DeepLinkResponse(
-            id=str(link.id),
-            originalUrl=link.original_url,
-            shortUrl=short_url,
-            parameters=link_data.parameters or {},
-            fallbackUrl=link.desktop_fallback_url,
-            iosAppStoreUrl=link.ios_fallback_url,
-            androidPlayStoreUrl=link.android_fallback_url,
-            createdAt=link.created_at,
-            expiresAt=link.expires_at,
-            isActive=link.is_active,
-            campaignId=link_data.campaignId,
-            referralCode=link_data.referralCode
+    return sdk_success(
+        data=LinkSerializer.sdk_link(
+            link,
+            project.custom_domain or settings.DOMAIN,
+            parameters=link_data.parameters,
+            campaign_id=link_data.campaignId,
+            referral_code=link_data.referralCode
         )
     )
 
@@ -282,14 +353,14 @@ async def delete_link(
             }
         )
     
-    db.delete(link)
-    db.commit()
+    # Agrégats et clics d'abord (clés étrangères), comme pour la suppression en masse
+    BulkLinkService.delete_links(db, str(project.id), {"ids": [link.id]})
 
 @router.get("/{linkId}/analytics")
 async def get_link_analytics(
     linkId: str,
     project: Project = Depends(get_api_key_auth),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     startDate: Optional[datetime] = Query(None),
     endDate: Optional[datetime] = Query(None)
 ):
@@ -310,17 +381,10 @@ async def get_link_analytics(
             }
         )
     
-    # TODO: Implémenter la logique d'analytics réelle
-    # Pour l'instant, retourner des données de base
+    # Servi depuis les agrégats quotidiens : coût indépendant du volume de clics
+    stats = RollupService.link_analytics(db, link.id, startDate, endDate)
     
     return SDKResponse(
         success=True,
-        data=AnalyticsResponse(
-            totalClicks=len(link.clicks) if link.clicks else 0,
-            uniqueClicks=0,  # TODO: calculer les clics uniques
-            conversions=0,   # TODO: calculer les conversions
-            platforms={},    # TODO: grouper par plateforme
-            countries={},    # TODO: grouper par pays
-            timeline=[]      # TODO: données temporelles
-        )
+        data=AnalyticsResponse(**stats)
     )
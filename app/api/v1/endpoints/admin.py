@@ -1,50 +1,55 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from sqlalchemy import func, desc
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.user import User
 from app.models.project import Project
 from app.models.dynamic_link import DynamicLink
-from app.models.link_click import LinkClick
+from app.models.link_click_rollup import LinkClickRollup
 from app.schemas.response import ApiResponse
+from app.core.pagination import keyset_page, cached_count, InvalidCursor
+from app.core.pool_metrics import pool_metrics
+from app.services.admin_metrics import admin_metrics
+from app.services.link_search import link_search
 
 router = APIRouter()
 
+def _click_counts(db: Session, key, ids: List[str]) -> Dict[str, int]:
+    """Total des clics par lien ou par projet, lu dans les agrégats quotidiens."""
+    if not ids:
+        return {}
+    return dict(
+        db.query(key, func.sum(LinkClickRollup.clicks)).filter(
+            key.in_(ids)
+        ).group_by(key).all()
+    )
+
 @router.get("/stats")
-async def get_admin_stats(db: Session = Depends(get_db)):
+def get_admin_stats():
     """Récupérer les statistiques générales pour le dashboard admin"""
     
-    # Total des liens
-    total_links = db.query(DynamicLink).count()
-    
-    # Total des projets
-    total_projects = db.query(Project).count()
-    
-    # Clics aujourd'hui
-    today = datetime.now().date()
-    today_clicks = db.query(LinkClick).filter(
-        func.date(LinkClick.created_at) == today
-    ).count()
-    
-    # Taux de conversion (liens avec au moins 1 clic)
-    links_with_clicks = db.query(DynamicLink).join(LinkClick).distinct().count()
-    conversion_rate = round((links_with_clicks / total_links * 100) if total_links > 0 else 0, 1)
+    # Instantané précalculé par une tâche de fond (voir AdminMetricsService)
+    stats = admin_metrics.get()
     
     return ApiResponse.success(
-        data={
-            "totalLinks": total_links,
-            "totalProjects": total_projects,
-            "todayClicks": today_clicks,
-            "conversionRate": conversion_rate
-        },
+        data=stats,
         message="Statistiques récupérées avec succès"
     )
 
+@router.get("/database/pool")
+def get_database_pool():
+    """Occupation et temps d'attente du pool de connexions à la base"""
+    
+    return ApiResponse.success(
+        data=pool_metrics.snapshot(),
+        message="Métriques du pool récupérées avec succès"
+    )
+
 @router.get("/activity")
-async def get_recent_activity(db: Session = Depends(get_db)):
+async def get_recent_activity(db: Session = Depends(get_read_db)):
     """Récupérer l'activité récente pour le dashboard"""
     
     activities = []
@@ -79,26 +84,20 @@ async def get_recent_activity(db: Session = Depends(get_db)):
 
 @router.get("/links")
 async def get_admin_links(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None),
     project: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
-    period: Optional[str] = Query(None)
+    period: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None)
 ):
     """Récupérer tous les liens avec filtres pour l'admin"""
     
-    query = db.query(DynamicLink).join(Project, isouter=True)
+    query = db.query(DynamicLink).outerjoin(Project).options(contains_eager(DynamicLink.project))
     
     # Filtres
-    if search:
-        query = query.filter(
-            (DynamicLink.title.ilike(f"%{search}%")) |
-            (DynamicLink.short_code.ilike(f"%{search}%")) |
-            (DynamicLink.original_url.ilike(f"%{search}%"))
-        )
-    
     if project:
         query = query.filter(DynamicLink.project_id == project)
     
@@ -110,7 +109,8 @@ async def get_admin_links(
     if period:
         now = datetime.now()
         if period == "today":
-            query = query.filter(func.date(DynamicLink.created_at) == now.date())
+            today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            query = query.filter(DynamicLink.created_at >= today)
         elif period == "week":
             week_ago = now - timedelta(days=7)
             query = query.filter(DynamicLink.created_at >= week_ago)
@@ -118,16 +118,26 @@ async def get_admin_links(
             month_ago = now - timedelta(days=30)
             query = query.filter(DynamicLink.created_at >= month_ago)
     
-    # Pagination
-    total = query.count()
-    links = query.order_by(desc(DynamicLink.created_at)).offset((page - 1) * limit).limit(limit).all()
+    if search:
+        # Recherche indexée triée par pertinence : pagination par page
+        query = link_search.apply(query, search)
+        total = query.count()
+        links = query.offset((page - 1) * limit).limit(limit).all()
+        next_cursor = None
+    else:
+        # Pagination par curseur sur (created_at, id), total mis en cache
+        total = cached_count(query)
+        try:
+            links, next_cursor = keyset_page(query, DynamicLink.created_at, DynamicLink.id, cursor, limit)
+        except InvalidCursor as e:
+            return ApiResponse.error(message=str(e), status_code=400)
+    
+    # Clics de toute la page en une seule requête groupée (agrégats quotidiens)
+    click_counts = _click_counts(db, LinkClickRollup.link_id, [link.id for link in links])
     
     # Formater les données
     links_data = []
     for link in links:
-        # Compter les clics
-        click_count = db.query(LinkClick).filter(LinkClick.link_id == link.id).count()
-        
         links_data.append({
             "id": str(link.id),
             "short_code": link.short_code,
@@ -137,7 +147,7 @@ async def get_admin_links(
             "description": link.description,
             "project_name": link.project.name if link.project else None,
             "is_active": link.is_active,
-            "click_count": click_count,
+            "click_count": click_counts.get(link.id, 0),
             "created_at": link.created_at.isoformat() if link.created_at else None,
             "updated_at": link.updated_at.isoformat() if link.updated_at else None
         })
@@ -148,14 +158,17 @@ async def get_admin_links(
             "total": total,
             "page": page,
             "limit": limit,
-            "pages": (total + limit - 1) // limit
+            "pages": (total + limit - 1) // limit,
+            "next_cursor": next_cursor
         },
         message="Liens récupérés avec succès"
     )
 
 @router.get("/projects")
 async def get_admin_projects(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     platform: Optional[str] = Query(None)
@@ -176,59 +189,70 @@ async def get_admin_projects(
     if platform == "android":
         query = query.filter(Project.android_package.isnot(None))
     elif platform == "ios":
-        query = query.filter(Project.ios_app_id.isnot(None))
+        query = query.filter(Project.ios_bundle_id.isnot(None))
     elif platform == "both":
         query = query.filter(
             (Project.android_package.isnot(None)) &
-            (Project.ios_app_id.isnot(None))
+            (Project.ios_bundle_id.isnot(None))
         )
     
-    projects = query.order_by(desc(Project.created_at)).all()
+    # Pagination
+    total = query.count()
+    projects = query.order_by(desc(Project.created_at)).offset((page - 1) * limit).limit(limit).all()
+    project_ids = [project.id for project in projects]
+    
+    # Liens et créateurs de liens de toute la page en une seule requête groupée
+    link_stats = {}
+    if project_ids:
+        link_stats = {
+            row.project_id: row for row in db.query(
+                DynamicLink.project_id,
+                func.count(DynamicLink.id).label("links_count"),
+                func.count(func.distinct(DynamicLink.created_by)).label("users_count")
+            ).filter(
+                DynamicLink.project_id.in_(project_ids)
+            ).group_by(DynamicLink.project_id)
+        }
+    click_counts = _click_counts(db, LinkClickRollup.project_id, project_ids)
     
     # Formater les données avec statistiques
     projects_data = []
     for project in projects:
-        # Compter les liens
-        links_count = db.query(DynamicLink).filter(DynamicLink.project_id == project.id).count()
-        
-        # Compter les clics totaux
-        total_clicks = db.query(func.count(LinkClick.id)).join(DynamicLink).filter(
-            DynamicLink.project_id == project.id
-        ).scalar() or 0
-        
-        # Compter les utilisateurs (créateurs de liens)
-        users_count = db.query(func.count(func.distinct(DynamicLink.created_by))).filter(
-            DynamicLink.project_id == project.id
-        ).scalar() or 0
+        stats = link_stats.get(project.id)
         
         projects_data.append({
             "id": str(project.id),
             "name": project.name,
             "description": project.description,
             "android_package": project.android_package,
-            "ios_app_id": project.ios_app_id,
-            "custom_scheme": project.custom_scheme,
+            "ios_app_id": project.ios_bundle_id,
             "custom_domain": project.custom_domain,
-            "fallback_url": project.fallback_url,
             "is_active": project.is_active,
-            "links_count": links_count,
-            "total_clicks": total_clicks,
-            "users_count": users_count,
+            "links_count": stats.links_count if stats else 0,
+            "total_clicks": click_counts.get(project.id, 0),
+            "users_count": stats.users_count if stats else 0,
             "created_at": project.created_at.isoformat() if project.created_at else None,
             "updated_at": project.updated_at.isoformat() if project.updated_at else None
         })
     
     return ApiResponse.success(
-        data=projects_data,
+        data={
+            "projects": projects_data,
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "pages": (total + limit - 1) // limit
+        },
         message="Projets récupérés avec succès"
     )
 
 @router.get("/users")
 async def get_admin_users(
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),
+    db: Session = Depends(get_read_db),
     limit: int = Query(20, ge=1, le=100),
-    search: Optional[str] = Query(None)
+    cursor: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    include_total: bool = Query(True)
 ):
     """Récupérer tous les utilisateurs pour l'admin"""
     
@@ -237,24 +261,34 @@ async def get_admin_users(
     if search:
         query = query.filter(
             (User.email.ilike(f"%{search}%")) |
-            (User.full_name.ilike(f"%{search}%"))
+            (User.first_name.ilike(f"%{search}%")) |
+            (User.last_name.ilike(f"%{search}%"))
         )
     
-    total = query.count()
-    users = query.order_by(desc(User.created_at)).offset((page - 1) * limit).limit(limit).all()
+    total = cached_count(query) if include_total else None
+    try:
+        users, next_cursor = keyset_page(query, User.created_at, User.id, cursor, limit)
+    except InvalidCursor as e:
+        return ApiResponse.error(message=str(e), status_code=400)
+    
+    # Liens créés par les utilisateurs de la page en une seule requête groupée
+    links_counts = {}
+    if users:
+        links_counts = dict(
+            db.query(DynamicLink.created_by, func.count(DynamicLink.id)).filter(
+                DynamicLink.created_by.in_([user.id for user in users])
+            ).group_by(DynamicLink.created_by).all()
+        )
     
     users_data = []
     for user in users:
-        # Compter les liens créés
-        links_count = db.query(DynamicLink).filter(DynamicLink.created_by == user.id).count()
-        
         users_data.append({
             "id": str(user.id),
             "email": user.email,
-            "full_name": user.full_name,
-            "is_active": user.is_active,
-            "is_superuser": user.is_superuser,
-            "links_count": links_count,
+            "full_name": " ".join(filter(None, [user.first_name, user.last_name])) or None,
+            "role": user.role,
+            "is_verified": user.is_verified,
+            "links_count": links_counts.get(user.id, 0),
             "created_at": user.created_at.isoformat() if user.created_at else None,
             "last_login": user.last_login.isoformat() if user.last_login else None
         })
@@ -263,9 +297,8 @@ async def get_admin_users(
         data={
             "users": users_data,
             "total": total,
-            "page": page,
             "limit": limit,
-            "pages": (total + limit - 1) // limit
+            "next_cursor": next_cursor
         },
         message="Utilisateurs récupérés avec succès"
     )
@@ -1,20 +1,26 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, cast, Integer
 from typing import List, Optional
 from datetime import datetime, timedelta
 import csv
 import io
+import os
 from fastapi.responses import StreamingResponse
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.deps import get_project_by_id, get_current_active_user
 from app.models.project import Project
 from app.models.dynamic_link import DynamicLink
 from app.models.link_click import LinkClick
 from app.models.user import User
-from app.schemas.analytics import AnalyticsOverview, LinkAnalytics, ClickEvent, ExportRequest
+from app.models.export_job import ExportJob
+from app.schemas.analytics import AnalyticsOverview, LinkAnalytics, ClickEvent, ExportRequest, ExportJobResponse, LiveCounters
 from app.services.subscription_service import SubscriptionService
+from app.services.export_service import ExportService, EXPORT_FORMATS
+from app.services.click_partitioning import click_partitions
+from app.services.live_counters import live_counters
+from app.core.file_responses import range_file_response
 
 router = APIRouter()
 
@@ -22,7 +28,7 @@ router = APIRouter()
 async def get_analytics_overview(
     project: Project = Depends(get_project_by_id),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     days: int = Query(30, description="Nombre de jours à analyser")
 ):
     # Vérifier l'accès aux analytics complètes
@@ -40,44 +46,50 @@ async def get_analytics_overview(
         DynamicLink.project_id == project.id
     ).count()
     
-    total_clicks = db.query(LinkClick).join(DynamicLink).filter(
+    clicks = click_partitions.clicks_for_range(db, date_from)
+    
+    total_clicks = db.query(func.count(clicks.id)).join(
+        DynamicLink, clicks.link_id == DynamicLink.id
+    ).filter(
         DynamicLink.project_id == project.id,
-        LinkClick.clicked_at >= date_from
-    ).count()
+        clicks.clicked_at >= date_from
+    ).scalar() or 0
     
-    conversions = db.query(LinkClick).join(DynamicLink).filter(
+    conversions = db.query(func.count(clicks.id)).join(
+        DynamicLink, clicks.link_id == DynamicLink.id
+    ).filter(
         DynamicLink.project_id == project.id,
-        LinkClick.clicked_at >= date_from,
-        LinkClick.converted == True
-    ).count()
+        clicks.clicked_at >= date_from,
+        clicks.converted == True
+    ).scalar() or 0
     
     conversion_rate = (conversions / total_clicks * 100) if total_clicks > 0 else 0
     
     top_countries = db.query(
-        LinkClick.country,
-        func.count(LinkClick.id).label('count')
-    ).join(DynamicLink).filter(
+        clicks.country,
+        func.count(clicks.id).label('count')
+    ).join(DynamicLink, clicks.link_id == DynamicLink.id).filter(
         DynamicLink.project_id == project.id,
-        LinkClick.clicked_at >= date_from,
-        LinkClick.country.isnot(None)
-    ).group_by(LinkClick.country).order_by(desc('count')).limit(5).all()
+        clicks.clicked_at >= date_from,
+        clicks.country.isnot(None)
+    ).group_by(clicks.country).order_by(desc('count')).limit(5).all()
     
     top_platforms = db.query(
-        LinkClick.platform,
-        func.count(LinkClick.id).label('count')
-    ).join(DynamicLink).filter(
+        clicks.platform,
+        func.count(clicks.id).label('count')
+    ).join(DynamicLink, clicks.link_id == DynamicLink.id).filter(
         DynamicLink.project_id == project.id,
-        LinkClick.clicked_at >= date_from,
-        LinkClick.platform.isnot(None)
-    ).group_by(LinkClick.platform).order_by(desc('count')).limit(5).all()
+        clicks.clicked_at >= date_from,
+        clicks.platform.isnot(None)
+    ).group_by(clicks.platform).order_by(desc('count')).limit(5).all()
     
     clicks_by_day = db.query(
-        func.date(LinkClick.clicked_at).label('date'),
-        func.count(LinkClick.id).label('count')
-    ).join(DynamicLink).filter(
+        func.date(clicks.clicked_at).label('date'),
+        func.count(clicks.id).label('count')
+    ).join(DynamicLink, clicks.link_id == DynamicLink.id).filter(
         DynamicLink.project_id == project.id,
-        LinkClick.clicked_at >= date_from
-    ).group_by(func.date(LinkClick.clicked_at)).order_by('date').all()
+        clicks.clicked_at >= date_from
+    ).group_by(func.date(clicks.clicked_at)).order_by('date').all()
     
     return AnalyticsOverview(
         total_clicks=total_clicks,
@@ -88,22 +100,48 @@ async def get_analytics_overview(
         clicks_over_time=[{"date": str(d.date), "count": d.count} for d in clicks_by_day]
     )
 
+@router.get("/live", response_model=LiveCounters)
+async def get_live_counters(
+    link_id: Optional[str] = Query(None),
+    step: int = Query(5, ge=1, le=60),
+    project: Project = Depends(get_project_by_id),
+    db: Session = Depends(get_read_db)
+):
+    if link_id:
+        link = db.query(DynamicLink).filter(
+            DynamicLink.id == link_id,
+            DynamicLink.project_id == project.id
+        ).first()
+        if not link:
+            raise HTTPException(status_code=404, detail="Lien non trouvé")
+    
+    # Lecture Redis uniquement : aucune requête sur link_clicks
+    stats = live_counters.get_live_stats(project.id, link_id, step)
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Compteurs temps réel indisponibles")
+    
+    return LiveCounters(**stats)
+
 @router.get("/links", response_model=List[LinkAnalytics])
 async def get_links_analytics(
     project: Project = Depends(get_project_by_id),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     days: int = Query(30, description="Nombre de jours à analyser")
 ):
     date_from = datetime.utcnow() - timedelta(days=days)
     
+    # Totaux sur tout l'historique, détails sur la fenêtre demandée
+    all_clicks = click_partitions.clicks_for_range(db)
+    clicks = click_partitions.clicks_for_range(db, date_from)
+    
     links_with_stats = db.query(
         DynamicLink.id,
         DynamicLink.short_code,
         DynamicLink.title,
-        func.count(LinkClick.id).label('total_clicks'),
-        func.count(func.distinct(LinkClick.ip_address)).label('unique_clicks'),
-        func.sum(func.cast(LinkClick.converted, db.Integer)).label('conversions')
-    ).outerjoin(LinkClick).filter(
+        func.count(all_clicks.id).label('total_clicks'),
+        func.count(func.distinct(all_clicks.ip_address)).label('unique_clicks'),
+        func.sum(cast(all_clicks.converted, Integer)).label('conversions')
+    ).outerjoin(all_clicks, all_clicks.link_id == DynamicLink.id).filter(
         DynamicLink.project_id == project.id
     ).group_by(DynamicLink.id, DynamicLink.short_code, DynamicLink.title).all()
     
@@ -114,30 +152,30 @@ async def get_links_analytics(
             conversion_rate = (link_stat.conversions or 0) / link_stat.total_clicks * 100
         
         top_countries = db.query(
-            LinkClick.country,
-            func.count(LinkClick.id).label('count')
+            clicks.country,
+            func.count(clicks.id).label('count')
         ).filter(
-            LinkClick.link_id == link_stat.id,
-            LinkClick.clicked_at >= date_from,
-            LinkClick.country.isnot(None)
-        ).group_by(LinkClick.country).order_by(desc('count')).limit(3).all()
+            clicks.link_id == link_stat.id,
+            clicks.clicked_at >= date_from,
+            clicks.country.isnot(None)
+        ).group_by(clicks.country).order_by(desc('count')).limit(3).all()
         
         top_platforms = db.query(
-            LinkClick.platform,
-            func.count(LinkClick.id).label('count')
+            clicks.platform,
+            func.count(clicks.id).label('count')
         ).filter(
-            LinkClick.link_id == link_stat.id,
-            LinkClick.clicked_at >= date_from,
-            LinkClick.platform.isnot(None)
-        ).group_by(LinkClick.platform).order_by(desc('count')).limit(3).all()
+            clicks.link_id == link_stat.id,
+            clicks.clicked_at >= date_from,
+            clicks.platform.isnot(None)
+        ).group_by(clicks.platform).order_by(desc('count')).limit(3).all()
         
         clicks_by_day = db.query(
-            func.date(LinkClick.clicked_at).label('date'),
-            func.count(LinkClick.id).label('count')
+            func.date(clicks.clicked_at).label('date'),
+            func.count(clicks.id).label('count')
         ).filter(
-            LinkClick.link_id == link_stat.id,
-            LinkClick.clicked_at >= date_from
-        ).group_by(func.date(LinkClick.clicked_at)).order_by('date').all()
+            clicks.link_id == link_stat.id,
+            clicks.clicked_at >= date_from
+        ).group_by(func.date(clicks.clicked_at)).order_by('date').all()
         
         result.append(LinkAnalytics(
             link_id=str(link_stat.id),
@@ -156,19 +194,22 @@ async def get_links_analytics(
 @router.get("/export")
 async def export_analytics(
     project: Project = Depends(get_project_by_id),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     format: str = Query("csv", description="Format d'export (csv, json)"),
     date_from: Optional[datetime] = Query(None),
     date_to: Optional[datetime] = Query(None)
 ):
-    query = db.query(LinkClick).join(DynamicLink).filter(
+    clicks_source = click_partitions.clicks_for_range(db, date_from, date_to)
+    query = db.query(clicks_source).join(
+        DynamicLink, clicks_source.link_id == DynamicLink.id
+    ).filter(
         DynamicLink.project_id == project.id
     )
     
     if date_from:
-        query = query.filter(LinkClick.clicked_at >= date_from)
+        query = query.filter(clicks_source.clicked_at >= date_from)
     if date_to:
-        query = query.filter(LinkClick.clicked_at <= date_to)
+        query = query.filter(clicks_source.clicked_at <= date_to)
     
     clicks = query.all()
     
@@ -198,3 +239,83 @@ async def export_analytics(
         )
     
     return {"message": "Format non supporté"}
+
+def _export_job_response(job: ExportJob) -> ExportJobResponse:
+    progress = 0.0
+    if job.status == "completed":
+        progress = 100.0
+    elif job.total_rows:
+        progress = round((job.rows_written or 0) / job.total_rows * 100, 2)
+    
+    download_url = None
+    if job.status == "completed":
+        download_url = f"/api/v1/projects/{job.project_id}/analytics/export-jobs/{job.id}/download"
+    
+    return ExportJobResponse(
+        id=str(job.id),
+        status=job.status,
+        format=job.format,
+        date_from=job.date_from,
+        date_to=job.date_to,
+        total_rows=job.total_rows,
+        rows_written=job.rows_written or 0,
+        progress=progress,
+        file_size=job.file_size,
+        error=job.error,
+        download_url=download_url,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        completed_at=job.completed_at
+    )
+
+def _get_export_job(db: Session, project: Project, job_id: str) -> ExportJob:
+    job = db.query(ExportJob).filter(
+        ExportJob.id == job_id,
+        ExportJob.project_id == project.id
+    ).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Export non trouvé")
+    
+    return job
+
+@router.post("/export-jobs", response_model=ExportJobResponse, status_code=202)
+async def create_export_job(
+    export_request: ExportRequest,
+    project: Project = Depends(get_project_by_id),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    if export_request.format.lower() not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format non supporté")
+    
+    job = ExportService.create_job(db, project, current_user.id, export_request)
+    return _export_job_response(job)
+
+@router.get("/export-jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(
+    job_id: str,
+    project: Project = Depends(get_project_by_id),
+    db: Session = Depends(get_db)
+):
+    job = _get_export_job(db, project, job_id)
+    return _export_job_response(job)
+
+@router.get("/export-jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    request: Request,
+    project: Project = Depends(get_project_by_id),
+    db: Session = Depends(get_db)
+):
+    job = _get_export_job(db, project, job_id)
+    
+    if job.status != "completed" or not job.file_path or not os.path.exists(job.file_path):
+        raise HTTPException(status_code=409, detail="Export non disponible")
+    
+    return range_file_response(
+        job.file_path,
+        request,
+        media_type=ExportService.artifact_media_type(job),
+        filename=ExportService.artifact_name(job)
+    )
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import json
+import time
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.deferred_deep_linking import deferred_service
-from app.services.platform_detector import PlatformDetector
-from app.models.link_click import LinkClick
+from app.services.install_events import install_events
 
 router = APIRouter()
 
@@ -64,13 +68,8 @@ async def track_web_continue(
     """
     context = deferred_service.get_deferred_context(request_data.tracking_id)
     if context:
-        click_id = context.get("click_id")
-        if click_id:
-            click = db.query(LinkClick).filter(LinkClick.id == click_id).first()
-            if click:
-                # Marquer comme "web continue" dans les analytics
-                click.converted = False  # Pas une vraie conversion app
-                db.commit()
+        # Marquer comme "web continue" dans les analytics : pas une vraie conversion app
+        deferred_service.mark_conversion(db, context, False)
     
     return {"success": True}
 
@@ -84,37 +83,72 @@ async def track_app_install(
     """
     context = deferred_service.get_deferred_context(request_data.tracking_id)
     if context:
-        click_id = context.get("click_id")
-        if click_id:
-            click = db.query(LinkClick).filter(LinkClick.id == click_id).first()
-            if click:
-                # Marquer comme tentative d'installation
-                click.converted = True  # Conversion vers l'app store
-                db.commit()
+        # Marquer comme tentative d'installation : conversion vers l'app store
+        deferred_service.mark_conversion(db, context, True)
     
     return {"success": True}
 
 @router.get("/install-status/{tracking_id}")
-async def check_install_status(
-    tracking_id: str,
-    request: Request
-):
+async def check_install_status(tracking_id: str):
     """
-    Vérifie si l'app a été installée (polling depuis la page d'attente)
+    Vérifie si l'app a été installée (polling ; préférer le flux /stream)
     """
+    status = install_events.status(tracking_id)
+    if status:
+        return {"installed": True, "expired": False, "event": status}
+    
     context = deferred_service.get_deferred_context(tracking_id)
     if not context:
         return {"installed": False, "expired": True}
     
-    # Logique simple - dans un vrai système, on pourrait avoir des mécaniques plus sophistiquées
-    user_agent = request.headers.get("User-Agent", "")
-    
-    # Vérifier si l'User-Agent a changé (signe possible d'installation)
-    original_platform = context.get("platform")
-    current_platform_info = PlatformDetector.detect_platform(user_agent)
-    
     return {
-        "installed": False,  # À implémenter selon vos besoins
+        "installed": False,
         "expired": False,
         "context": context
     }
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/install-status/{tracking_id}/stream")
+async def stream_install_status(tracking_id: str, request: Request):
+    """
+    Flux SSE : une seule connexion par page d'attente, notifiée dès que
+    l'app s'ouvre (remplace le polling de /install-status)
+    """
+    
+    async def events():
+        queue = install_events.subscribe(tracking_id)
+        try:
+            # Abonné avant de lire l'état : aucun événement ne peut passer entre les deux
+            status = install_events.status(tracking_id)
+            if status:
+                yield _sse("installed", status)
+                return
+            if deferred_service.get_deferred_context(tracking_id) is None:
+                yield _sse("expired", {"installed": False, "expired": True})
+                return
+            
+            deadline = time.monotonic() + settings.INSTALL_STATUS_STREAM_TIMEOUT
+            while time.monotonic() < deadline:
+                if await request.is_disconnected():
+                    return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.INSTALL_STATUS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                    yield ": ping\n\n"
+                    continue
+                yield _sse("installed", event)
+                return
+            
+            # Le navigateur se reconnecte seul (EventSource) et repart pour une période
+            yield _sse("timeout", {"installed": False})
+        finally:
+            install_events.unsubscribe(tracking_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,16 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
+from sqlalchemy import desc
 from typing import List, Optional
 from datetime import datetime
 
 from app.core.database import get_db
+from app.core.pagination import keyset_page, cached_count, InvalidCursor
+from app.core.responses import api_success
 from app.core.deps import get_current_active_user, get_project_by_id
 from app.models.user import User
 from app.models.project import Project
 from app.models.dynamic_link import DynamicLink
-from app.schemas.dynamic_link import DynamicLinkCreate, DynamicLinkUpdate, DynamicLinkResponse
+from app.models.import_job import ImportJob
+from app.schemas.dynamic_link import (
+    DynamicLinkCreate,
+    DynamicLinkBatchCreate,
+    DynamicLinkBulkSelection,
+    DynamicLinkBulkUpdate,
+    DynamicLinkUpdate,
+    DynamicLinkResponse,
+    LinkSelection
+)
 from app.schemas.response import ApiResponse
 from app.services.link_generator import LinkGenerator
+from app.services.bulk_link_service import BulkLinkService
+from app.services.link_serializer import LinkSerializer
+from app.services.import_service import ImportService
+from app.services.link_search import link_search
 from app.core.config import settings
 from app.core.exceptions import ValidationException, NotFoundException
 from app.services.subscription_service import SubscriptionService
@@ -23,45 +39,38 @@ async def get_links(
     project: Project = Depends(get_project_by_id),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 50
+    limit: int = 50,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False
 ):
-    links = db.query(DynamicLink).filter(
+    query = db.query(DynamicLink).filter(
         DynamicLink.project_id == project.id
-    ).offset(skip).limit(limit).all()
+    )
+    headers = {}
     
-    links_data = []
-    for link in links:
-        short_url = LinkGenerator.build_short_url(
-            link.short_code, 
-            project.custom_domain or settings.DOMAIN
-        )
-        links_data.append({
-            "id": str(link.id),
-            "short_code": link.short_code,
-            "short_url": short_url,
-            "original_url": link.original_url,
-            "title": link.title,
-            "description": link.description,
-            "android_package": link.android_package,
-            "android_fallback_url": link.android_fallback_url,
-            "ios_bundle_id": link.ios_bundle_id,
-            "ios_fallback_url": link.ios_fallback_url,
-            "desktop_fallback_url": link.desktop_fallback_url,
-            "utm_source": link.utm_source,
-            "utm_medium": link.utm_medium,
-            "utm_campaign": link.utm_campaign,
-            "utm_term": link.utm_term,
-            "utm_content": link.utm_content,
-            "expires_at": link.expires_at.isoformat() if link.expires_at else None,
-            "is_active": link.is_active,
-            "click_count": len(link.clicks) if link.clicks else 0,
-            "created_at": link.created_at.isoformat() if link.created_at else None,
-            "updated_at": link.updated_at.isoformat() if link.updated_at else None
-        })
+    if include_total:
+        headers["X-Total-Count"] = str(cached_count(query, project.id))
     
-    return ApiResponse.success(
-        data=links_data,
-        message="Liens récupérés avec succès"
+    if search:
+        # Recherche indexée, résultats triés par pertinence
+        links = link_search.apply(query, search).offset(skip).limit(limit).all()
+    elif skip:
+        # Compatibilité : pagination par décalage
+        links = query.order_by(desc(DynamicLink.created_at), desc(DynamicLink.id)).offset(skip).limit(limit).all()
+    else:
+        # Pagination par curseur : le curseur suivant est renvoyé dans X-Next-Cursor
+        try:
+            links, next_cursor = keyset_page(query, DynamicLink.created_at, DynamicLink.id, cursor, limit)
+        except InvalidCursor as e:
+            raise ValidationException(str(e), field="cursor")
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+    
+    return api_success(
+        data=LinkSerializer.dashboard_links(db, project, links),
+        message="Liens récupérés avec succès",
+        headers=headers
     )
 
 @router.post("", include_in_schema=False)
@@ -119,38 +128,151 @@ async def create_link(
     db.commit()
     db.refresh(link)
     
-    short_url = LinkGenerator.build_short_url(
-        link.short_code, 
-        project.custom_domain or settings.DOMAIN
+    return api_success(
+        data=LinkSerializer.dashboard_link(link, project.custom_domain or settings.DOMAIN),
+        message="Lien créé avec succès"
     )
+
+@router.post("/batch")
+def create_links_batch(
+    batch: DynamicLinkBatchCreate,
+    project: Project = Depends(get_project_by_id),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    if len(batch.links) > settings.LINKS_BATCH_MAX_SIZE:
+        return ApiResponse.error(
+            message=f"Un lot ne peut pas dépasser {settings.LINKS_BATCH_MAX_SIZE} liens",
+            status_code=413
+        )
+    
+    results = BulkLinkService.create_dashboard_links(db, project, batch.links, current_user.id)
+    created = sum(1 for result in results if result["status"] == "created")
     
     return ApiResponse.success(
         data={
-            "id": str(link.id),
-            "short_code": link.short_code,
-            "short_url": short_url,
-            "original_url": link.original_url,
-            "title": link.title,
-            "description": link.description,
-            "android_package": link.android_package,
-            "android_fallback_url": link.android_fallback_url,
-            "ios_bundle_id": link.ios_bundle_id,
-            "ios_fallback_url": link.ios_fallback_url,
-            "desktop_fallback_url": link.desktop_fallback_url,
-            "utm_source": link.utm_source,
-            "utm_medium": link.utm_medium,
-            "utm_campaign": link.utm_campaign,
-            "utm_term": link.utm_term,
-            "utm_content": link.utm_content,
-            "expires_at": link.expires_at.isoformat() if link.expires_at else None,
-            "is_active": link.is_active,
-            "click_count": len(link.clicks) if link.clicks else 0,
-            "created_at": link.created_at.isoformat() if link.created_at else None,
-            "updated_at": link.updated_at.isoformat() if link.updated_at else None
+            "created": created,
+            "failed": len(results) - created,
+            "results": results
         },
-        message="Lien créé avec succès"
+        message=f"{created} lien(s) créé(s)"
+    )
+
+def _selection_criteria(selection: LinkSelection) -> dict:
+    criteria = selection.model_dump(exclude_none=True)
+    if not criteria:
+        # Refuser une sélection vide plutôt que de toucher tout le projet
+        raise ValidationException("Au moins un critère de sélection est requis", field="selection")
+    return criteria
+
+@router.post("/batch/update")
+def bulk_update_links(
+    payload: DynamicLinkBulkUpdate,
+    project: Project = Depends(get_project_by_id),
+    db: Session = Depends(get_db)
+):
+    criteria = _selection_criteria(payload.selection)
+    updated = BulkLinkService.update_links(
+        db, str(project.id), criteria, payload.values.model_dump(exclude_unset=True)
+    )
+    
+    return ApiResponse.success(
+        data={"updated": updated},
+        message=f"{updated} lien(s) mis à jour"
+    )
+
+@router.post("/batch/deactivate")
+def bulk_deactivate_links(
+    payload: DynamicLinkBulkSelection,
+    project: Project = Depends(get_project_by_id),
+    db: Session = Depends(get_db)
+):
+    criteria = _selection_criteria(payload.selection)
+    updated = BulkLinkService.update_links(db, str(project.id), criteria, {"is_active": False})
+    
+    return ApiResponse.success(
+        data={"updated": updated},
+        message=f"{updated} lien(s) désactivé(s)"
+    )
+
+@router.post("/batch/delete")
+def bulk_delete_links(
+    payload: DynamicLinkBulkSelection,
+    project: Project = Depends(get_project_by_id),
+    db: Session = Depends(get_db)
+):
+    criteria = _selection_criteria(payload.selection)
+    deleted = BulkLinkService.delete_links(db, str(project.id), criteria)
+    
+    return ApiResponse.success(
+        data={"deleted": deleted},
+        message=f"{deleted} lien(s) supprimé(s)"
     )
 
+def _import_job_data(job: ImportJob) -> dict:
+    progress = 0.0
+    if job.status == "completed":
+        progress = 100.0
+    elif job.file_size:
+        progress = round((job.bytes_processed or 0) / job.file_size * 100, 2)
+    
+    return {
+        "id": str(job.id),
+        "status": job.status,
+        "progress": progress,
+        "file_size": job.file_size,
+        "rows_processed": job.rows_processed or 0,
+        "rows_created": job.rows_created or 0,
+        "rows_failed": job.rows_failed or 0,
+        "errors": job.errors or [],
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None
+    }
+
+@router.post("/import", status_code=202)
+async def import_links(
+    request: Request,
+    project: Project = Depends(get_project_by_id),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Importer des liens depuis un CSV envoyé tel quel (text/csv) ; traité en arrière-plan."""
+    
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE:
+        return ApiResponse.error(
+            message=f"Fichier trop volumineux (maximum {settings.MAX_FILE_SIZE} octets)",
+            status_code=413
+        )
+    
+    job = await ImportService.create_job(db, project, current_user.id, request.stream())
+    
+    return ApiResponse.success(
+        data=_import_job_data(job),
+        message="Import en cours"
+    )
+
+@router.get("/import/{job_id}")
+async def get_import_job(
+    job_id: str,
+    project: Project = Depends(get_project_by_id),
+    db: Session = Depends(get_db)
+):
+    job = db.query(ImportJob).filter(
+        ImportJob.id == job_id,
+        ImportJob.project_id == project.id
+    ).first()
+    
+    if not job:
+        return ApiResponse.error(
+            message="Import non trouvé",
+            status_code=404
+        )
+    
+    return ApiResponse.success(data=_import_job_data(job))
+
 @router.get("/{link_id}")
 async def get_link(
     link_id: str,
@@ -168,35 +290,8 @@ async def get_link(
             status_code=404
         )
     
-    short_url = LinkGenerator.build_short_url(
-        link.short_code, 
-        project.custom_domain or settings.DOMAIN
-    )
-    
-    return ApiResponse.success(
-        data={
-            "id": str(link.id),
-            "short_code": link.short_code,
-            "short_url": short_url,
-            "original_url": link.original_url,
-            "title": link.title,
-            "description": link.description,
-            "android_package": link.android_package,
-            "android_fallback_url": link.android_fallback_url,
-            "ios_bundle_id": link.ios_bundle_id,
-            "ios_fallback_url": link.ios_fallback_url,
-            "desktop_fallback_url": link.desktop_fallback_url,
-            "utm_source": link.utm_source,
-            "utm_medium": link.utm_medium,
-            "utm_campaign": link.utm_campaign,
-            "utm_term": link.utm_term,
-            "utm_content": link.utm_content,
-            "expires_at": link.expires_at.isoformat() if link.expires_at else None,
-            "is_active": link.is_active,
-            "click_count": len(link.clicks) if link.clicks else 0,
-            "created_at": link.created_at.isoformat() if link.created_at else None,
-            "updated_at": link.updated_at.isoformat() if link.updated_at else None
-        },
+    return api_success(
+        data=LinkSerializer.dashboard_links(db, project, [link])[0],
         message="Lien récupéré avec succès"
     )
 
@@ -228,35 +323,8 @@ async def update_link(
     db.commit()
     db.refresh(link)
     
-    short_url = LinkGenerator.build_short_url(
-        link.short_code, 
-        project.custom_domain or settings.DOMAIN
-    )
-    
-    return ApiResponse.success(
-        data={
-            "id": str(link.id),
-            "short_code": link.short_code,
-            "short_url": short_url,
-            "original_url": link.original_url,
-            "title": link.title,
-            "description": link.description,
-            "android_package": link.android_package,
-            "android_fallback_url": link.android_fallback_url,
-            "ios_bundle_id": link.ios_bundle_id,
-            "ios_fallback_url": link.ios_fallback_url,
-            "desktop_fallback_url": link.desktop_fallback_url,
-            "utm_source": link.utm_source,
-            "utm_medium": link.utm_medium,
-            "utm_campaign": link.utm_campaign,
-            "utm_term": link.utm_term,
-            "utm_content": link.utm_content,
-            "expires_at": link.expires_at.isoformat() if link.expires_at else None,
-            "is_active": link.is_active,
-            "click_count": len(link.clicks) if link.clicks else 0,
-            "created_at": link.created_at.isoformat() if link.created_at else None,
-            "updated_at": link.updated_at.isoformat() if link.updated_at else None
-        },
+    return api_success(
+        data=LinkSerializer.dashboard_links(db, project, [link])[0],
         message="Lien mis à jour avec succès"
     )
 
@@ -323,8 +391,8 @@ async def delete_link(
             status_code=404
         )
     
-    db.delete(link)
-    db.commit()
+    # Agrégats et clics d'abord (clés étrangères), comme pour la suppression en masse
+    BulkLinkService.delete_links(db, str(project.id), {"ids": [link.id]})
     
     return ApiResponse.success(
         message="Lien supprimé avec succès"
@@ -6,11 +6,14 @@ from datetime import datetime
 import user_agents
 
 from app.core.database import get_db
+from app.core.static_assets import asset_url
 from app.models.dynamic_link import DynamicLink
 from app.services.analytics_service import AnalyticsService
+from app.services.fingerprint_matcher import fingerprint_matcher, screen_class
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
 
 def get_client_ip(request: Request) -> str:
     forwarded = request.headers.get("X-Forwarded-For")
@@ -60,7 +63,7 @@ async def redirect_link(
     client_ip = get_client_ip(request)
     geo_info = get_geolocation_from_ip(client_ip)
     
-    await AnalyticsService.record_click(
+    click = await AnalyticsService.record_click(
         db=db,
         link_id=link.id,
         ip_address=client_ip,
@@ -69,9 +72,34 @@ async def redirect_link(
         country=geo_info["country"],
         device_type=user_agent.device.family,
         os=user_agent.os.family,
-        browser=user_agent.browser.family
+        browser=user_agent.browser.family,
+        project_id=link.project_id
     )
     
+    # Empreinte du clic pour le rapprochement à la première ouverture de l'app
+    if user_agent.is_mobile or user_agent.is_tablet:
+        fingerprint_matcher.record(
+            project_id=str(link.project_id),
+            link_id=str(link.id),
+            ip=client_ip,
+            platform=user_agent.os.family,
+            os_version=user_agent.os.version_string,
+            locale=request.headers.get("accept-language"),
+            screen=screen_class(is_tablet=user_agent.is_tablet),
+            original_url=str(link.original_url),
+            parameters={
+                key: value for key, value in {
+                    "utm_source": link.utm_source,
+                    "utm_medium": link.utm_medium,
+                    "utm_campaign": link.utm_campaign,
+                    "utm_content": link.utm_content,
+                    "utm_term": link.utm_term
+                }.items() if value
+            },
+            click_id=click.id,
+            clicked_at=click.clicked_at
+        )
+    
     # Si c'est un appareil mobile, utiliser le template avec JS amélioré
     if user_agent.is_mobile and (link.android_package or link.ios_bundle_id):
         project = link.project
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple, Type
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'une dépendance externe.
+
+    Après `failure_threshold` échecs consécutifs, le circuit s'ouvre : les
+    appelants passent directement à leur repli pendant `reset_timeout`
+    secondes, puis un seul appel d'essai décide de la refermeture. Seules les
+    exceptions de `errors` comptent comme des échecs de la dépendance.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        errors: Tuple[Type[BaseException], ...] = (Exception,)
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.errors = errors
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self, probe: Optional[Callable[[], None]] = None) -> bool:
+        """
+        La dépendance peut-elle être appelée ? En demi-ouverture, un seul
+        appelant obtient l'essai ; `probe` (ex. PING) le réalise aussitôt.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN:
+                return False
+            if state == HALF_OPEN:
+                # Réserver l'essai : les autres appelants restent sur le repli
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            elif state == CLOSED:
+                return True
+
+        if probe is None:
+            return True
+        try:
+            probe()
+        except Exception:
+            self.record_failure()
+            return False
+        self.record_success()
+        return True
+
+    @contextmanager
+    def guard(self):
+        """
+        Entourer les appels à la dépendance : une erreur de `errors` est
+        comptée puis propagée, un bloc sans erreur remet le compteur à zéro.
+        """
+        try:
+            yield
+        except self.errors:
+            self.record_failure()
+            raise
+        self.record_success()
+
+    def record_success(self):
+        if self._state == CLOSED and not self._failures:
+            # Cas courant : rien à changer, pas de verrou
+            return
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit %s refermé", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit %s ouvert après %d échecs", self.name, self._failures)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
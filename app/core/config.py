@@ -12,7 +12,29 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     
     DATABASE_URL: str = "sqlite:///./synctra.db"
+    # Pool de connexions (Postgres) : prévoir DB_POOL_SIZE ≈ threads par worker
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # Attente max d'une connexion libre (secondes)
+    DB_POOL_RECYCLE: int = 1800  # Renouveler les connexions plus anciennes (secondes)
+    
+    # Profil SQLite : "default" (connexion unique partagée) ou "production"
+    # (WAL, pool de lecteurs, écritures sérialisées sur une connexion)
+    SQLITE_PROFILE: str = "default"
+    SQLITE_READ_POOL_SIZE: int = 8
+    SQLITE_BUSY_TIMEOUT: float = 10.0  # Attente max du tour d'écriture (secondes)
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    
+    # Réplique de lecture pour l'analytics et l'admin (vide : tout sur le primaire)
+    READ_DATABASE_URL: Optional[str] = None
+    READ_REPLICA_MAX_LAG: Optional[float] = None  # Retard toléré (secondes) avant repli sur le primaire
+    READ_REPLICA_CHECK_INTERVAL: float = 5.0
     REDIS_URL: str = "redis://localhost:6379"
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    REDIS_RECONNECT_INTERVAL: int = 5  # Nouvelle tentative de connexion (secondes)
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5
+    REDIS_BREAKER_RESET_TIMEOUT: int = 30
     
     ALLOWED_HOSTS: List[str] = ["*"]
     DEBUG: bool = True
@@ -22,10 +44,79 @@ class Settings(BaseSettings):
     RATE_LIMIT_PER_HOUR: int = 1000
     RATE_LIMIT_PER_SECOND: int = 10
     
+    # Clés d'idempotence des écritures SDK (en-tête Idempotency-Key)
+    IDEMPOTENCY_TTL: int = 24 * 3600
+    IDEMPOTENCY_LOCK_TTL: int = 60  # Durée max d'une requête en cours avant reprise possible
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.05
+    
     # Stockage local pour les fichiers
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     
+    # Exports asynchrones
+    EXPORT_MAX_WORKERS: int = 2
+    EXPORT_MAX_CONCURRENT_PER_ORG: int = 1
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_STALE_JOB_TIMEOUT: int = 900  # Sans progression depuis ce délai (secondes) : job repris
+    
+    # Imports CSV de liens (taille limitée par MAX_FILE_SIZE)
+    IMPORT_MAX_WORKERS: int = 2
+    IMPORT_MAX_CONCURRENT_PER_ORG: int = 1
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    IMPORT_STALE_JOB_TIMEOUT: int = 900  # Sans progression depuis ce délai (secondes) : job repris
+    
+    # Partitionnement et rétention des clics
+    CLICK_PARTITION_INTERVAL: str = "month"  # day, week, month
+    CLICK_PARTITIONS_AHEAD: int = 2
+    CLICK_RETENTION_DAYS: Optional[int] = None  # None = conservation illimitée
+    CLICK_PARTITION_MAINTENANCE_INTERVAL: int = 3600
+    
+    # Compteurs temps réel (Redis)
+    LIVE_COUNTER_RECONCILE_INTERVAL: int = 300
+    LIVE_COUNTER_RECONCILE_MINUTES: int = 60
+    
+    # Agrégats quotidiens des clics
+    ROLLUP_INTERVAL: int = 300
+    ROLLUP_LOOKBACK_DAYS: int = 2
+    
+    # Pagination par curseur : durée de cache des totaux (secondes)
+    PAGINATION_COUNT_CACHE_TTL: int = 60
+    
+    # Instantané des métriques du dashboard admin (secondes)
+    ADMIN_METRICS_REFRESH_INTERVAL: int = 60
+    ADMIN_METRICS_MAX_STALENESS: int = 300
+    
+    # Liens différés (Redis, journal d'audit écrit en différé)
+    DEFERRED_LINK_TTL_HOURS: int = 24
+    DEFERRED_AUDIT_FLUSH_INTERVAL: int = 5
+    DEFERRED_AUDIT_BATCH_SIZE: int = 500
+    DEFERRED_CONSUMED_RETENTION_DAYS: int = 30
+    DEFERRED_PURGE_INTERVAL: int = 3600
+    DEFERRED_PURGE_BATCH_SIZE: int = 500
+    DEFERRED_PURGE_PAUSE: float = 0.1  # Pause entre deux lots (secondes)
+    
+    # Rapprochement des liens différés par empreinte (sans deviceId)
+    FINGERPRINT_WINDOW_MINUTES: int = 120
+    FINGERPRINT_BUCKET_MINUTES: int = 15
+    FINGERPRINT_MAX_PER_BUCKET: int = 50  # Clics retenus par préfixe IP et par seau
+    FINGERPRINT_MIN_SCORE: float = 0.5
+    DEFERRED_CONTEXT_TTL: int = 86400 * 7
+    DEFERRED_CONTEXT_MEMORY_MAX: int = 10000  # Contextes gardés en mémoire sans Redis
+    INSTALL_STATUS_TTL: int = 3600
+    INSTALL_STATUS_STREAM_TIMEOUT: int = 300  # Durée maximale d'une connexion SSE (secondes)
+    INSTALL_STATUS_HEARTBEAT: int = 15
+    
+    # Ingestion des événements analytics du SDK
+    ANALYTICS_EVENTS_MAX_BATCH: int = 1000
+    
+    # Codes courts : séquence réservée par blocs, permutée par un chiffrement de Feistel
+    SHORT_CODE_SECRET: Optional[str] = None  # Ne plus changer une fois des codes émis
+    SHORT_CODE_BLOCK_SIZE: int = 1000
+    LINKS_BATCH_MAX_SIZE: int = 10000
+    LINKS_BULK_CHUNK_SIZE: int = 1000  # Liens modifiés par transaction lors des opérations en masse
+    
     DOMAIN: str = "synctra.link"
     
     SMTP_HOST: Optional[str] = None
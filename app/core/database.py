@@ -1,12 +1,27 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.pool import StaticPool
+import threading
+import time
 import redis
 
+from app.core.circuit_breaker import CircuitBreaker
 from app.core.config import settings
+from app.core.pool_metrics import InstrumentedQueuePool, pool_metrics
+from app.core.read_replica import ReplicaLagGuard
+from app.core.sqlite_profile import create_sqlite_engines, is_file_database
 
-if settings.DATABASE_URL.startswith("sqlite"):
+# Moteur de lecture séparé quand un profil le prévoit (None : tout passe par `engine`)
+read_engine = None
+
+if settings.DATABASE_URL.startswith("sqlite") and settings.SQLITE_PROFILE == "production" \
+        and is_file_database(settings.DATABASE_URL):
+    engine, read_engine = create_sqlite_engines(settings.DATABASE_URL)
+elif settings.DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         settings.DATABASE_URL,
         poolclass=StaticPool,
@@ -16,23 +31,111 @@ if settings.DATABASE_URL.startswith("sqlite"):
 else:
     engine = create_engine(
         settings.DATABASE_URL,
-        poolclass=StaticPool,
-        pool_size=20,
-        max_overflow=0,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
         pool_pre_ping=True,
         echo=settings.DEBUG
     )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+pool_metrics.attach(engine)
+
+# Réplique de lecture facultative, utilisée par get_read_db
+replica_engine = None
+replica_guard = None
+
+if settings.READ_DATABASE_URL:
+    if settings.READ_DATABASE_URL.startswith("sqlite"):
+        replica_engine = create_engine(
+            settings.READ_DATABASE_URL,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+            echo=settings.DEBUG
+        )
+    else:
+        replica_engine = create_engine(
+            settings.READ_DATABASE_URL,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            echo=settings.DEBUG
+        )
+    replica_guard = ReplicaLagGuard(
+        replica_engine,
+        max_lag=settings.READ_REPLICA_MAX_LAG,
+        check_interval=settings.READ_REPLICA_CHECK_INTERVAL
+    )
+
+class RoutingSession(Session):
+    """
+    Session qui envoie les lectures sur `read_bind` et les écritures sur le
+    moteur principal. Dès qu'une transaction a écrit, elle reste sur le
+    moteur principal jusqu'au commit pour relire ses propres écritures.
+    """
+
+    _writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_bind = self.info.get("read_bind")
+        if read_bind is None or self._writing or self._flushing \
+                or isinstance(clause, (UpdateBase, TextClause)):
+            self._writing = read_bind is not None
+            return super().get_bind(mapper, clause=clause, **kw)
+        return read_bind
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _end_writing(session, transaction):
+    if transaction.parent is None:
+        session._writing = False
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    info={"read_bind": read_engine}
+)
+
+def ReadSession() -> Session:
+    """
+    Session des lectures lourdes : SELECT sur la réplique si elle est à jour,
+    sinon comme SessionLocal. Les écritures vont toujours au primaire.
+    """
+    read_bind = read_engine
+    if replica_guard is not None and replica_guard.available():
+        read_bind = replica_engine
+    return SessionLocal(info={"read_bind": read_bind})
 
 Base = declarative_base()
 
-try:
-    redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-    # Test de connexion
-    redis_client.ping()
-except:
-    redis_client = None
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.REDIS_BREAKER_RESET_TIMEOUT,
+    errors=(redis.RedisError,)
+)
+_redis_lock = threading.Lock()
+
+def _connect_redis():
+    try:
+        client = redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+        # Test de connexion
+        client.ping()
+        return client
+    except redis.RedisError:
+        return None
+
+redis_client = _connect_redis()
+_redis_last_attempt = time.monotonic()
 
 def get_db():
     db = SessionLocal()
@@ -41,5 +144,46 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    db = ReadSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def get_redis():
+    """
+    Client Redis, ou None si Redis est indisponible : absent au démarrage
+    (nouvelle tentative au plus toutes les REDIS_RECONNECT_INTERVAL secondes)
+    ou circuit ouvert après des erreurs signalées par les appelants.
+    """
+    global redis_client, _redis_last_attempt
+
+    if redis_client is None:
+        now = time.monotonic()
+        if now - _redis_last_attempt < settings.REDIS_RECONNECT_INTERVAL:
+            return None
+        with _redis_lock:
+            if redis_client is None and now - _redis_last_attempt >= settings.REDIS_RECONNECT_INTERVAL:
+                _redis_last_attempt = now
+                redis_client = _connect_redis()
+        if redis_client is None:
+            return None
+
+    if not redis_breaker.allow(probe=redis_client.ping):
+        return None
     return redis_client
+
+def dialect_insert(table):
+    """INSERT propre au dialecte courant (permet ON CONFLICT sur Postgres et SQLite)."""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return insert(table)
+
+def ensure_indexes(conn, tables=None):
+    """Créer les index déclarés sur les modèles mais absents des tables existantes."""
+    for table in tables or Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
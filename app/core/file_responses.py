@@ -0,0 +1,87 @@
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Iterator, Optional, Tuple
+import os
+
+CHUNK_SIZE = 64 * 1024
+
+def _parse_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Analyse un en-tête Range à plage unique (bytes=début-fin).
+    Retourne None si l'en-tête est ignoré, lève ValueError s'il n'est pas satisfiable.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        # Plages multiples non supportées : on sert le fichier complet
+        return None
+
+    start_str, _, end_str = ranges.strip().partition("-")
+    if not start_str and not end_str:
+        return None
+
+    if not start_str:
+        # Suffixe : les N derniers octets
+        length = int(end_str)
+        if length <= 0:
+            raise ValueError("Plage vide")
+        return max(file_size - length, 0), file_size - 1
+
+    start = int(start_str)
+    end = int(end_str) if end_str else file_size - 1
+    if start >= file_size or start > end:
+        raise ValueError("Plage non satisfiable")
+    return start, min(end, file_size - 1)
+
+def _iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def range_file_response(
+    path: str,
+    request: Request,
+    media_type: str,
+    filename: str
+) -> Response:
+    """Sert un fichier en prenant en charge les requêtes partielles (Range)."""
+    file_size = os.path.getsize(path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+
+    range_header = request.headers.get("range")
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = _parse_range(range_header, file_size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{file_size}", "Accept-Ranges": "bytes"}
+            )
+
+    if byte_range is None:
+        headers["Content-Length"] = str(file_size)
+        return StreamingResponse(
+            _iter_file(path, 0, file_size),
+            media_type=media_type,
+            headers=headers
+        )
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        _iter_file(path, start, length),
+        status_code=206,
+        media_type=media_type,
+        headers=headers
+    )
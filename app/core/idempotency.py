@@ -0,0 +1,91 @@
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+
+import redis
+
+from app.core.config import settings
+from app.core.database import get_redis, redis_breaker
+from app.services.deferred_context_store import MemoryContextStore
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+
+def idempotency_key(scope: str, key: str) -> str:
+    return f"idempotency:{scope}:{key}"
+
+class IdempotencyStore:
+    """
+    Réponses des requêtes SDK rejouables. Un enregistrement est d'abord posé
+    « en cours » (SET NX, TTL court) par la première requête, puis remplacé par
+    la réponse complète (TTL long). Sans Redis, repli en mémoire du processus.
+    """
+
+    def __init__(self):
+        self.memory = MemoryContextStore(settings.DEFERRED_CONTEXT_MEMORY_MAX)
+
+    def _client(self):
+        return get_redis()
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(True, None) si l'appelant doit traiter la requête, (False, enregistrement existant) sinon."""
+        record = {"state": PENDING, "fingerprint": fingerprint}
+        client = self._client()
+        if client:
+            try:
+                with redis_breaker.guard():
+                    if client.set(key, json.dumps(record), nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL):
+                        return True, None
+                    raw = client.get(key)
+                    if raw is None:
+                        # Expiré entre les deux appels : retenter une fois
+                        return bool(client.set(key, json.dumps(record), nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL)), None
+                    return False, json.loads(raw)
+            except redis.RedisError:
+                logger.warning("Clés d'idempotence en mémoire (Redis indisponible)")
+
+        existing = self.memory.get(key)
+        if existing is not None:
+            return False, existing
+        self.memory.put(key, record, settings.IDEMPOTENCY_LOCK_TTL)
+        return True, None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        client = self._client()
+        if client:
+            try:
+                with redis_breaker.guard():
+                    raw = client.get(key)
+                    if raw is not None:
+                        return json.loads(raw)
+            except redis.RedisError:
+                pass
+        return self.memory.get(key)
+
+    def complete(self, key: str, record: Dict[str, Any]):
+        record = {**record, "state": DONE}
+        client = self._client()
+        if client:
+            try:
+                with redis_breaker.guard():
+                    client.setex(key, settings.IDEMPOTENCY_TTL, json.dumps(record))
+                    self.memory.pop(key)
+                    return
+            except redis.RedisError:
+                pass
+        self.memory.put(key, record, settings.IDEMPOTENCY_TTL)
+
+    def release(self, key: str):
+        """Abandonner une requête en échec : la prochaine tentative sera traitée."""
+        client = self._client()
+        if client:
+            try:
+                with redis_breaker.guard():
+                    client.delete(key)
+            except redis.RedisError:
+                pass
+        self.memory.pop(key)
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,61 @@
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Tuple
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class OrganizationJobQueue:
+    """
+    Exécute des tâches longues dans un pool de threads dédié, avec un
+    plafond de tâches simultanées par organisation. Les tâches au-delà
+    du plafond attendent leur tour dans une file FIFO propre à l'organisation.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_per_organization: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix=name
+        )
+        self._max_per_organization = max(1, max_per_organization)
+        self._running: Dict[str, int] = defaultdict(int)
+        self._pending: Dict[str, Deque[Tuple[Callable, Tuple[Any, ...]]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def submit(self, organization_id: str, func: Callable, *args: Any) -> None:
+        with self._lock:
+            if self._running[organization_id] >= self._max_per_organization:
+                self._pending[organization_id].append((func, args))
+                return
+            self._running[organization_id] += 1
+
+        self._executor.submit(self._run, organization_id, func, args)
+
+    def pending_count(self, organization_id: str) -> int:
+        with self._lock:
+            return len(self._pending.get(organization_id, ()))
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, organization_id: str, func: Callable, args: Tuple[Any, ...]) -> None:
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Échec de la tâche %s", getattr(func, "__name__", func))
+        finally:
+            next_job = None
+            with self._lock:
+                pending = self._pending.get(organization_id)
+                if pending:
+                    next_job = pending.popleft()
+                else:
+                    self._running[organization_id] -= 1
+                    if self._running[organization_id] <= 0:
+                        self._running.pop(organization_id, None)
+                        self._pending.pop(organization_id, None)
+
+            # Le créneau de l'organisation passe directement à la tâche suivante
+            if next_job:
+                self._executor.submit(self._run, organization_id, *next_job)
@@ -0,0 +1,146 @@
+from sqlalchemy import String, literal, tuple_, desc
+from sqlalchemy.orm import Query
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import hashlib
+import json
+import threading
+import time
+
+import redis
+
+from app.core.config import settings
+from app.core.database import get_redis, redis_breaker
+
+_count_cache: Dict[str, Tuple[float, int]] = {}
+_count_generations: Dict[str, int] = {}
+_count_lock = threading.Lock()
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    """Curseur opaque sur (created_at, id) du dernier élément d'une page."""
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(item_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Curseur de pagination invalide")
+
+def _created_bound(query: Query, created_at: datetime):
+    if query.session.get_bind().dialect.name == "sqlite":
+        # SQLite compare des chaînes : les valeurs par défaut du serveur n'ont pas de
+        # microsecondes alors que SQLAlchemy en ajoute toujours à ses paramètres
+        return literal(created_at.isoformat(sep=" "), String)
+    return literal(created_at)
+
+def keyset_page(
+    query: Query,
+    created_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Page suivante d'une requête triée par (created_at, id) décroissants.
+    Le coût ne dépend pas de la profondeur : WHERE (created_at, id) < curseur.
+    """
+
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(created_column, id_column) < tuple_(_created_bound(query, created_at), literal(item_id))
+        )
+
+    rows = query.order_by(desc(created_column), desc(id_column)).limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+    return items, next_cursor
+
+GLOBAL_COUNT_SCOPE = "*"  # Totaux non limités à un projet (listes d'admin)
+
+def _generation_key(scope: str) -> str:
+    return f"count_gen:{scope}"
+
+def _generation(redis_client, scope: str) -> int:
+    if redis_client:
+        with redis_breaker.guard():
+            return int(redis_client.get(_generation_key(scope)) or 0)
+    with _count_lock:
+        return _count_generations.get(scope, 0)
+
+def cached_count(query: Query, project_id: Optional[str] = None, ttl: Optional[int] = None) -> int:
+    """
+    COUNT(*) d'une requête, mis en cache (Redis ou mémoire) pendant `ttl` secondes.
+
+    La clé porte la génération du projet : `invalidate_counts(project_id)` la fait
+    avancer et les anciennes clés expirent d'elles-mêmes.
+    """
+    ttl = ttl if ttl is not None else settings.PAGINATION_COUNT_CACHE_TTL
+    scope = str(project_id) if project_id is not None else GLOBAL_COUNT_SCOPE
+    compiled = query.statement.compile()
+    fingerprint = hashlib.sha1(
+        (str(compiled) + repr(sorted(compiled.params.items()))).encode()
+    ).hexdigest()
+
+    redis_client = get_redis()
+    key = None
+    if redis_client:
+        try:
+            key = f"count:{scope}:{_generation(redis_client, scope)}:{fingerprint}"
+            with redis_breaker.guard():
+                cached = redis_client.get(key)
+                if cached is not None:
+                    return int(cached)
+        except redis.RedisError:
+            redis_client = None
+    if not redis_client:
+        key = f"count:{scope}:{_generation(None, scope)}:{fingerprint}"
+        with _count_lock:
+            entry = _count_cache.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+
+    total = query.order_by(None).count()
+
+    if redis_client:
+        try:
+            with redis_breaker.guard():
+                redis_client.set(key, total, ex=ttl)
+        except redis.RedisError:
+            pass
+    else:
+        with _count_lock:
+            if len(_count_cache) > 1000:
+                _count_cache.clear()
+            _count_cache[key] = (time.monotonic() + ttl, total)
+    return total
+
+def invalidate_counts(project_id: str):
+    """Oublier les totaux en cache d'un projet (après une modification en masse)."""
+    scopes = [str(project_id), GLOBAL_COUNT_SCOPE]
+    with _count_lock:
+        for scope in scopes:
+            _count_generations[scope] = _count_generations.get(scope, 0) + 1
+
+    redis_client = get_redis()
+    if not redis_client:
+        return
+    try:
+        with redis_breaker.guard():
+            pipe = redis_client.pipeline(transaction=False)
+            for scope in scopes:
+                pipe.incr(_generation_key(scope))
+            pipe.execute()
+    except redis.RedisError:
+        pass
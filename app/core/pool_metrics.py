@@ -0,0 +1,106 @@
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from typing import Any, Dict
+import threading
+import time
+
+class PoolMetrics:
+    """
+    Compteurs du pool de connexions : attente pour obtenir une connexion,
+    délais dépassés, connexions ouvertes/recyclées et leur âge. De quoi
+    dimensionner le pool selon le nombre de workers.
+    """
+
+    def __init__(self, sample_size: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=sample_size)
+        self._opened_at: Dict[int, float] = {}
+        self.pool = None
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+
+    def record_timeout(self, seconds: float):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_max = max(self.wait_max, seconds)
+
+    def attach(self, engine):
+        """Brancher les événements du pool d'un moteur."""
+        self.pool = engine.pool
+
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connections_opened += 1
+                self._opened_at[id(connection_record)] = time.monotonic()
+
+        @event.listens_for(engine, "close")
+        def _close(dbapi_connection, connection_record):
+            with self._lock:
+                self.connections_closed += 1
+                self._opened_at.pop(id(connection_record), None)
+
+        @event.listens_for(engine, "invalidate")
+        def _invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            waits = sorted(self._waits)
+            ages = [now - opened for opened in self._opened_at.values()]
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "invalidations": self.invalidations,
+                "connection_age_max_s": round(max(ages), 1) if ages else 0.0,
+                "connection_age_avg_s": round(sum(ages) / len(ages), 1) if ages else 0.0
+            }
+
+        pool = self.pool
+        data["pool_class"] = type(pool).__name__ if pool is not None else None
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout_s=pool.timeout()
+            )
+        return data
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente de chaque emprunt de connexion."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - start)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
@@ -2,7 +2,7 @@ from fastapi import Request, HTTPException, status
 from typing import Dict, Optional
 import time
 import redis
-from app.core.database import get_redis
+from app.core.database import get_redis, redis_breaker
 from app.core.config import settings
 
 class RateLimiter:
@@ -31,7 +31,8 @@ class RateLimiter:
         pipe.zadd(key, {identifier: current_time})
         pipe.expire(key, window)
         
-        results = pipe.execute()
+        with redis_breaker.guard():
+            results = pipe.execute()
         current_requests = results[1]
         
         return current_requests < limit
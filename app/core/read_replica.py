@@ -0,0 +1,59 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from typing import Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 0 sur un primaire ou une réplique à jour ; sinon ancienneté de la dernière transaction rejouée
+PG_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+class ReplicaLagGuard:
+    """
+    Décide si la réplique de lecture peut servir les requêtes : elle doit
+    répondre et, si `max_lag` est défini, avoir moins de `max_lag` secondes
+    de retard. Le résultat est gardé `check_interval` secondes.
+    """
+
+    def __init__(self, engine: Engine, max_lag: Optional[float], check_interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self._available = False
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def measure_lag(self) -> float:
+        with self.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                return float(conn.execute(PG_LAG_QUERY).scalar() or 0)
+            # Autres bases (réplique locale de test) : joignable, retard inconnu
+            conn.execute(text("SELECT 1"))
+            return 0.0
+
+    def _check(self):
+        try:
+            self.lag = self.measure_lag()
+            self._available = self.max_lag is None or self.lag <= self.max_lag
+            if not self._available:
+                logger.warning("Réplique en retard de %.1fs, lectures sur le primaire", self.lag)
+        except Exception:
+            self.lag = None
+            self._available = False
+            logger.warning("Réplique de lecture injoignable, lectures sur le primaire")
+
+    def available(self) -> bool:
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                    self._check()
+                    self._checked_at = now
+        return self._available
@@ -0,0 +1,33 @@
+from fastapi.responses import ORJSONResponse
+from typing import Any, Dict, Optional
+
+# Réponses déjà composées de types simples : encodées directement par orjson,
+# sans passer par jsonable_encoder ni par la validation des modèles pydantic.
+# La réponse étant construite ici, les en-têtes (pagination…) passent par `headers`
+# et non par le paramètre `response: Response` de l'endpoint.
+
+def api_success(
+    data: Any = None,
+    message: str = "Succès",
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    """Équivalent rapide de ApiResponse.success."""
+    return ORJSONResponse(
+        {"status": "success", "message": message, "data": data},
+        status_code=status_code,
+        headers=headers
+    )
+
+def sdk_success(
+    data: Any = None,
+    message: Optional[str] = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    """Équivalent rapide de SDKResponse(success=True, ...)."""
+    return ORJSONResponse(
+        {"success": True, "data": data, "message": message, "code": None, "details": None},
+        status_code=status_code,
+        headers=headers
+    )
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Callable, List
+import asyncio
+import logging
+
+from app.core.database import get_redis, redis_breaker
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PeriodicTask:
+    name: str
+    interval: float
+    func: Callable[[], object]
+    exclusive: bool = True
+
+class Scheduler:
+    """
+    Planificateur minimal de tâches périodiques exécutées hors de la boucle
+    d'événements. Les tâches exclusives prennent un verrou Redis pour ne
+    tourner que dans un seul worker à la fois.
+    """
+
+    def __init__(self):
+        self._tasks: List[PeriodicTask] = []
+        self._handles: List[asyncio.Task] = []
+
+    def register(self, name: str, interval: float, func: Callable[[], object], exclusive: bool = True):
+        self._tasks.append(PeriodicTask(name=name, interval=interval, func=func, exclusive=exclusive))
+
+    async def start(self):
+        for task in self._tasks:
+            self._handles.append(asyncio.create_task(self._loop(task)))
+
+    async def stop(self):
+        for handle in self._handles:
+            handle.cancel()
+        await asyncio.gather(*self._handles, return_exceptions=True)
+        self._handles.clear()
+
+    def _acquire(self, task: PeriodicTask) -> bool:
+        if not task.exclusive:
+            return True
+
+        redis_client = get_redis()
+        if not redis_client:
+            return True
+
+        try:
+            lock_ttl = max(int(task.interval * 0.9), 1)
+            with redis_breaker.guard():
+                return bool(redis_client.set(f"scheduler:lock:{task.name}", "1", nx=True, ex=lock_ttl))
+        except Exception:
+            # Redis indisponible : mieux vaut un doublon qu'une tâche jamais exécutée
+            return True
+
+    async def _loop(self, task: PeriodicTask):
+        while True:
+            try:
+                if self._acquire(task):
+                    await asyncio.to_thread(task.func)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Échec de la tâche planifiée %s", task.name)
+            await asyncio.sleep(task.interval)
+
+scheduler = Scheduler()
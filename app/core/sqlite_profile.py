@@ -0,0 +1,67 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+from typing import Tuple
+
+from app.core.config import settings
+from app.core.pool_metrics import InstrumentedQueuePool
+
+def is_file_database(url: str) -> bool:
+    """Base SQLite sur fichier (le profil ne s'applique pas à :memory:)."""
+    database = make_url(url).database
+    return bool(database) and database != ":memory:" and not database.startswith("file::memory:")
+
+def _apply_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT * 1000)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # Valeur négative : taille du cache en KiB plutôt qu'en pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+def create_sqlite_engines(url: str) -> Tuple[Engine, Engine]:
+    """
+    Profil de production SQLite : WAL, une seule connexion d'écriture et un
+    pool de connexions en lecture seule.
+
+    Les écritures attendent leur tour sur l'unique connexion de l'écrivain
+    (file FIFO du pool, délai SQLITE_BUSY_TIMEOUT) au lieu de se disputer le
+    verrou de la base ; en WAL, les lecteurs ne sont jamais bloqués par elles.
+    """
+    connect_args = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT}
+
+    writer = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_BUSY_TIMEOUT,
+        connect_args=connect_args,
+        echo=settings.DEBUG
+    )
+    reader = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_BUSY_TIMEOUT,
+        connect_args=connect_args,
+        echo=settings.DEBUG
+    )
+
+    @event.listens_for(writer, "connect")
+    def _writer_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, read_only=False)
+
+    @event.listens_for(reader, "connect")
+    def _reader_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, read_only=True)
+
+    return writer, reader
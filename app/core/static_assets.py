@@ -0,0 +1,98 @@
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+from pathlib import Path
+from typing import Dict, Tuple
+import gzip
+import hashlib
+import mimetypes
+import os
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".svg", ".html", ".txt"}
+
+class AssetManifest:
+    """
+    Empreintes de contenu des fichiers statiques : `deferred/interstitial.css`
+    est publié sous `deferred/interstitial.<hash>.css`, une URL qui ne change
+    qu'avec le fichier et peut donc être mise en cache indéfiniment.
+    """
+
+    def __init__(self, directory: str = "static"):
+        self.directory = Path(directory)
+        self._hashed: Dict[str, str] = {}  # chemin logique -> chemin versionné
+        self._files: Dict[str, Tuple[str, bytes, bytes]] = {}  # chemin versionné -> (fichier, brut, gzip)
+        self._loaded = False
+
+    def load(self):
+        self._hashed.clear()
+        self._files.clear()
+        for path in sorted(self.directory.rglob("*")):
+            if not path.is_file() or path.suffix == ".gz":
+                continue
+            logical = path.relative_to(self.directory).as_posix()
+            content = path.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            hashed = f"{logical[:-len(path.suffix)] if path.suffix else logical}.{digest}{path.suffix}"
+
+            # Variante compressée calculée une fois, au niveau maximal
+            compressed = b""
+            if path.suffix in COMPRESSIBLE_SUFFIXES:
+                candidate = gzip.compress(content, compresslevel=9, mtime=0)
+                if len(candidate) < len(content):
+                    compressed = candidate
+
+            self._hashed[logical] = hashed
+            self._files[hashed] = (str(path), content, compressed)
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def url(self, logical: str) -> str:
+        """URL versionnée d'un fichier de `static/` (URL simple si le fichier est inconnu)."""
+        self._ensure_loaded()
+        return f"/static/{self._hashed.get(logical, logical)}"
+
+    def lookup(self, hashed: str):
+        self._ensure_loaded()
+        return self._files.get(hashed)
+
+asset_manifest = AssetManifest()
+
+def asset_url(logical: str) -> str:
+    return asset_manifest.url(logical)
+
+class HashedStaticFiles(StaticFiles):
+    """
+    StaticFiles servant les URL versionnées depuis la mémoire, avec un cache
+    immuable et la variante gzip quand le client l'accepte. Les autres chemins
+    gardent le comportement habituel (revalidation via ETag).
+    """
+
+    def __init__(self, *args, manifest: AssetManifest = asset_manifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        entry = self.manifest.lookup(path.replace(os.sep, "/"))
+        if entry is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        filename, content, compressed = entry
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE,
+            "Vary": "Accept-Encoding",
+        }
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if compressed and "gzip" in accept_encoding:
+            content = compressed
+            headers["Content-Encoding"] = "gzip"
+
+        media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        if scope["method"] == "HEAD":
+            headers["Content-Length"] = str(len(content))
+            return Response(status_code=200, headers=headers, media_type=media_type)
+        return Response(content, headers=headers, media_type=media_type)
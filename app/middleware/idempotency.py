@@ -0,0 +1,169 @@
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import asyncio
+import base64
+import hashlib
+import time
+
+from app.core.config import settings
+from app.core.idempotency import DONE, idempotency_key, idempotency_store
+
+HEADER = b"idempotency-key"
+METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+def _error(status_code: int, message: str, code: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": {"success": False, "message": message, "code": code}}
+    )
+
+class IdempotencyMiddleware:
+    """
+    En-tête Idempotency-Key sur les écritures du SDK : la réponse de la première
+    requête est conservée et rejouée telle quelle aux tentatives suivantes, sans
+    toucher à la base ; un doublon reçu pendant le traitement attend son résultat.
+    Les réponses 5xx ne sont pas conservées : la tentative suivante est retraitée.
+
+    Middleware ASGI pur : le corps est lu une fois pour l'empreinte puis rendu
+    à l'application.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/sdk/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in METHODS
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        raw_key = headers.get(HEADER)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = raw_key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _error(400, "Idempotency-Key invalide", "INVALID_IDEMPOTENCY_KEY")(scope, receive, send)
+            return
+
+        body, messages = await self._read_body(receive)
+
+        # Portée : la clé d'API et le projet, pour qu'une clé ne fuie pas entre clients
+        scope_hash = hashlib.sha256(
+            headers.get(b"authorization", b"") + b"|" + headers.get(b"x-project-id", b"")
+        ).hexdigest()[:32]
+        fingerprint = hashlib.sha256(
+            b"|".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+        store_key = idempotency_key(scope_hash, hashlib.sha256(key.encode()).hexdigest())
+
+        acquired, record = idempotency_store.begin(store_key, fingerprint)
+        if not acquired:
+            if record.get("state") != DONE:
+                record = await self._wait(store_key)
+            if record is None:
+                await _error(
+                    409, "Une requête avec cette Idempotency-Key est en cours", "IDEMPOTENCY_IN_PROGRESS"
+                )(scope, receive, send)
+                return
+            if record.get("fingerprint") != fingerprint:
+                await _error(
+                    422, "Idempotency-Key déjà utilisée pour une autre requête", "IDEMPOTENCY_KEY_REUSED"
+                )(scope, receive, send)
+                return
+            await self._replay(record)(scope, receive, send)
+            return
+
+        await self._process(scope, receive, messages, send, store_key, fingerprint)
+
+    @staticmethod
+    async def _read_body(receive: Receive):
+        chunks = []
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks), messages
+
+    @staticmethod
+    async def _wait(store_key: str):
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+            record = idempotency_store.get(store_key)
+            if record is None:
+                # Première requête en échec : laisser le client réessayer
+                return None
+            if record.get("state") == DONE:
+                return record
+        return None
+
+    @staticmethod
+    def _replay(record) -> Response:
+        response = Response(
+            content=base64.b64decode(record["body"]),
+            status_code=record["status"]
+        )
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]
+        ] + [(b"idempotent-replayed", b"true")]
+        return response
+
+    async def _process(
+        self,
+        scope: Scope,
+        receive: Receive,
+        messages,
+        send: Send,
+        store_key: str,
+        fingerprint: str
+    ):
+        pending = list(messages)
+
+        async def replay_receive() -> Message:
+            if pending:
+                return pending.pop(0)
+            # Corps déjà rendu : la suite (déconnexion) vient du client
+            return await receive()
+
+        response = {"status": 500, "headers": [], "body": []}
+
+        async def capture_send(message: Message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            idempotency_store.release(store_key)
+            raise
+
+        if response["status"] >= 500:
+            idempotency_store.release(store_key)
+            return
+
+        idempotency_store.complete(store_key, {
+            "fingerprint": fingerprint,
+            "status": response["status"],
+            "headers": response["headers"],
+            "body": base64.b64encode(b"".join(response["body"])).decode()
+        })
@@ -6,6 +6,12 @@ from .dynamic_link import DynamicLink
 from .link_click import LinkClick
 from .referral_code import ReferralCode
 from .subscription import Subscription
+from .export_job import ExportJob
+from .import_job import ImportJob
+from .analytics_event import AnalyticsEvent
+from .link_click_rollup import LinkClickRollup
+from .deferred_link import DeferredLink
+from .short_code_sequence import ShortCodeSequence
 
 __all__ = [
     "BaseModel",
@@ -15,5 +21,11 @@ __all__ = [
     "DynamicLink",
     "LinkClick", 
     "ReferralCode",
-    "Subscription"
+    "Subscription",
+    "ExportJob",
+    "ImportJob",
+    "AnalyticsEvent",
+    "LinkClickRollup",
+    "DeferredLink",
+    "ShortCodeSequence"
 ]
\ No newline at end of file
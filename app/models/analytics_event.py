@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, DateTime, Text, JSON, ForeignKey, Index, UniqueConstraint
+
+from app.models.base import BaseModel
+
+class AnalyticsEvent(BaseModel):
+    __tablename__ = "analytics_events"
+
+    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False)
+    event_id = Column(String(64))  # Identifiant fourni par le SDK (déduplication)
+    link_id = Column(String(36), nullable=False)
+
+    event_type = Column(String(50), nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    properties = Column(JSON, default={})
+
+    user_id = Column(String(255))
+    session_id = Column(String(255))
+    device_id = Column(String(255))
+    platform = Column(String(50))
+    app_version = Column(String(50))
+    user_agent = Column(Text)
+    ip_address = Column(String(45))
+    country = Column(String(2))
+    city = Column(String(100))
+    referrer = Column(Text)
+
+    __table_args__ = (
+        UniqueConstraint('project_id', 'event_id', name='uq_analytics_event_project_event'),
+        Index('idx_analytics_event_link', 'link_id', 'occurred_at'),
+        Index('idx_analytics_event_project_type', 'project_id', 'event_type', 'occurred_at'),
+    )
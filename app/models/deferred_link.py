@@ -28,7 +28,11 @@ class DeferredLink(BaseModel):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     __table_args__ = (
-        Index('idx_deferred_device_package', 'device_id', 'package_name', 'platform'),
+        # Couvre la recherche du lien à consommer (filtres + tri par created_at)
+        Index(
+            'idx_deferred_lookup',
+            'device_id', 'package_name', 'platform', 'is_consumed', 'expires_at', 'created_at'
+        ),
         Index('idx_deferred_expires', 'expires_at'),
         Index('idx_deferred_consumed', 'is_consumed'),
     )
@@ -38,4 +38,7 @@ class DynamicLink(BaseModel):
         Index('idx_link_project', 'project_id'),
         Index('idx_link_short_code', 'short_code'),
         Index('idx_link_created_by', 'created_by'),
+        # Pagination par curseur sur (created_at, id)
+        Index('idx_link_project_created', 'project_id', 'created_at', 'id'),
+        Index('idx_link_created', 'created_at', 'id'),
     )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Text, ForeignKey, Index
+
+from app.models.base import BaseModel
+
+class ExportJob(BaseModel):
+    __tablename__ = "export_jobs"
+
+    organization_id = Column(String(36), ForeignKey("organizations.id"), nullable=False)
+    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False)
+    created_by = Column(String(36), ForeignKey("users.id"))
+
+    # Paramètres de l'export
+    format = Column(String(10), nullable=False, default='csv')
+    date_from = Column(DateTime(timezone=True))
+    date_to = Column(DateTime(timezone=True))
+    link_ids = Column(Text)  # Identifiants séparés par des virgules
+
+    # Progression
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    total_rows = Column(Integer)
+    rows_written = Column(Integer, default=0)
+
+    # Artefact produit
+    file_path = Column(String(500))
+    file_size = Column(BigInteger)
+    error = Column(Text)
+
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('idx_export_job_project', 'project_id', 'created_at'),
+        Index('idx_export_job_status', 'status'),
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Text, JSON, ForeignKey, Index
+
+from app.models.base import BaseModel
+
+class ImportJob(BaseModel):
+    __tablename__ = "import_jobs"
+
+    organization_id = Column(String(36), ForeignKey("organizations.id"), nullable=False)
+    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False)
+    created_by = Column(String(36), ForeignKey("users.id"))
+
+    # Fichier CSV reçu, supprimé une fois l'import terminé
+    file_path = Column(String(500))
+    file_size = Column(BigInteger)
+
+    # Progression
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    bytes_processed = Column(BigInteger, default=0)
+    rows_processed = Column(Integer, default=0)
+    rows_created = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    errors = Column(JSON)  # [{"line": ..., "error": ...}], plafonné
+    error = Column(Text)
+
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('idx_import_job_project', 'project_id', 'created_at'),
+        Index('idx_import_job_status', 'status'),
+    )
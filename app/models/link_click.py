@@ -1,5 +1,6 @@
 from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, DECIMAL, func, Index
 from sqlalchemy.orm import relationship
+from datetime import datetime
 
 from app.models.base import BaseModel
 
@@ -23,7 +24,13 @@ class LinkClick(BaseModel):
     converted = Column(Boolean, default=False)
     conversion_value = Column(DECIMAL(10, 2))
     
-    clicked_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Clé de partitionnement : fait partie de la clé primaire (exigence Postgres)
+    clicked_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=datetime.utcnow,
+        server_default=func.now()
+    )
     
     link = relationship("DynamicLink", back_populates="clicks")
     
@@ -31,4 +38,5 @@ class LinkClick(BaseModel):
         Index('idx_click_link', 'link_id'),
         Index('idx_click_date', 'clicked_at'),
         Index('idx_click_platform', 'platform'),
+        {"postgresql_partition_by": "RANGE (clicked_at)"},
     )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Date, Integer, DateTime, ForeignKey, Index, func
+
+from app.core.database import Base
+
+class LinkClickRollup(Base):
+    """Agrégat quotidien des clics par lien, plateforme et pays."""
+
+    __tablename__ = "link_click_rollups"
+
+    # Clé composite : les agrégats sont recalculés par INSERT ... SELECT
+    link_id = Column(String(36), ForeignKey("dynamic_links.id"), primary_key=True)
+    bucket_date = Column(Date, primary_key=True)
+    platform = Column(String(50), primary_key=True, default='')  # '' = inconnue
+    country = Column(String(2), primary_key=True, default='')  # '' = inconnu
+
+    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False)
+    clicks = Column(Integer, nullable=False, default=0)
+    unique_clicks = Column(Integer, nullable=False, default=0)  # IP distinctes sur la journée
+    conversions = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_rollup_project_date', 'project_id', 'bucket_date'),
+    )
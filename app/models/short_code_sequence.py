@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, func
+
+from app.core.database import Base
+
+class ShortCodeSequence(Base):
+    """Séquence des codes courts, réservée par blocs par chaque processus."""
+
+    __tablename__ = "short_code_sequences"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, nullable=False, default=0)
+    # Clé de permutation générée à la création (si SHORT_CODE_SECRET n'est pas défini)
+    secret = Column(String(64), nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import BaseModel
@@ -19,3 +19,8 @@ class User(BaseModel):
     organization = relationship("Organization", back_populates="users")
     created_links = relationship("DynamicLink", back_populates="created_by_user")
     referral_codes = relationship("ReferralCode", back_populates="user")
+    
+    __table_args__ = (
+        # Pagination par curseur sur (created_at, id)
+        Index('idx_user_created', 'created_at', 'id'),
+    )
@@ -44,3 +44,33 @@ class ExportRequest(BaseModel):
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
     link_ids: Optional[List[str]] = None
+
+class ExportJobResponse(BaseModel):
+    id: str
+    status: str
+    format: str
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    total_rows: Optional[int] = None
+    rows_written: int = 0
+    progress: float = 0
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+class LiveCounterPoint(BaseModel):
+    timestamp: datetime
+    count: int
+
+class LiveCounters(BaseModel):
+    project_id: str
+    link_id: Optional[str] = None
+    total_24h: int
+    last_hour: int
+    current_minute: int
+    step_minutes: int
+    series: List[LiveCounterPoint]
+    generated_at: datetime
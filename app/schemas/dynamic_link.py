@@ -1,5 +1,5 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, HttpUrl, Field
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class DynamicLinkBase(BaseModel):
@@ -21,6 +21,10 @@ class DynamicLinkBase(BaseModel):
 class DynamicLinkCreate(DynamicLinkBase):
     pass
 
+class DynamicLinkBatchCreate(BaseModel):
+    # Validés un par un pour qu'un lien invalide ne rejette pas tout le lot
+    links: List[Dict[str, Any]] = Field(..., min_length=1)
+
 class DynamicLinkUpdate(BaseModel):
     original_url: Optional[HttpUrl] = None
     title: Optional[str] = None
@@ -50,3 +54,21 @@ class DynamicLinkResponse(DynamicLinkBase):
     
     class Config:
         from_attributes = True
+
+class LinkSelection(BaseModel):
+    """Critères combinés (ET) désignant les liens d'une opération en masse."""
+    ids: Optional[List[str]] = None
+    utm_campaign: Optional[str] = None
+    utm_source: Optional[str] = None
+    utm_medium: Optional[str] = None
+    url_contains: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class DynamicLinkBulkUpdate(BaseModel):
+    selection: LinkSelection
+    values: DynamicLinkUpdate
+
+class DynamicLinkBulkSelection(BaseModel):
+    selection: LinkSelection
@@ -17,6 +17,10 @@ class DeepLinkBase(BaseModel):
 class DeepLinkCreate(DeepLinkBase):
     metadata: Optional[Dict[str, Any]] = Field(None, description="Métadonnées du lien")
 
+class DeepLinkBatchCreate(BaseModel):
+    # Validés un par un pour qu'un lien invalide ne rejette pas tout le lot
+    links: List[Dict[str, Any]] = Field(..., min_length=1)
+
 class DeepLinkUpdate(BaseModel):
     originalUrl: Optional[str] = None
     parameters: Optional[Dict[str, Any]] = None
@@ -28,6 +32,24 @@ class DeepLinkUpdate(BaseModel):
     campaignId: Optional[str] = None
     referralCode: Optional[str] = None
 
+class LinkSelection(BaseModel):
+    """Critères combinés (ET) désignant les liens d'une opération en masse."""
+    ids: Optional[List[str]] = None
+    utmCampaign: Optional[str] = None
+    utmSource: Optional[str] = None
+    utmMedium: Optional[str] = None
+    urlContains: Optional[str] = None
+    isActive: Optional[bool] = None
+    createdAfter: Optional[datetime] = None
+    createdBefore: Optional[datetime] = None
+
+class DeepLinkBulkUpdate(BaseModel):
+    selection: LinkSelection
+    values: DeepLinkUpdate
+
+class DeepLinkBulkSelection(BaseModel):
+    selection: LinkSelection
+
 class DeepLinkResponse(DeepLinkBase):
     id: str
     shortUrl: str
@@ -35,7 +57,8 @@ class DeepLinkResponse(DeepLinkBase):
     isActive: bool
 
 class AnalyticsEvent(BaseModel):
-    type: str = Field(..., description="Type d'événement")
+    eventId: Optional[str] = Field(None, max_length=64, description="Identifiant unique de l'événement (déduplication)")
+    type: str = Field(..., max_length=50, description="Type d'événement")
     linkId: str = Field(..., description="ID du lien")
     timestamp: datetime = Field(..., description="Timestamp de l'événement")
     properties: Dict[str, Any] = Field(default_factory=dict)
@@ -51,7 +74,8 @@ class AnalyticsEvent(BaseModel):
     referrer: Optional[str] = None
 
 class AnalyticsEventBatch(BaseModel):
-    events: List[AnalyticsEvent]
+    # Validés un par un pour qu'un événement invalide ne rejette pas tout le batch
+    events: List[Dict[str, Any]] = Field(..., min_length=1)
 
 class ReferralCodeBase(BaseModel):
     userId: str = Field(..., description="ID de l'utilisateur")
@@ -96,8 +120,17 @@ class DeferredLinkCreate(BaseModel):
     linkId: str
     packageName: str
     deviceId: str
+    platform: str
     timestamp: datetime
     parameters: Dict[str, Any] = Field(default_factory=dict)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+class DeferredLinkMatchRequest(BaseModel):
+    platform: str
+    osVersion: Optional[str] = None
+    locale: Optional[str] = None
+    screenWidth: Optional[int] = Field(None, gt=0)
+    screenHeight: Optional[int] = Field(None, gt=0)
 
 class DeferredLinkQuery(BaseModel):
     packageName: str
@@ -114,9 +147,10 @@ class SDKResponse(BaseModel):
 
 class PaginatedResponse(BaseModel):
     links: List[DeepLinkResponse]
-    total: int
+    total: Optional[int] = None  # Mis en cache, seulement si includeTotal=true
     limit: int
     offset: int
+    nextCursor: Optional[str] = None
 
 class AnalyticsResponse(BaseModel):
     totalClicks: int
@@ -0,0 +1,107 @@
+from sqlalchemy import func, distinct
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import json
+import logging
+import threading
+
+import redis
+
+from app.core.config import settings
+from app.core.database import ReadSession, get_redis, redis_breaker
+from app.models.dynamic_link import DynamicLink
+from app.models.link_click_rollup import LinkClickRollup
+from app.models.project import Project
+from app.services.click_partitioning import click_partitions
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "admin:metrics"
+
+class AdminMetricsService:
+    """
+    Instantané des métriques du dashboard admin, recalculé par une tâche
+    périodique et servi depuis la mémoire ou Redis.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def compute(self) -> Dict:
+        db = ReadSession()
+        try:
+            today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            tomorrow = today + timedelta(days=1)
+
+            total_links = db.query(func.count(DynamicLink.id)).scalar() or 0
+            total_projects = db.query(func.count(Project.id)).scalar() or 0
+
+            # Prédicat d'intervalle sur clicked_at : index et partition du jour uniquement
+            clicks = click_partitions.clicks_for_range(db, today, tomorrow)
+            today_clicks = db.query(func.count(clicks.id)).filter(
+                clicks.clicked_at >= today,
+                clicks.clicked_at < tomorrow
+            ).scalar() or 0
+
+            # Liens ayant au moins un clic, lus dans les agrégats quotidiens
+            links_with_clicks = db.query(
+                func.count(distinct(LinkClickRollup.link_id))
+            ).scalar() or 0
+        finally:
+            db.close()
+
+        return {
+            "totalLinks": total_links,
+            "totalProjects": total_projects,
+            "todayClicks": today_clicks,
+            "conversionRate": round((links_with_clicks / total_links * 100) if total_links > 0 else 0, 1),
+            "generatedAt": datetime.utcnow().isoformat()
+        }
+
+    def refresh(self) -> Dict:
+        """Recalculer l'instantané et le publier dans Redis."""
+        snapshot = self.compute()
+        with self._lock:
+            self._snapshot = snapshot
+
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    redis_client.set(REDIS_KEY, json.dumps(snapshot), ex=settings.ADMIN_METRICS_MAX_STALENESS)
+            except redis.RedisError:
+                logger.warning("Publication des métriques admin dans Redis impossible")
+        return snapshot
+
+    def _age(self, snapshot: Optional[Dict]) -> float:
+        if not snapshot:
+            return float("inf")
+        return (datetime.utcnow() - datetime.fromisoformat(snapshot["generatedAt"])).total_seconds()
+
+    def _from_redis(self) -> Optional[Dict]:
+        redis_client = get_redis()
+        if not redis_client:
+            return None
+        try:
+            with redis_breaker.guard():
+                raw = redis_client.get(REDIS_KEY)
+        except redis.RedisError:
+            return None
+        return json.loads(raw) if raw else None
+
+    def get(self) -> Dict:
+        """Instantané le plus récent, recalculé seulement s'il dépasse la fraîcheur maximale."""
+        snapshot = self._snapshot
+        if self._age(snapshot) > settings.ADMIN_METRICS_REFRESH_INTERVAL:
+            shared = self._from_redis()
+            if self._age(shared) < self._age(snapshot):
+                snapshot = shared
+                with self._lock:
+                    self._snapshot = shared
+
+        if self._age(snapshot) > settings.ADMIN_METRICS_MAX_STALENESS:
+            snapshot = self.refresh()
+        return snapshot
+
+admin_metrics = AdminMetricsService()
@@ -0,0 +1,118 @@
+from sqlalchemy.orm import Session
+from pydantic import TypeAdapter, ValidationError
+from datetime import timezone
+from typing import Any, Dict, List
+
+from app.core.database import dialect_insert
+from app.models.analytics_event import AnalyticsEvent
+from app.models.dynamic_link import DynamicLink
+from app.schemas.sdk import AnalyticsEvent as AnalyticsEventSchema
+
+_event_adapter = TypeAdapter(AnalyticsEventSchema)
+
+def _validation_message(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error.get("loc", ()))
+    return f"{location}: {error.get('msg')}" if location else error.get("msg", "Événement invalide")
+
+def _naive_utc(moment):
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+class AnalyticsEventService:
+    @staticmethod
+    def _row(project_id: str, event: AnalyticsEventSchema) -> Dict[str, Any]:
+        return {
+            "project_id": project_id,
+            "event_id": event.eventId,
+            "link_id": event.linkId,
+            "event_type": event.type,
+            "occurred_at": _naive_utc(event.timestamp),
+            "properties": event.properties,
+            "user_id": event.userId,
+            "session_id": event.sessionId,
+            "device_id": event.deviceId,
+            "platform": event.platform,
+            "app_version": event.appVersion,
+            "user_agent": event.userAgent,
+            "ip_address": event.ipAddress,
+            "country": event.country,
+            "city": event.city,
+            "referrer": event.referrer
+        }
+
+    @staticmethod
+    def ingest(db: Session, project_id: str, raw_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Enregistrer un batch d'événements en un seul INSERT.
+        Retourne un résultat par événement : accepted, duplicate ou rejected.
+        """
+
+        results: List[Dict[str, Any]] = []
+        valid = []
+        for index, raw in enumerate(raw_events):
+            result = {"index": index, "eventId": raw.get("eventId") if isinstance(raw, dict) else None}
+            results.append(result)
+            try:
+                valid.append((result, _event_adapter.validate_python(raw)))
+            except ValidationError as exc:
+                result.update(status="rejected", error=_validation_message(exc))
+
+        # Une seule requête pour vérifier que les liens appartiennent au projet
+        link_ids = {event.linkId for _, event in valid}
+        known_links = set()
+        if link_ids:
+            known_links = {
+                row[0] for row in db.query(DynamicLink.id).filter(
+                    DynamicLink.project_id == project_id,
+                    DynamicLink.id.in_(link_ids)
+                )
+            }
+
+        rows = []
+        pending = []
+        seen_ids = set()
+        for result, event in valid:
+            if event.linkId not in known_links:
+                result.update(status="rejected", error="Lien introuvable pour ce projet")
+                continue
+            if event.eventId is not None:
+                if event.eventId in seen_ids:
+                    result["status"] = "duplicate"
+                    continue
+                seen_ids.add(event.eventId)
+            rows.append(AnalyticsEventService._row(project_id, event))
+            pending.append(result)
+
+        if not rows:
+            return results
+
+        table = AnalyticsEvent.__table__
+        stmt = dialect_insert(table)
+        if hasattr(stmt, "on_conflict_do_nothing"):
+            stmt = stmt.on_conflict_do_nothing(index_elements=["project_id", "event_id"])
+
+        if db.get_bind().dialect.insert_executemany_returning:
+            # Les lignes ignorées par ON CONFLICT ne sont pas renvoyées : ce sont les doublons
+            inserted = {row[0] for row in db.execute(stmt.returning(table.c.event_id), rows)}
+        else:
+            existing = {
+                row[0] for row in db.query(AnalyticsEvent.event_id).filter(
+                    AnalyticsEvent.project_id == project_id,
+                    AnalyticsEvent.event_id.in_(seen_ids)
+                )
+            } if seen_ids else set()
+            fresh = [row for row in rows if row["event_id"] is None or row["event_id"] not in existing]
+            if fresh:
+                db.execute(stmt, fresh)
+            inserted = seen_ids - existing
+        db.commit()
+
+        for result, row in zip(pending, rows):
+            if row["event_id"] is None or row["event_id"] in inserted:
+                result["status"] = "accepted"
+            else:
+                result["status"] = "duplicate"
+
+        return results
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.link_click import LinkClick
+from app.services.click_partitioning import click_partitions
+from app.services.live_counters import live_counters
 from datetime import datetime
 from typing import Optional
 
@@ -14,7 +16,8 @@ class AnalyticsService:
         country: Optional[str] = None,
         device_type: Optional[str] = None,
         os: Optional[str] = None,
-        browser: Optional[str] = None
+        browser: Optional[str] = None,
+        project_id: Optional[str] = None
     ):
         """Enregistrer un clic sur un lien pour les analytics."""
         
@@ -34,18 +37,22 @@ class AnalyticsService:
         db.commit()
         db.refresh(click)
         
+        if project_id:
+            live_counters.record_click(project_id, click.link_id, click.clicked_at)
+        
         return click
     
     @staticmethod
     def get_link_stats(db: Session, link_id: int):
-        """Récupérer les statistiques d'un lien."""
+        """Récupérer les statistiques d'un lien (clics archivés compris)."""
         
-        total_clicks = db.query(LinkClick).filter(
-            LinkClick.link_id == link_id
+        clicks = click_partitions.clicks_for_range(db)
+        total_clicks = db.query(clicks).filter(
+            clicks.link_id == link_id
         ).count()
         
-        unique_clicks = db.query(LinkClick.ip_address).filter(
-            LinkClick.link_id == link_id
+        unique_clicks = db.query(clicks.ip_address).filter(
+            clicks.link_id == link_id
         ).distinct().count()
         
         return {
@@ -55,7 +62,7 @@ class AnalyticsService:
     
     @staticmethod
     def get_project_stats(db: Session, project_id: int):
-        """Récupérer les statistiques d'un projet."""
+        """Récupérer les statistiques d'un projet (clics archivés compris)."""
         
         from app.models.dynamic_link import DynamicLink
         
@@ -64,12 +71,13 @@ class AnalyticsService:
             DynamicLink.project_id == project_id
         ).subquery()
         
-        total_clicks = db.query(LinkClick).filter(
-            LinkClick.link_id.in_(project_links)
+        clicks = click_partitions.clicks_for_range(db)
+        total_clicks = db.query(clicks).filter(
+            clicks.link_id.in_(project_links)
         ).count()
         
-        unique_clicks = db.query(LinkClick.ip_address).filter(
-            LinkClick.link_id.in_(project_links)
+        unique_clicks = db.query(clicks.ip_address).filter(
+            clicks.link_id.in_(project_links)
         ).distinct().count()
         
         return {
@@ -0,0 +1,258 @@
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import logging
+import uuid
+
+import redis
+
+from app.core.config import settings
+from app.core.database import get_redis, redis_breaker
+from app.core.pagination import invalidate_counts
+from app.models.dynamic_link import DynamicLink
+from app.models.link_click_rollup import LinkClickRollup
+from app.models.project import Project
+from app.schemas.dynamic_link import DynamicLinkCreate
+from app.schemas.sdk import DeepLinkCreate
+from app.services.click_partitioning import click_partitions
+from app.services.link_generator import LinkGenerator
+from app.services.live_counters import ACTIVE_KEYS as LIVE_ACTIVE_KEYS, link_key as live_link_key
+from app.services.short_code_allocator import short_code_allocator
+from app.services.subscription_service import SubscriptionService
+
+logger = logging.getLogger(__name__)
+
+_sdk_adapter = TypeAdapter(DeepLinkCreate)
+_dashboard_adapter = TypeAdapter(DynamicLinkCreate)
+
+UTM_FIELDS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content")
+
+def _validation_message(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error.get("loc", ()))
+    return f"{location}: {error.get('msg')}" if location else error.get("msg", "Lien invalide")
+
+def _url(value) -> Optional[str]:
+    return str(value) if value else None
+
+def _sdk_row(link_data: DeepLinkCreate) -> Dict[str, Any]:
+    utm_params = {
+        key: value for key, value in (link_data.parameters or {}).items() if key.startswith("utm_")
+    }
+    metadata = link_data.metadata or {}
+    return {
+        "original_url": LinkGenerator.build_utm_url(str(link_data.originalUrl), utm_params),
+        "title": metadata.get("title"),
+        "description": metadata.get("description"),
+        "android_fallback_url": link_data.androidPlayStoreUrl,
+        "ios_fallback_url": link_data.iosAppStoreUrl,
+        "desktop_fallback_url": link_data.fallbackUrl,
+        "expires_at": link_data.expiresAt
+    }
+
+def _dashboard_row(link_data: DynamicLinkCreate) -> Dict[str, Any]:
+    utm_params = {field: getattr(link_data, field) for field in UTM_FIELDS if getattr(link_data, field)}
+    return {
+        "original_url": LinkGenerator.build_utm_url(str(link_data.original_url), utm_params),
+        "title": link_data.title,
+        "description": link_data.description,
+        "android_package": link_data.android_package,
+        "android_fallback_url": _url(link_data.android_fallback_url),
+        "ios_bundle_id": link_data.ios_bundle_id,
+        "ios_fallback_url": _url(link_data.ios_fallback_url),
+        "desktop_fallback_url": _url(link_data.desktop_fallback_url),
+        "expires_at": link_data.expires_at,
+        **{field: getattr(link_data, field) for field in UTM_FIELDS}
+    }
+
+class BulkLinkService:
+    """
+    Opérations en masse sur les liens : création par lots (une vérification de
+    quota, des codes alloués en bloc, un INSERT) et modifications ensemblistes
+    par tranches de LINKS_BULK_CHUNK_SIZE.
+    """
+
+    @staticmethod
+    def _create(
+        db: Session,
+        project: Project,
+        raw_links: List[Dict[str, Any]],
+        adapter: TypeAdapter,
+        to_row: Callable[[BaseModel], Dict[str, Any]],
+        created_by: Optional[str],
+        commit: bool = True
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        valid = []
+        for index, raw in enumerate(raw_links):
+            result = {"index": index}
+            results.append(result)
+            try:
+                valid.append((result, to_row(adapter.validate_python(raw))))
+            except ValidationError as exc:
+                result.update(status="rejected", error=_validation_message(exc))
+
+        # Quota vérifié une fois pour tout le lot ; l'excédent est refusé lien par lien
+        remaining = SubscriptionService.remaining_links(db, str(project.id))
+        if remaining is not None and len(valid) > remaining:
+            for result, _ in valid[remaining:]:
+                result.update(
+                    status="rejected",
+                    error="Limite de liens atteinte pour ce projet selon votre plan actuel.",
+                    code="LINKS_LIMIT_REACHED"
+                )
+            valid = valid[:remaining]
+
+        if not valid:
+            return results
+
+        now = datetime.utcnow()
+        domain = project.custom_domain or settings.DOMAIN
+        codes = short_code_allocator.allocate_many(len(valid))
+        rows = []
+        for (result, row), short_code in zip(valid, codes):
+            row.update(
+                id=str(uuid.uuid4()),
+                project_id=project.id,
+                short_code=short_code,
+                is_active=True,
+                created_by=created_by,
+                created_at=now,
+                updated_at=now
+            )
+            rows.append(row)
+            result.update(
+                status="created",
+                id=row["id"],
+                short_code=short_code,
+                short_url=LinkGenerator.build_short_url(short_code, domain)
+            )
+
+        db.execute(insert(DynamicLink.__table__), rows)
+        if commit:
+            db.commit()
+        return results
+
+    @staticmethod
+    def create_sdk_links(db: Session, project: Project, raw_links: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return BulkLinkService._create(db, project, raw_links, _sdk_adapter, _sdk_row, None)
+
+    @staticmethod
+    def create_dashboard_links(
+        db: Session,
+        project: Project,
+        raw_links: List[Dict[str, Any]],
+        created_by: str,
+        commit: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Avec commit=False, les liens sont validés par l'appelant, dans sa propre transaction."""
+        return BulkLinkService._create(
+            db, project, raw_links, _dashboard_adapter, _dashboard_row, created_by, commit
+        )
+
+    # Modifications en masse
+
+    @staticmethod
+    def _conditions(criteria: Dict[str, Any]) -> List:
+        conditions = []
+        for field in ("utm_campaign", "utm_source", "utm_medium", "is_active"):
+            if criteria.get(field) is not None:
+                conditions.append(getattr(DynamicLink, field) == criteria[field])
+        if criteria.get("url_contains"):
+            conditions.append(DynamicLink.original_url.contains(criteria["url_contains"], autoescape=True))
+        if criteria.get("created_after"):
+            conditions.append(DynamicLink.created_at >= criteria["created_after"])
+        if criteria.get("created_before"):
+            conditions.append(DynamicLink.created_at < criteria["created_before"])
+        return conditions
+
+    @staticmethod
+    def _chunks(db: Session, project_id: str, criteria: Dict[str, Any]) -> Iterator[List[str]]:
+        """Identifiants sélectionnés, par lots de LINKS_BULK_CHUNK_SIZE (parcours par id croissant)."""
+        chunk_size = settings.LINKS_BULK_CHUNK_SIZE
+        conditions = [DynamicLink.project_id == project_id] + BulkLinkService._conditions(criteria)
+
+        ids = criteria.get("ids")
+        if ids is not None:
+            ids = sorted(set(ids))
+            for start in range(0, len(ids), chunk_size):
+                chunk = db.execute(
+                    select(DynamicLink.id).where(DynamicLink.id.in_(ids[start:start + chunk_size]), *conditions)
+                ).scalars().all()
+                if chunk:
+                    yield chunk
+            return
+
+        last_id = None
+        while True:
+            query = select(DynamicLink.id).where(*conditions)
+            if last_id is not None:
+                query = query.where(DynamicLink.id > last_id)
+            chunk = db.execute(query.order_by(DynamicLink.id).limit(chunk_size)).scalars().all()
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            last_id = chunk[-1]
+
+    @staticmethod
+    def _invalidate(project_id: str, deleted_ids: List[str]):
+        """Totaux en cache et compteurs temps réel des liens supprimés, en un passage."""
+        invalidate_counts(project_id)
+        redis_client = get_redis()
+        if not redis_client or not deleted_ids:
+            return
+        try:
+            with redis_breaker.guard():
+                pipe = redis_client.pipeline(transaction=False)
+                for start in range(0, len(deleted_ids), 500):
+                    keys = [live_link_key(project_id, link_id) for link_id in deleted_ids[start:start + 500]]
+                    pipe.delete(*keys)
+                    pipe.zrem(LIVE_ACTIVE_KEYS, *keys)
+                pipe.execute()
+        except redis.RedisError:
+            logger.warning("Invalidation des compteurs des liens supprimés impossible")
+
+    @staticmethod
+    def update_links(db: Session, project_id: str, criteria: Dict[str, Any], values: Dict[str, Any]) -> int:
+        """UPDATE ensembliste par lots ; retourne le nombre de liens modifiés."""
+        values = {
+            field: str(value) if field.endswith("_url") and value else value
+            for field, value in values.items()
+        }
+        if not values:
+            return 0
+        values["updated_at"] = func.now()
+
+        updated = 0
+        for chunk in BulkLinkService._chunks(db, project_id, criteria):
+            db.execute(
+                update(DynamicLink).where(DynamicLink.id.in_(chunk)).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            # Une transaction par lot : verrous courts, progression conservée en cas d'erreur
+            db.commit()
+            updated += len(chunk)
+
+        BulkLinkService._invalidate(project_id, [])
+        return updated
+
+    @staticmethod
+    def delete_links(db: Session, project_id: str, criteria: Dict[str, Any]) -> int:
+        """DELETE ensembliste par lots, clics et agrégats compris ; retourne le nombre de liens supprimés."""
+        deleted_ids: List[str] = []
+        for chunk in BulkLinkService._chunks(db, project_id, criteria):
+            db.execute(delete(LinkClickRollup).where(LinkClickRollup.link_id.in_(chunk)))
+            click_partitions.delete_link_clicks(db, chunk)
+            db.execute(
+                delete(DynamicLink).where(DynamicLink.id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted_ids.extend(chunk)
+
+        BulkLinkService._invalidate(project_id, deleted_ids)
+        return len(deleted_ids)
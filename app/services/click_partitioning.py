@@ -0,0 +1,396 @@
+from sqlalchemy import Table, Column, MetaData, Index, and_, delete, inspect, select, text, union_all, update, func
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.link_click import LinkClick
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "link_clicks_p"
+DEFAULT_PARTITION = "link_clicks_default"
+ARCHIVE_CACHE_TTL = 60
+
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+class ClickPartitionManager:
+    """
+    Partitionnement temporel de `link_clicks`.
+
+    - Postgres : partitionnement déclaratif natif (RANGE sur clicked_at),
+      une partition par période créée à l'avance.
+    - SQLite : `link_clicks` reste la table chaude (période courante et
+      précédente), les périodes closes sont déplacées dans des tables
+      `link_clicks_pYYYYMMDD`.
+
+    La rétention supprime des partitions entières, jamais ligne par ligne.
+    """
+
+    def __init__(self, interval: str, ahead: int, retention_days: Optional[int]):
+        if interval not in ("day", "week", "month"):
+            raise ValueError(f"Intervalle de partition invalide : {interval}")
+        self.interval = interval
+        self.ahead = ahead
+        self.retention_days = retention_days
+        self._archive_metadata = MetaData()
+        self._archive_tables: Dict[str, Table] = {}
+        self._archive_names: Optional[List[str]] = None
+        self._archive_names_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # Périodes
+
+    def period_start(self, moment: datetime) -> datetime:
+        moment = _naive_utc(moment)
+        if self.interval == "month":
+            return datetime(moment.year, moment.month, 1)
+        day = datetime(moment.year, moment.month, moment.day)
+        if self.interval == "week":
+            return day - timedelta(days=day.weekday())
+        return day
+
+    def next_period(self, start: datetime) -> datetime:
+        if self.interval == "month":
+            if start.month == 12:
+                return datetime(start.year + 1, 1, 1)
+            return datetime(start.year, start.month + 1, 1)
+        if self.interval == "week":
+            return start + timedelta(days=7)
+        return start + timedelta(days=1)
+
+    def hot_start(self, now: Optional[datetime] = None) -> datetime:
+        """Début de la période précédente : tout ce qui suit reste dans la table chaude."""
+        current = self.period_start(now or datetime.utcnow())
+        return self.period_start(current - timedelta(seconds=1))
+
+    def partition_name(self, start: datetime) -> str:
+        return f"{PARTITION_PREFIX}{start:%Y%m%d}"
+
+    def partition_start(self, name: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d")
+        except ValueError:
+            return None
+
+    def _expired(self, name: str, cutoff: datetime) -> bool:
+        start = self.partition_start(name)
+        return start is not None and self.next_period(start) <= cutoff
+
+    def _retention_cutoff(self) -> Optional[datetime]:
+        if not self.retention_days:
+            return None
+        return datetime.utcnow() - timedelta(days=self.retention_days)
+
+    # Postgres
+
+    def is_partitioned(self, conn: Connection) -> bool:
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = 'link_clicks'"
+        )).first() is not None
+
+    def _pg_partitions(self, conn: Connection) -> List[str]:
+        rows = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'link_clicks'"
+        ))
+        return [row[0] for row in rows if row[0].startswith(PARTITION_PREFIX)]
+
+    def ensure_partitions(self, conn: Connection, since: Optional[datetime] = None) -> List[str]:
+        """Créer les partitions manquantes de `since` jusqu'à N périodes à l'avance (Postgres)."""
+        if conn.dialect.name != "postgresql":
+            return []
+        if not self.is_partitioned(conn):
+            logger.warning("link_clicks n'est pas partitionnée : exécutez migrate_click_partitions.py")
+            return []
+
+        existing = set(self._pg_partitions(conn))
+        created = []
+        start = self.period_start(since or datetime.utcnow())
+        last = self.period_start(datetime.utcnow())
+        for _ in range(self.ahead):
+            last = self.next_period(last)
+
+        has_default = conn.execute(
+            text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}
+        ).scalar() is not None
+
+        while start <= last:
+            end = self.next_period(start)
+            name = self.partition_name(start)
+            if name not in existing:
+                bounds = f"FROM ('{start:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+                if has_default and self._pg_default_has_rows(conn, start, end):
+                    self._pg_split_default(conn, name, start, end, bounds)
+                else:
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF link_clicks FOR VALUES {bounds}"
+                    ))
+                created.append(name)
+            start = end
+
+        # Filet de sécurité pour les dates hors des partitions créées
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF link_clicks DEFAULT"))
+        return created
+
+    def _pg_window(self, start: datetime, end: datetime) -> Dict[str, str]:
+        # Mêmes bornes UTC que les partitions, quel que soit le fuseau de la session
+        return {"start": f"{start:%Y-%m-%d} 00:00:00+00", "end": f"{end:%Y-%m-%d} 00:00:00+00"}
+
+    def _pg_default_has_rows(self, conn: Connection, start: datetime, end: datetime) -> bool:
+        return conn.execute(text(
+            f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE clicked_at >= :start AND clicked_at < :end LIMIT 1"
+        ), self._pg_window(start, end)).first() is not None
+
+    def _pg_split_default(self, conn: Connection, name: str, start: datetime, end: datetime, bounds: str):
+        """
+        Créer la partition d'une période dont des clics sont déjà tombés dans la
+        partition DEFAULT : CREATE ... PARTITION OF échouerait. Les lignes sont
+        déplacées dans une table autonome, rattachée ensuite comme partition.
+        """
+        window = self._pg_window(start, end)
+        conn.execute(text(f"CREATE TABLE {name} (LIKE link_clicks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        moved = conn.execute(text(
+            f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} "
+            "WHERE clicked_at >= :start AND clicked_at < :end"
+        ), window).rowcount
+        conn.execute(text(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE clicked_at >= :start AND clicked_at < :end"
+        ), window)
+        conn.execute(text(f"ALTER TABLE link_clicks ATTACH PARTITION {name} FOR VALUES {bounds}"))
+        logger.info("%d clics déplacés de %s vers %s", moved, DEFAULT_PARTITION, name)
+
+    def _pg_prune(self, conn: Connection, cutoff: datetime) -> List[str]:
+        dropped = []
+        for name in sorted(self._pg_partitions(conn)):
+            if self._expired(name, cutoff):
+                conn.execute(text(f"ALTER TABLE link_clicks DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+        return dropped
+
+    # SQLite
+
+    def _archive_table(self, name: str) -> Table:
+        table = self._archive_tables.get(name)
+        if table is None:
+            columns = [
+                Column(column.name, column.type, primary_key=column.primary_key)
+                for column in LinkClick.__table__.columns
+            ]
+            table = Table(name, self._archive_metadata, *columns)
+            Index(f"idx_{name}_link", table.c.link_id)
+            Index(f"idx_{name}_date", table.c.clicked_at)
+            self._archive_tables[name] = table
+        return table
+
+    def archive_names(self, conn: Optional[Connection] = None, refresh: bool = False) -> List[str]:
+        """
+        Tables d'archive (liste gardée ARCHIVE_CACHE_TTL secondes). Elle est relue
+        sur `conn` quand elle est fournie : avec une base SQLite à connexion unique,
+        une connexion ouverte à part annulerait la transaction de l'appelant.
+        """
+        with self._lock:
+            fresh = time.monotonic() - self._archive_names_loaded_at < ARCHIVE_CACHE_TTL
+            if self._archive_names is not None and fresh and not refresh:
+                return self._archive_names
+
+        if conn is None:
+            with engine.connect() as own_conn:
+                names = inspect(own_conn).get_table_names()
+        else:
+            names = inspect(conn).get_table_names()
+
+        archives = sorted(name for name in names if name.startswith(PARTITION_PREFIX))
+        with self._lock:
+            self._archive_names = archives
+            self._archive_names_loaded_at = time.monotonic()
+        return archives
+
+    def _sqlite_rotate(self, conn: Connection) -> int:
+        hot = LinkClick.__table__
+        boundary = self.hot_start()
+        oldest = conn.execute(
+            select(func.min(hot.c.clicked_at)).where(hot.c.clicked_at < boundary)
+        ).scalar()
+        conn.commit()
+        if oldest is None:
+            return 0
+
+        moved = 0
+        # Une seconde de marge : les horodatages sans microsecondes se comparent
+        # comme des chaînes et peuvent tomber juste avant la borne de période
+        start = self.period_start(oldest - timedelta(seconds=1))
+        while start < boundary:
+            end = self.next_period(start)
+            in_period = and_(hot.c.clicked_at >= start, hot.c.clicked_at < end)
+            archive = self._archive_table(self.partition_name(start))
+            try:
+                archive.create(conn, checkfirst=True)
+                result = conn.execute(
+                    archive.insert().from_select(
+                        [column.name for column in hot.columns],
+                        select(*hot.columns).where(in_period)
+                    )
+                )
+                conn.execute(hot.delete().where(in_period))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            moved += result.rowcount or 0
+            start = end
+        return moved
+
+    def _sqlite_prune(self, conn: Connection, cutoff: datetime) -> List[str]:
+        dropped = []
+        for name in self.archive_names(conn, refresh=True):
+            if self._expired(name, cutoff):
+                self._archive_table(name).drop(conn, checkfirst=True)
+                conn.commit()
+                dropped.append(name)
+        return dropped
+
+    # API
+
+    def run_maintenance(self) -> Dict[str, object]:
+        """Créer les partitions à venir, archiver les périodes closes et appliquer la rétention."""
+        stats: Dict[str, object] = {"created": [], "archived_rows": 0, "dropped": []}
+        cutoff = self._retention_cutoff()
+
+        with engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                stats["created"] = self.ensure_partitions(conn)
+                conn.commit()
+                if cutoff:
+                    stats["dropped"] = self._pg_prune(conn, cutoff)
+                    conn.commit()
+            elif conn.dialect.name == "sqlite":
+                stats["archived_rows"] = self._sqlite_rotate(conn)
+                if cutoff:
+                    stats["dropped"] = self._sqlite_prune(conn, cutoff)
+                self.archive_names(conn, refresh=True)
+                conn.commit()
+
+        if stats["created"] or stats["archived_rows"] or stats["dropped"]:
+            logger.info("Maintenance des partitions de clics : %s", stats)
+        return stats
+
+    def _archives_covering(
+        self,
+        db: Session,
+        moment: Optional[datetime],
+        margin: timedelta = timedelta(0)
+    ) -> List[Table]:
+        """
+        Tables d'archive SQLite pouvant contenir un clic de cette date, à `margin`
+        près avant elle (toutes si la date est inconnue).
+        """
+        moment = _naive_utc(moment)
+        tables = []
+        for name in self.archive_names(db.connection()):
+            start = self.partition_start(name)
+            if moment and start is not None and not (start <= moment and moment - margin < self.next_period(start)):
+                continue
+            tables.append(self._archive_table(name))
+        return tables
+
+    def update_click(
+        self,
+        db: Session,
+        click_id: str,
+        values: Dict[str, Any],
+        clicked_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        Modifier un clic où qu'il soit : table chaude puis, sur SQLite, archives
+        (restreintes à la période de `clicked_at` si elle est connue, à une
+        minute près pour une date relevée juste après le clic).
+        """
+        updated = db.execute(
+            update(LinkClick).where(LinkClick.id == click_id).values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if updated or db.get_bind().dialect.name != "sqlite":
+            return bool(updated)
+
+        for table in self._archives_covering(db, clicked_at, margin=timedelta(minutes=1)):
+            if db.execute(update(table).where(table.c.id == click_id).values(**values)).rowcount:
+                return True
+        return False
+
+    def delete_link_clicks(self, db: Session, link_ids: List[str]) -> int:
+        """Supprimer tous les clics de ces liens, archives SQLite comprises."""
+        deleted = db.execute(
+            delete(LinkClick).where(LinkClick.link_id.in_(link_ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount or 0
+        if db.get_bind().dialect.name == "sqlite":
+            for table in self._archives_covering(db, None):
+                deleted += db.execute(delete(table).where(table.c.link_id.in_(link_ids))).rowcount or 0
+        return deleted
+
+    def clicks_for_range(
+        self,
+        db: Session,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ):
+        """
+        Entité à interroger pour les clics d'une fenêtre temporelle.
+
+        Sur Postgres, l'élagage des partitions est fait par le planificateur.
+        Sur SQLite, seules les tables d'archive qui recouvrent la fenêtre sont
+        ajoutées (UNION ALL) à la table chaude.
+        """
+        if db.get_bind().dialect.name != "sqlite":
+            return LinkClick
+
+        date_from = _naive_utc(date_from)
+        date_to = _naive_utc(date_to)
+        if date_from and date_from >= self.hot_start():
+            return LinkClick
+
+        archives = []
+        for name in self.archive_names(db.connection()):
+            start = self.partition_start(name)
+            if start is None:
+                continue
+            if date_to and start > date_to:
+                continue
+            if date_from and self.next_period(start) <= date_from:
+                continue
+            archives.append(self._archive_table(name))
+
+        if not archives:
+            return LinkClick
+
+        selects = []
+        for table in [LinkClick.__table__] + archives:
+            query = select(*table.columns)
+            if date_from:
+                query = query.where(table.c.clicked_at >= date_from)
+            if date_to:
+                query = query.where(table.c.clicked_at <= date_to)
+            selects.append(query)
+
+        window = union_all(*selects).subquery("link_clicks_window")
+        return aliased(LinkClick, window, adapt_on_names=True)
+
+click_partitions = ClickPartitionManager(
+    interval=settings.CLICK_PARTITION_INTERVAL,
+    ahead=settings.CLICK_PARTITIONS_AHEAD,
+    retention_days=settings.CLICK_RETENTION_DAYS
+)
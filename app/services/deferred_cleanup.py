@@ -0,0 +1,145 @@
+from sqlalchemy import select, delete
+from datetime import datetime, timedelta
+from typing import Dict, List
+import json
+import logging
+import time
+
+import redis
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_redis, redis_breaker
+from app.models.deferred_link import DeferredLink
+from app.services.click_partitioning import click_partitions
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_PATTERN = "deferred_context:*"
+
+class DeferredCleanupService:
+    """Purge périodique des liens différés périmés et des contextes Redis orphelins."""
+
+    @staticmethod
+    def _purge_batches(condition) -> int:
+        purged = 0
+        batch_size = settings.DEFERRED_PURGE_BATCH_SIZE
+        while True:
+            db = SessionLocal()
+            try:
+                # Lot borné, parcouru via idx_deferred_expires
+                ids = db.execute(
+                    select(DeferredLink.id).where(condition).order_by(DeferredLink.expires_at).limit(batch_size)
+                ).scalars().all()
+                if ids:
+                    db.execute(delete(DeferredLink).where(DeferredLink.id.in_(ids)))
+                    db.commit()
+            finally:
+                db.close()
+
+            purged += len(ids)
+            if len(ids) < batch_size:
+                return purged
+            # Laisser passer les autres écritures entre deux lots
+            time.sleep(settings.DEFERRED_PURGE_PAUSE)
+
+    @staticmethod
+    def purge_links() -> Dict[str, int]:
+        now = datetime.utcnow()
+        retention_cutoff = now - timedelta(days=settings.DEFERRED_CONSUMED_RETENTION_DAYS)
+
+        # Jamais consommés et expirés : plus aucune chance d'être livrés
+        expired = DeferredCleanupService._purge_batches(
+            (DeferredLink.expires_at < now) & (DeferredLink.is_consumed == False)
+        )
+        # Consommés : conservés pour l'audit pendant la rétention
+        # (consumed_at <= expires_at, le filtre sur expires_at suffit et reste indexé)
+        consumed = DeferredCleanupService._purge_batches(
+            (DeferredLink.expires_at < retention_cutoff) & (DeferredLink.is_consumed == True)
+        )
+        return {"expired": expired, "consumed": consumed}
+
+    @staticmethod
+    def _orphans(db, contexts: Dict[str, Dict]) -> List[str]:
+        """Contextes dont le clic d'origine n'existe plus."""
+        by_click = {
+            context["click_id"]: key
+            for key, context in contexts.items()
+            if context.get("click_id")
+        }
+        if not by_click:
+            return []
+
+        created = [
+            datetime.fromisoformat(context["created_at"])
+            for context in contexts.values()
+            if context.get("created_at")
+        ]
+        # Marge d'une minute : le contexte est créé juste après le clic
+        since = min(created) - timedelta(minutes=1) if created else None
+        clicks = click_partitions.clicks_for_range(db, since)
+        existing = set(db.execute(
+            select(clicks.id).where(clicks.id.in_(list(by_click)))
+        ).scalars())
+        return [key for click_id, key in by_click.items() if click_id not in existing]
+
+    @staticmethod
+    def purge_contexts() -> int:
+        """Supprimer les clés deferred_context:* sans TTL ou dont le clic a disparu."""
+        redis_client = get_redis()
+        if not redis_client:
+            return 0
+
+        removed = 0
+        batch: List[str] = []
+        try:
+            with redis_breaker.guard():
+                for key in redis_client.scan_iter(match=CONTEXT_PATTERN, count=settings.DEFERRED_PURGE_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= settings.DEFERRED_PURGE_BATCH_SIZE:
+                        removed += DeferredCleanupService._purge_context_batch(redis_client, batch)
+                        batch = []
+                if batch:
+                    removed += DeferredCleanupService._purge_context_batch(redis_client, batch)
+        except redis.RedisError:
+            logger.warning("Nettoyage des contextes différés interrompu (Redis indisponible)")
+        return removed
+
+    @staticmethod
+    def _purge_context_batch(redis_client, keys: List[str]) -> int:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.ttl(key)
+            pipe.get(key)
+        replies = pipe.execute()
+
+        stale = []
+        contexts = {}
+        for key, ttl, raw in zip(keys, replies[0::2], replies[1::2]):
+            if raw is None:
+                continue
+            if ttl == -1:
+                stale.append(key)
+                continue
+            try:
+                contexts[key] = json.loads(raw)
+            except ValueError:
+                stale.append(key)
+
+        if contexts:
+            db = SessionLocal()
+            try:
+                stale.extend(DeferredCleanupService._orphans(db, contexts))
+            finally:
+                db.close()
+
+        if stale:
+            redis_client.delete(*stale)
+        return len(stale)
+
+    @staticmethod
+    def run() -> Dict[str, int]:
+        """Tâche planifiée : purge des lignes puis des contextes, avec compte rendu."""
+        stats = DeferredCleanupService.purge_links()
+        stats["contexts"] = DeferredCleanupService.purge_contexts()
+        logger.info("Purge des liens différés : %s", stats)
+        return stats
@@ -0,0 +1,132 @@
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import threading
+import time
+
+import redis
+
+from app.core.config import settings
+from app.core.database import get_redis, redis_breaker
+
+logger = logging.getLogger(__name__)
+
+def context_key(tracking_id: str) -> str:
+    return f"deferred_context:{tracking_id}"
+
+class MemoryContextStore:
+    """Contextes en mémoire du processus, avec TTL et taille bornée."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        # Toujours plein : retirer les contextes qui expirent le plus tôt
+        overflow = len(self._entries) - self.max_entries + 1
+        if overflow > 0:
+            for key, _ in sorted(self._entries.items(), key=lambda item: item[1][0])[:overflow]:
+                del self._entries[key]
+
+    def put(self, tracking_id: str, data: Dict[str, Any], ttl: int):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[tracking_id] = (now + ttl, data)
+
+    def get(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(tracking_id)
+            if entry and entry[0] <= time.monotonic():
+                del self._entries[tracking_id]
+                return None
+            return entry[1] if entry else None
+
+    def pop(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.pop(tracking_id, None)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+class RedisContextStore:
+    """Contextes dans Redis (TTL natif) ; lecture-suppression en un aller-retour."""
+
+    def __init__(self):
+        self._getdel_supported = True
+
+    def put(self, client, tracking_id: str, data: Dict[str, Any], ttl: int):
+        client.setex(context_key(tracking_id), ttl, json.dumps(data))
+
+    def get(self, client, tracking_id: str) -> Optional[Dict[str, Any]]:
+        raw = client.get(context_key(tracking_id))
+        return json.loads(raw) if raw else None
+
+    def pop(self, client, tracking_id: str) -> Optional[Dict[str, Any]]:
+        key = context_key(tracking_id)
+        raw = None
+        if self._getdel_supported:
+            try:
+                raw = client.getdel(key)
+            except redis.ResponseError:
+                # GETDEL n'existe qu'à partir de Redis 6.2
+                self._getdel_supported = False
+        if not self._getdel_supported:
+            pipe = client.pipeline(transaction=True)
+            pipe.get(key)
+            pipe.delete(key)
+            raw = pipe.execute()[0]
+        return json.loads(raw) if raw else None
+
+class DeferredContextStore:
+    """
+    Contextes de deep linking différé : Redis tant qu'il répond, mémoire du
+    processus sinon. Les erreurs Redis alimentent le disjoncteur partagé, de
+    sorte qu'une panne bascule vite sur le repli au lieu de produire des 500.
+    """
+
+    def __init__(self):
+        self.redis = RedisContextStore()
+        self.memory = MemoryContextStore(settings.DEFERRED_CONTEXT_MEMORY_MAX)
+
+    def _call(self, operation: str, *args):
+        """(True, résultat) si Redis a répondu, (False, None) sinon."""
+        client = get_redis()
+        if not client:
+            return False, None
+        try:
+            with redis_breaker.guard():
+                result = getattr(self.redis, operation)(client, *args)
+        except redis.RedisError:
+            logger.warning("Redis indisponible (%s d'un contexte différé), repli en mémoire", operation)
+            return False, None
+        return True, result
+
+    def put(self, tracking_id: str, data: Dict[str, Any], ttl: Optional[int] = None):
+        ttl = ttl or settings.DEFERRED_CONTEXT_TTL
+        stored, _ = self._call("put", tracking_id, data, ttl)
+        if not stored:
+            self.memory.put(tracking_id, data, ttl)
+
+    def get(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        answered, context = self._call("get", tracking_id)
+        if context is None and (not answered or len(self.memory)):
+            # Contexte créé pendant une panne de Redis
+            context = self.memory.get(tracking_id)
+        return context
+
+    def pop(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        """Lire et supprimer le contexte : un seul appelant l'obtient."""
+        answered, context = self._call("pop", tracking_id)
+        if context is None and (not answered or len(self.memory)):
+            context = self.memory.pop(tracking_id)
+        return context
+
+deferred_context_store = DeferredContextStore()
@@ -1,17 +1,26 @@
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
-import json
 import uuid
+from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
-from app.core.database import get_redis
+from app.core.config import settings
+from app.core.static_assets import asset_url
 from app.models.dynamic_link import DynamicLink
 from app.models.link_click import LinkClick
+from app.services.click_partitioning import click_partitions
+from app.services.deferred_context_store import deferred_context_store
+from app.services.install_events import install_events
+
+templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
+# Template compilé une seule fois
+interstitial_template = templates.get_template("deferred/interstitial.html")
 
 class DeferredDeepLinkingService:
     def __init__(self):
-        self.redis_client = get_redis()
-        self.tracking_cookie_ttl = 86400 * 7  # 7 jours
+        self.context_store = deferred_context_store
+        self.tracking_cookie_ttl = settings.DEFERRED_CONTEXT_TTL
     
     def is_app_installed(self, user_agent: str, package_name: str = None, bundle_id: str = None) -> bool:
         """
@@ -70,23 +79,31 @@ class DeferredDeepLinkingService:
         if additional_data:
             context_data.update(additional_data)
         
-        # Stocker dans Redis avec TTL
-        self.redis_client.setex(
-            f"deferred_context:{tracking_id}",
-            self.tracking_cookie_ttl,
-            json.dumps(context_data)
-        )
+        # Stocker avec TTL (Redis, ou mémoire du processus s'il est indisponible)
+        self.context_store.put(tracking_id, context_data, self.tracking_cookie_ttl)
         
         return tracking_id
     
+    def mark_conversion(self, db: Session, context: Dict, converted: bool):
+        """Mettre à jour `converted` sur le clic du contexte, même déjà archivé."""
+        click_id = context.get("click_id")
+        if not click_id:
+            return
+        # Contexte créé juste après le clic : sa date désigne la bonne archive
+        created_at = context.get("created_at")
+        click_partitions.update_click(
+            db,
+            click_id,
+            {"converted": converted},
+            clicked_at=datetime.fromisoformat(created_at) if created_at else None
+        )
+        db.commit()
+
     def get_deferred_context(self, tracking_id: str) -> Optional[Dict]:
         """
         Récupère le contexte de deep linking différé
         """
-        context_data = self.redis_client.get(f"deferred_context:{tracking_id}")
-        if context_data:
-            return json.loads(context_data)
-        return None
+        return self.context_store.get(tracking_id)
     
     def generate_install_redirect_url(
         self, 
@@ -127,172 +144,20 @@ class DeferredDeepLinkingService:
         """
         install_url = self.generate_install_redirect_url(link, platform, tracking_id)
         
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="fr">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{link.title or 'Redirection'}</title>
-            <style>
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    margin: 0;
-                    padding: 20px;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    text-align: center;
-                    min-height: 100vh;
-                    display: flex;
-                    flex-direction: column;
-                    justify-content: center;
-                }}
-                .container {{
-                    max-width: 400px;
-                    margin: 0 auto;
-                    background: rgba(255, 255, 255, 0.1);
-                    padding: 30px;
-                    border-radius: 20px;
-                    backdrop-filter: blur(10px);
-                }}
-                .logo {{
-                    width: 80px;
-                    height: 80px;
-                    background: white;
-                    border-radius: 20px;
-                    margin: 0 auto 20px;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    font-size: 30px;
-                }}
-                .title {{
-                    font-size: 24px;
-                    font-weight: 600;
-                    margin-bottom: 10px;
-                }}
-                .description {{
-                    font-size: 16px;
-                    opacity: 0.9;
-                    margin-bottom: 30px;
-                }}
-                .install-btn {{
-                    background: white;
-                    color: #333;
-                    padding: 15px 30px;
-                    border: none;
-                    border-radius: 50px;
-                    font-size: 16px;
-                    font-weight: 600;
-                    text-decoration: none;
-                    display: inline-block;
-                    transition: transform 0.2s;
-                }}
-                .install-btn:hover {{
-                    transform: translateY(-2px);
-                }}
-                .continue-web {{
-                    margin-top: 20px;
-                    opacity: 0.8;
-                }}
-                .continue-web a {{
-                    color: white;
-                    text-decoration: underline;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="logo">📱</div>
-                <div class="title">{link.title or 'Application requise'}</div>
-                <div class="description">
-                    {link.description or 'Pour une meilleure expérience, téléchargez notre application.'}
-                </div>
-                <a href="{install_url}" class="install-btn" onclick="trackAppInstall()">
-                    {'Télécharger sur l\'App Store' if platform == 'ios' else 'Télécharger sur Google Play'}
-                </a>
-                <div class="continue-web">
-                    <a href="{link.original_url}" onclick="trackWebContinue()">
-                        Continuer sur le web
-                    </a>
-                </div>
-            </div>
-            
-            <script>
-                // Stocker le tracking ID dans le localStorage
-                localStorage.setItem('synctra_tracking_id', '{tracking_id}');
-                
-                var appOpened = false;
-                var startTime = Date.now();
-                
-                // Essayer d'ouvrir l'app automatiquement si elle est installée
-                function tryOpenApp() {{
-                    var appScheme = '';
-                    var fallbackUrl = '';
-                    
-                    if ('{platform}' === 'ios' && '{link.ios_bundle_id or ""}') {{
-                        // Pour iOS, utiliser un custom scheme ou universal link
-                        appScheme = '{link.ios_bundle_id or ""}://open?url=' + encodeURIComponent('{link.original_url}');
-                        fallbackUrl = '{link.ios_fallback_url or link.original_url}';
-                    }} else if ('{platform}' === 'android' && '{link.android_package or ""}') {{
-                        // Pour Android, utiliser intent URL
-                        appScheme = 'intent://{link.original_url}#Intent;package={link.android_package or ""};scheme=https;end';
-                        fallbackUrl = '{link.android_fallback_url or link.original_url}';
-                    }}
-                    
-                    if (appScheme) {{
-                        // Créer un iframe invisible pour tester l'ouverture
-                        var iframe = document.createElement('iframe');
-                        iframe.style.display = 'none';
-                        iframe.src = appScheme;
-                        document.body.appendChild(iframe);
-                        
-                        // Détecter si l'app s'est ouverte
-                        setTimeout(function() {{
-                            if (!appOpened && (Date.now() - startTime) < 3000) {{
-                                // L'app ne s'est pas ouverte, on reste sur la page
-                                document.body.removeChild(iframe);
-                            }}
-                        }}, 2000);
-                        
-                        // Détecter si l'utilisateur revient (app fermée)
-                        window.addEventListener('focus', function() {{
-                            if (Date.now() - startTime > 1000) {{
-                                appOpened = true;
-                            }}
-                        }});
-                        
-                        // Détecter la perte de focus (app ouverte)
-                        window.addEventListener('blur', function() {{
-                            appOpened = true;
-                        }});
-                    }}
-                }}
-                
-                // Lancer la tentative d'ouverture après un délai
-                setTimeout(tryOpenApp, 500);
-                
-                function trackWebContinue() {{
-                    fetch('/api/v1/deferred/track-web-continue', {{
-                        method: 'POST',
-                        headers: {{'Content-Type': 'application/json'}},
-                        body: JSON.stringify({{tracking_id: '{tracking_id}'}})
-                    }});
-                }}
-                
-                function trackAppInstall() {{
-                    fetch('/api/v1/deferred/track-app-install', {{
-                        method: 'POST',
-                        headers: {{'Content-Type': 'application/json'}},
-                        body: JSON.stringify({{tracking_id: '{tracking_id}'}})
-                    }});
-                }}
-            </script>
-        </body>
-        </html>
-        """
-        
-        return html_content
+        # CSS et JS communs servis à part (URL versionnées, cache immuable) :
+        # seule la partie propre au lien est rendue à chaque appel
+        return interstitial_template.render(
+            link=link,
+            platform=platform,
+            install_url=install_url,
+            config={
+                "trackingId": tracking_id,
+                "platform": platform,
+                "originalUrl": str(link.original_url),
+                "iosBundleId": link.ios_bundle_id or "",
+                "androidPackage": link.android_package or ""
+            }
+        )
     
     def handle_app_open(
         self, 
@@ -303,20 +168,20 @@ class DeferredDeepLinkingService:
         """
         Gère l'ouverture de l'app après installation avec le contexte différé
         """
-        context = self.get_deferred_context(tracking_id)
+        # Lecture et suppression atomiques : un seul appel consomme le contexte
+        context = self.context_store.pop(tracking_id)
         if not context:
             return None
         
         # Marquer comme conversion réussie
-        click_id = context.get("click_id")
-        if click_id:
-            click = db.query(LinkClick).filter(LinkClick.id == click_id).first()
-            if click:
-                click.converted = True
-                db.commit()
+        self.mark_conversion(db, context, True)
         
-        # Nettoyer le contexte utilisé
-        self.redis_client.delete(f"deferred_context:{tracking_id}")
+        # Prévenir instantanément la page d'attente (SSE)
+        install_events.publish(tracking_id, {
+            "installed": True,
+            "app_identifier": app_identifier,
+            "opened_at": datetime.utcnow().isoformat()
+        })
         
         return {
             "success": True,
@@ -0,0 +1,358 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import json
+import logging
+
+import redis
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_redis, redis_breaker
+from app.models.deferred_link import DeferredLink
+
+logger = logging.getLogger(__name__)
+
+AUDIT_KEY = "deferred_link:audit"
+AUDIT_LOCK_KEY = "deferred_link:audit:lock"
+AUDIT_LOCK_TIMEOUT = 60  # Prolongé à chaque lot
+
+# GET + DEL + journal d'audit + marque de consommation en un seul aller-retour atomique
+_CONSUME_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[2], ARGV[2])
+    redis.call('RPUSH', KEYS[3], ARGV[1])
+    redis.call('SET', KEYS[4], ARGV[3], 'EX', ARGV[4])
+end
+return value
+"""
+
+def link_key(project_id: str, platform: str, package_name: str, device_id: str) -> str:
+    return f"deferred_link:{project_id}:{platform}:{package_name}:{device_id}"
+
+def platforms_key(project_id: str, package_name: str, device_id: str) -> str:
+    return f"deferred_link_platforms:{project_id}:{package_name}:{device_id}"
+
+# Date du dernier passage par Redis (consommation / suppression) : les lignes
+# plus anciennes encore non consommées en base attendent leur report d'audit
+def consumed_key(project_id: str, platform: str, package_name: str, device_id: str) -> str:
+    return f"deferred_link_consumed:{project_id}:{platform}:{package_name}:{device_id}"
+
+def deleted_key(project_id: str, package_name: str, device_id: str) -> str:
+    return f"deferred_link_deleted:{project_id}:{package_name}:{device_id}"
+
+def _iso(moment: Optional[datetime]) -> Optional[str]:
+    return moment.isoformat() if moment else None
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+class DeferredLinkStore:
+    """
+    Liens différés en attente conservés dans Redis (TTL natif), consommés
+    atomiquement. La table deferred_links n'est plus qu'un journal d'audit
+    alimenté en différé ; elle sert de repli quand Redis est indisponible.
+    """
+
+    def __init__(self):
+        self._consume = None
+
+    @property
+    def ttl(self) -> timedelta:
+        return timedelta(hours=settings.DEFERRED_LINK_TTL_HOURS)
+
+    def store(self, db: Session, project_id: str, record: Dict[str, Any]):
+        """Enregistrer un lien différé, en remplaçant celui du même appareil."""
+        now = datetime.utcnow()
+        record = dict(record, project_id=project_id, created_at=_iso(now), expires_at=_iso(now + self.ttl))
+
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    payload = json.dumps(record)
+                    pipe = redis_client.pipeline(transaction=True)
+                    pipe.setex(
+                        link_key(project_id, record["platform"], record["package_name"], record["device_id"]),
+                        self.ttl,
+                        payload
+                    )
+                    index_key = platforms_key(project_id, record["package_name"], record["device_id"])
+                    pipe.sadd(index_key, record["platform"])
+                    pipe.expire(index_key, self.ttl)
+                    pipe.rpush(AUDIT_KEY, json.dumps({"op": "store", **record}))
+                    pipe.execute()
+                    return
+            except redis.RedisError:
+                logger.warning("Redis indisponible, lien différé écrit en base")
+
+        self._db_store(db, record)
+        db.commit()
+
+    def consume(
+        self,
+        db: Session,
+        project_id: str,
+        device_id: str,
+        package_name: str,
+        platform: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Récupérer et consommer le lien différé d'un appareil (au plus une fois).
+
+        Sans lien dans Redis, la base est consultée : elle peut contenir des liens
+        écrits pendant une indisponibilité de Redis. Seules les lignes créées après
+        le dernier passage par Redis sont éligibles, les autres ont déjà été
+        consommées ou supprimées côté Redis.
+        """
+        now = datetime.utcnow()
+        created_after = None
+
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    if self._consume is None:
+                        self._consume = redis_client.register_script(_CONSUME_SCRIPT)
+                    audit = json.dumps({
+                        "op": "consume",
+                        "project_id": project_id,
+                        "device_id": device_id,
+                        "package_name": package_name,
+                        "platform": platform,
+                        "consumed_at": _iso(now)
+                    })
+                    raw = self._consume(
+                        keys=[
+                            link_key(project_id, platform, package_name, device_id),
+                            platforms_key(project_id, package_name, device_id),
+                            AUDIT_KEY,
+                            consumed_key(project_id, platform, package_name, device_id)
+                        ],
+                        args=[audit, platform, _iso(now), int(self.ttl.total_seconds())],
+                        client=redis_client
+                    )
+                    if raw:
+                        return json.loads(raw)
+                    marks = redis_client.mget(
+                        consumed_key(project_id, platform, package_name, device_id),
+                        deleted_key(project_id, package_name, device_id)
+                    )
+                    created_after = max((_parse(mark) for mark in marks if mark), default=None)
+            except redis.RedisError:
+                logger.warning("Redis indisponible, consommation du lien différé en base")
+
+        return self._db_consume(db, device_id, package_name, platform, now, created_after)
+
+    def delete(self, db: Session, project_id: str, device_id: str, package_name: str) -> int:
+        """Supprimer les liens différés d'un appareil, toutes plateformes confondues."""
+        deleted = 0
+
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    index_key = platforms_key(project_id, package_name, device_id)
+                    platforms = redis_client.smembers(index_key)
+                    if platforms:
+                        deleted = redis_client.delete(*[
+                            link_key(project_id, platform, package_name, device_id) for platform in platforms
+                        ])
+                    pipe = redis_client.pipeline(transaction=True)
+                    pipe.delete(index_key)
+                    pipe.setex(deleted_key(project_id, package_name, device_id), self.ttl, _iso(datetime.utcnow()))
+                    pipe.rpush(AUDIT_KEY, json.dumps({
+                        "op": "delete",
+                        "project_id": project_id,
+                        "device_id": device_id,
+                        "package_name": package_name
+                    }))
+                    pipe.execute()
+                    return deleted
+            except redis.RedisError:
+                logger.warning("Redis indisponible, suppression des liens différés en base")
+
+        deleted = self._db_delete(db, device_id, package_name)
+        db.commit()
+        return deleted
+
+    # Base de données
+
+    def _db_store(self, db: Session, record: Dict[str, Any]):
+        db.query(DeferredLink).filter(
+            DeferredLink.device_id == record["device_id"],
+            DeferredLink.package_name == record["package_name"],
+            DeferredLink.platform == record["platform"]
+        ).delete(synchronize_session=False)
+
+        db.add(DeferredLink(
+            device_id=record["device_id"],
+            package_name=record["package_name"],
+            platform=record["platform"],
+            link_id=record["link_id"],
+            original_url=record["original_url"],
+            parameters=record.get("parameters") or {},
+            ip_address=record.get("ip_address"),
+            user_agent=record.get("user_agent"),
+            timestamp=_parse(record["timestamp"]),
+            expires_at=_parse(record["expires_at"]),
+            created_at=_parse(record["created_at"])
+        ))
+        # Les sessions n'ont pas d'autoflush : les opérations suivantes du lot doivent voir cette ligne
+        db.flush()
+
+    def _db_consume(
+        self,
+        db: Session,
+        device_id: str,
+        package_name: str,
+        platform: str,
+        consumed_at: datetime,
+        created_after: Optional[datetime] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Consommation en une seule instruction : UPDATE conditionnel sur le lien le
+        plus récent, garde `is_consumed = false` pour qu'un seul appel concurrent gagne.
+        """
+        latest = select(DeferredLink.id).where(
+            DeferredLink.device_id == device_id,
+            DeferredLink.package_name == package_name,
+            DeferredLink.platform == platform,
+            DeferredLink.is_consumed == False,
+            DeferredLink.expires_at > consumed_at
+        )
+        if created_after:
+            latest = latest.where(DeferredLink.created_at > created_after)
+        latest = latest.order_by(DeferredLink.created_at.desc()).limit(1)
+
+        claim = update(DeferredLink).values(is_consumed=True, consumed_at=consumed_at)
+        columns = [
+            DeferredLink.link_id,
+            DeferredLink.original_url,
+            DeferredLink.parameters,
+            DeferredLink.timestamp
+        ]
+
+        if db.get_bind().dialect.update_returning:
+            row = db.execute(
+                claim.where(
+                    DeferredLink.id == latest.scalar_subquery(),
+                    DeferredLink.is_consumed == False
+                ).returning(*columns).execution_options(synchronize_session=False)
+            ).first()
+        else:
+            # Sans RETURNING : compare-and-swap sur l'identifiant candidat
+            candidate = db.execute(latest).scalar()
+            row = None
+            if candidate:
+                claimed = db.execute(
+                    claim.where(
+                        DeferredLink.id == candidate,
+                        DeferredLink.is_consumed == False
+                    ).execution_options(synchronize_session=False)
+                ).rowcount
+                if claimed:
+                    row = db.execute(select(*columns).where(DeferredLink.id == candidate)).first()
+        db.commit()
+
+        if not row:
+            return None
+
+        return {
+            "link_id": row.link_id,
+            "original_url": row.original_url,
+            "parameters": row.parameters or {},
+            "timestamp": _iso(row.timestamp)
+        }
+
+    def _db_delete(self, db: Session, device_id: str, package_name: str) -> int:
+        return db.query(DeferredLink).filter(
+            DeferredLink.device_id == device_id,
+            DeferredLink.package_name == package_name
+        ).delete(synchronize_session=False)
+
+    # Écriture différée du journal
+
+    def _apply_audit(self, db: Session, entry: Dict[str, Any]):
+        op = entry.get("op")
+        if op == "store":
+            self._db_store(db, entry)
+        elif op == "consume":
+            consumed_at = _parse(entry["consumed_at"])
+            latest = db.query(DeferredLink.id).filter(
+                DeferredLink.device_id == entry["device_id"],
+                DeferredLink.package_name == entry["package_name"],
+                DeferredLink.platform == entry["platform"],
+                DeferredLink.is_consumed == False
+            ).order_by(DeferredLink.created_at.desc()).limit(1).scalar()
+            if latest:
+                db.query(DeferredLink).filter(DeferredLink.id == latest).update(
+                    {"is_consumed": True, "consumed_at": consumed_at},
+                    synchronize_session=False
+                )
+        elif op == "delete":
+            self._db_delete(db, entry["device_id"], entry["package_name"])
+
+    def flush_audit(self) -> int:
+        """
+        Reporter en base le journal des opérations faites dans Redis (tâche périodique).
+
+        Les entrées doivent être appliquées dans l'ordre du journal : un seul
+        worker vide la file (verrou Redis prolongé à chaque lot) et un lot n'est
+        retiré de la tête qu'une fois validé en base. En cas d'échec il y reste,
+        dans son ordre d'origine, pour la prochaine exécution.
+        """
+        redis_client = get_redis()
+        if not redis_client:
+            return 0
+
+        lock = redis_client.lock(AUDIT_LOCK_KEY, timeout=AUDIT_LOCK_TIMEOUT)
+        try:
+            with redis_breaker.guard():
+                if not lock.acquire(blocking=False):
+                    return 0
+        except redis.RedisError:
+            logger.warning("Verrou du journal des liens différés indisponible")
+            return 0
+
+        flushed = 0
+        batch_size = settings.DEFERRED_AUDIT_BATCH_SIZE
+        try:
+            while True:
+                try:
+                    with redis_breaker.guard():
+                        lock.reacquire()
+                        entries: List[str] = redis_client.lrange(AUDIT_KEY, 0, batch_size - 1)
+                except redis.RedisError:
+                    logger.warning("Lecture du journal des liens différés impossible")
+                    return flushed
+                if not entries:
+                    return flushed
+
+                db = SessionLocal()
+                try:
+                    for raw in entries:
+                        self._apply_audit(db, json.loads(raw))
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
+
+                # Les producteurs n'ajoutent qu'en queue : la tête est bien le lot appliqué
+                with redis_breaker.guard():
+                    redis_client.ltrim(AUDIT_KEY, len(entries), -1)
+                flushed += len(entries)
+                if len(entries) < batch_size:
+                    return flushed
+        finally:
+            try:
+                with redis_breaker.guard():
+                    lock.release()
+            except redis.RedisError:
+                pass
+
+deferred_link_store = DeferredLinkStore()
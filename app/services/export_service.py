@@ -0,0 +1,260 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+import csv
+import gzip
+import json
+import logging
+import os
+
+from app.core.config import settings
+from app.core.database import ReadSession, SessionLocal
+from app.core.job_queue import OrganizationJobQueue
+from app.models.dynamic_link import DynamicLink
+from app.models.export_job import ExportJob
+from app.models.project import Project
+from app.schemas.analytics import ExportRequest
+from app.services.click_partitioning import click_partitions
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": ("csv.gz", "application/gzip"),
+    "json": ("jsonl.gz", "application/gzip"),
+}
+
+CSV_HEADER = [
+    "ID", "Lien ID", "IP", "Pays", "Région", "Ville",
+    "Plateforme", "Type d'appareil", "Navigateur", "OS",
+    "Converti", "Valeur conversion", "Date de clic"
+]
+
+EXPORT_FIELDS = [
+    "id", "link_id", "ip_address",
+    "country", "region", "city",
+    "platform", "device_type", "browser", "os",
+    "converted", "conversion_value", "clicked_at"
+]
+
+export_queue = OrganizationJobQueue(
+    name="export",
+    max_workers=settings.EXPORT_MAX_WORKERS,
+    max_per_organization=settings.EXPORT_MAX_CONCURRENT_PER_ORG
+)
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+class ExportService:
+    @staticmethod
+    def export_dir() -> str:
+        path = os.path.join(settings.UPLOAD_DIR, "exports")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def create_job(
+        db: Session,
+        project: Project,
+        user_id: Optional[str],
+        export_request: ExportRequest
+    ) -> ExportJob:
+        """Créer un job d'export et le placer dans la file d'exécution."""
+
+        job = ExportJob(
+            organization_id=project.organization_id,
+            project_id=project.id,
+            created_by=user_id,
+            format=export_request.format.lower(),
+            date_from=export_request.date_from,
+            date_to=export_request.date_to,
+            link_ids=",".join(export_request.link_ids) if export_request.link_ids else None,
+            status="pending",
+            rows_written=0
+        )
+
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        ExportService.enqueue(job)
+        return job
+
+    @staticmethod
+    def enqueue(job: ExportJob):
+        export_queue.submit(str(job.organization_id), ExportService.run_job, str(job.id))
+
+    @staticmethod
+    def resume_pending_jobs():
+        """Relancer, au démarrage d'un worker, les jobs en attente et les jobs abandonnés."""
+
+        db = SessionLocal()
+        try:
+            jobs = db.query(ExportJob).filter(ExportJob.status == "pending").order_by(
+                ExportJob.created_at
+            ).all()
+            for job in jobs:
+                ExportService.enqueue(job)
+        finally:
+            db.close()
+
+        ExportService.reclaim_stale_jobs()
+
+    @staticmethod
+    def reclaim_stale_jobs() -> int:
+        """
+        Remettre en file les jobs « running » abandonnés (tâche périodique).
+
+        La progression met à jour updated_at à chaque lot : un job dont
+        updated_at n'a pas bougé depuis EXPORT_STALE_JOB_TIMEOUT secondes n'a
+        plus de worker. Les autres tournent encore, éventuellement ailleurs.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.EXPORT_STALE_JOB_TIMEOUT)
+
+        db = SessionLocal()
+        try:
+            stale = db.query(ExportJob).filter(
+                ExportJob.status == "running",
+                ExportJob.updated_at < stale_before
+            ).order_by(ExportJob.created_at).all()
+
+            reclaimed = 0
+            for job in stale:
+                # Conditionnel : un seul worker reprend le job
+                claimed = db.query(ExportJob).filter(
+                    ExportJob.id == job.id,
+                    ExportJob.status == "running",
+                    ExportJob.updated_at < stale_before
+                ).update({"status": "pending", "rows_written": 0}, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    logger.warning("Reprise de l'export abandonné %s", job.id)
+                    ExportService.enqueue(job)
+                    reclaimed += 1
+            return reclaimed
+        finally:
+            db.close()
+
+    @staticmethod
+    def build_query(db: Session, job: ExportJob):
+        clicks = click_partitions.clicks_for_range(db, job.date_from, job.date_to)
+        query = select(*[getattr(clicks, field) for field in EXPORT_FIELDS]).join(
+            DynamicLink, clicks.link_id == DynamicLink.id
+        ).where(DynamicLink.project_id == job.project_id)
+
+        if job.date_from:
+            query = query.where(clicks.clicked_at >= job.date_from)
+        if job.date_to:
+            query = query.where(clicks.clicked_at <= job.date_to)
+        if job.link_ids:
+            query = query.where(clicks.link_id.in_(job.link_ids.split(",")))
+
+        return query.order_by(clicks.clicked_at)
+
+    @staticmethod
+    def _update_progress(job_id: str, **values):
+        # Session séparée : la session de lecture garde son curseur ouvert
+        db = SessionLocal()
+        try:
+            db.query(ExportJob).filter(ExportJob.id == job_id).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def run_job(job_id: str):
+        """Écrire l'artefact compressé d'un job d'export (exécuté en arrière-plan)."""
+
+        db = SessionLocal()
+        # Lecture des clics sur la réplique quand elle est disponible
+        read_db = ReadSession()
+        tmp_path = None
+        try:
+            claimed = db.query(ExportJob).filter(
+                ExportJob.id == job_id,
+                ExportJob.status == "pending"
+            ).update(
+                {"status": "running", "started_at": datetime.utcnow(), "rows_written": 0},
+                synchronize_session=False
+            )
+            db.commit()
+            if not claimed:
+                return
+
+            job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+            extension, _ = EXPORT_FORMATS.get(job.format, EXPORT_FORMATS["csv"])
+            query = ExportService.build_query(read_db, job)
+
+            total_rows = read_db.execute(
+                select(func.count()).select_from(query.subquery())
+            ).scalar() or 0
+            ExportService._update_progress(job_id, total_rows=total_rows)
+
+            file_path = os.path.join(ExportService.export_dir(), f"{job_id}.{extension}")
+            tmp_path = f"{file_path}.part"
+            batch_size = settings.EXPORT_BATCH_SIZE
+            rows_written = 0
+
+            with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as fh:
+                writer = csv.writer(fh) if job.format != "json" else None
+                if writer:
+                    writer.writerow(CSV_HEADER)
+
+                result = read_db.execute(
+                    query.execution_options(yield_per=batch_size)
+                )
+                for partition in result.partitions():
+                    for row in partition:
+                        if writer:
+                            writer.writerow(row)
+                        else:
+                            fh.write(json.dumps({
+                                field: _json_value(value)
+                                for field, value in zip(EXPORT_FIELDS, row)
+                            }))
+                            fh.write("\n")
+                    rows_written += len(partition)
+                    ExportService._update_progress(job_id, rows_written=rows_written)
+
+            os.replace(tmp_path, file_path)
+            tmp_path = None
+
+            ExportService._update_progress(
+                job_id,
+                status="completed",
+                rows_written=rows_written,
+                file_path=file_path,
+                file_size=os.path.getsize(file_path),
+                completed_at=datetime.utcnow()
+            )
+        except Exception as exc:
+            logger.exception("Échec de l'export %s", job_id)
+            db.rollback()
+            ExportService._update_progress(
+                job_id,
+                status="failed",
+                error=str(exc)[:1000],
+                completed_at=datetime.utcnow()
+            )
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            read_db.close()
+            db.close()
+
+    @staticmethod
+    def artifact_name(job: ExportJob) -> str:
+        extension, _ = EXPORT_FORMATS.get(job.format, EXPORT_FORMATS["csv"])
+        return f"analytics_export_{job.id}.{extension}"
+
+    @staticmethod
+    def artifact_media_type(job: ExportJob) -> str:
+        return EXPORT_FORMATS.get(job.format, EXPORT_FORMATS["csv"])[1]
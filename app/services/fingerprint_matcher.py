@@ -0,0 +1,253 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import ipaddress
+import json
+import logging
+import threading
+import time
+
+import redis
+
+from app.core.config import settings
+from app.core.database import get_redis, redis_breaker
+
+logger = logging.getLogger(__name__)
+
+# Pondération des signaux ; le préfixe IP et la plateforme sont imposés par la clé du seau
+WEIGHTS = {
+    "os_version": 0.35,
+    "locale": 0.25,
+    "screen": 0.15,
+    "recency": 0.25,
+}
+
+def ip_prefix(ip: Optional[str]) -> Optional[str]:
+    """Réseau /24 (IPv4) ou /64 (IPv6) de l'adresse."""
+    try:
+        address = ipaddress.ip_address((ip or "").strip())
+    except ValueError:
+        return None
+    prefix = 24 if address.version == 4 else 64
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False).network_address)
+
+def normalize_platform(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    if value in ("ios", "iphone os", "ipados"):
+        return "ios"
+    if value == "android":
+        return "android"
+    return value or None
+
+def normalize_version(value: Optional[str]) -> Optional[str]:
+    """Version majeure.mineure (« 17.4.1 » -> « 17.4 »)."""
+    parts = [part for part in (value or "").replace("_", ".").split(".") if part.isdigit()]
+    return ".".join(parts[:2]) or None
+
+def normalize_locale(value: Optional[str]) -> Optional[str]:
+    """Première langue d'un en-tête Accept-Language ou d'une locale SDK (« fr_FR » -> « fr-fr »)."""
+    first = (value or "").split(",")[0].split(";")[0].strip()
+    return first.replace("_", "-").lower() or None
+
+def screen_class(width: Optional[int] = None, height: Optional[int] = None, is_tablet: bool = False) -> str:
+    """Classe d'écran grossière : le navigateur ne connaît pas la résolution native."""
+    if width and height:
+        return "tablet" if min(width, height) >= 600 else "phone"
+    return "tablet" if is_tablet else "phone"
+
+class FingerprintMatcher:
+    """
+    Rapprochement probabiliste clic web / première ouverture de l'app.
+
+    Chaque clic mobile est indexé dans un seau temporel
+    fingerprint:{projet}:{plateforme}:{préfixe IP}:{seau} borné en taille et
+    expirant avec la fenêtre de rapprochement. À l'ouverture, seuls les seaux de
+    la fenêtre sont lus : le coût ne dépend pas du volume de clics.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, Dict[str, List[Dict[str, Any]]]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    @property
+    def bucket_seconds(self) -> int:
+        return settings.FINGERPRINT_BUCKET_MINUTES * 60
+
+    @property
+    def window_buckets(self) -> int:
+        return -(-settings.FINGERPRINT_WINDOW_MINUTES // settings.FINGERPRINT_BUCKET_MINUTES)
+
+    def _bucket(self, moment: float) -> int:
+        return int(moment // self.bucket_seconds)
+
+    def _key(self, project_id: str, platform: str, prefix: str, bucket: int) -> str:
+        return f"fingerprint:{project_id}:{platform}:{prefix}:{bucket}"
+
+    def record(
+        self,
+        project_id: str,
+        link_id: str,
+        ip: Optional[str],
+        platform: Optional[str],
+        os_version: Optional[str],
+        locale: Optional[str],
+        screen: Optional[str],
+        original_url: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        click_id: Optional[str] = None,
+        clicked_at: Optional[datetime] = None
+    ) -> bool:
+        """Indexer l'empreinte d'un clic mobile."""
+        prefix = ip_prefix(ip)
+        platform = normalize_platform(platform)
+        if not prefix or platform not in ("ios", "android"):
+            return False
+
+        now = time.time()
+        candidate = {
+            "link_id": str(link_id),
+            "click_id": str(click_id) if click_id else None,
+            "original_url": original_url,
+            "parameters": parameters or {},
+            "os_version": normalize_version(os_version),
+            "locale": normalize_locale(locale),
+            "screen": screen,
+            "ts": now,
+            "clicked_at": (clicked_at or datetime.utcnow()).isoformat()
+        }
+        key = self._key(str(project_id), platform, prefix, self._bucket(now))
+
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    pipe = redis_client.pipeline(transaction=False)
+                    pipe.lpush(key, json.dumps(candidate))
+                    pipe.ltrim(key, 0, settings.FINGERPRINT_MAX_PER_BUCKET - 1)
+                    pipe.expire(key, settings.FINGERPRINT_WINDOW_MINUTES * 60 + self.bucket_seconds)
+                    pipe.execute()
+                    return True
+            except redis.RedisError:
+                logger.warning("Redis indisponible, empreinte indexée en mémoire")
+
+        bucket = self._bucket(now)
+        with self._lock:
+            # Éviction par seau entier dès qu'il sort de la fenêtre
+            for stale in [b for b in self._buckets if b < bucket - self.window_buckets]:
+                del self._buckets[stale]
+            entries = self._buckets[bucket].setdefault(key, [])
+            entries.insert(0, candidate)
+            del entries[settings.FINGERPRINT_MAX_PER_BUCKET:]
+        return True
+
+    def _score(
+        self,
+        candidate: Dict[str, Any],
+        os_version: Optional[str],
+        locale: Optional[str],
+        screen: Optional[str],
+        now: float
+    ) -> float:
+        score = 0.0
+        if os_version and candidate.get("os_version"):
+            if candidate["os_version"] == os_version:
+                score += WEIGHTS["os_version"]
+            elif candidate["os_version"].split(".")[0] == os_version.split(".")[0]:
+                score += WEIGHTS["os_version"] / 2
+        if locale and candidate.get("locale"):
+            if candidate["locale"] == locale:
+                score += WEIGHTS["locale"]
+            elif candidate["locale"].split("-")[0] == locale.split("-")[0]:
+                score += WEIGHTS["locale"] / 2
+        if screen and candidate.get("screen") == screen:
+            score += WEIGHTS["screen"]
+
+        window = settings.FINGERPRINT_WINDOW_MINUTES * 60
+        age = max(now - candidate["ts"], 0)
+        if age > window:
+            return 0.0
+        return score + WEIGHTS["recency"] * (1 - age / window)
+
+    def _candidates(self, keys: List[str]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """(clé, valeur brute, candidat) de chaque seau de la fenêtre."""
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    pipe = redis_client.pipeline(transaction=False)
+                    for key in keys:
+                        pipe.lrange(key, 0, -1)
+                    return [
+                        (key, raw, json.loads(raw))
+                        for key, values in zip(keys, pipe.execute())
+                        for raw in values
+                    ]
+            except redis.RedisError:
+                logger.warning("Redis indisponible, rapprochement sur l'index en mémoire")
+
+        with self._lock:
+            return [
+                (key, entry, entry)
+                for bucket in self._buckets.values()
+                for key in keys
+                for entry in bucket.get(key, [])
+            ]
+
+    def _claim(self, key: str, raw: Any) -> bool:
+        """Retirer le candidat retenu ; un seul appel concurrent l'obtient."""
+        redis_client = get_redis()
+        if redis_client and isinstance(raw, str):
+            try:
+                with redis_breaker.guard():
+                    return bool(redis_client.lrem(key, 1, raw))
+            except redis.RedisError:
+                return False
+
+        with self._lock:
+            for bucket in self._buckets.values():
+                entries = bucket.get(key)
+                if entries and raw in entries:
+                    entries.remove(raw)
+                    return True
+        return False
+
+    def match(
+        self,
+        project_id: str,
+        ip: Optional[str],
+        platform: Optional[str],
+        os_version: Optional[str] = None,
+        locale: Optional[str] = None,
+        screen: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Meilleur clic de la fenêtre au-dessus du score minimal, consommé une seule fois."""
+        prefix = ip_prefix(ip)
+        platform = normalize_platform(platform)
+        if not prefix or not platform:
+            return None
+
+        now = time.time()
+        current = self._bucket(now)
+        keys = [
+            self._key(str(project_id), platform, prefix, bucket)
+            for bucket in range(current, current - self.window_buckets - 1, -1)
+        ]
+        os_version = normalize_version(os_version)
+        locale = normalize_locale(locale)
+
+        scored = sorted(
+            (
+                (self._score(candidate, os_version, locale, screen, now), key, raw, candidate)
+                for key, raw, candidate in self._candidates(keys)
+            ),
+            key=lambda item: item[0],
+            reverse=True
+        )
+        for score, key, raw, candidate in scored:
+            if score < settings.FINGERPRINT_MIN_SCORE:
+                break
+            if self._claim(key, raw):
+                return dict(candidate, score=round(score, 3))
+        return None
+
+fingerprint_matcher = FingerprintMatcher()
@@ -0,0 +1,248 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import csv
+import io
+import logging
+import os
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import SynctraException
+from app.core.job_queue import OrganizationJobQueue
+from app.models.import_job import ImportJob
+from app.models.project import Project
+from app.services.bulk_link_service import BulkLinkService
+
+logger = logging.getLogger(__name__)
+
+# En-têtes courants des exports d'autres raccourcisseurs
+HEADER_ALIASES = {
+    "url": "original_url",
+    "long_url": "original_url",
+    "longurl": "original_url",
+    "destination": "original_url",
+    "target": "original_url",
+    "name": "title",
+}
+
+import_queue = OrganizationJobQueue(
+    name="import",
+    max_workers=settings.IMPORT_MAX_WORKERS,
+    max_per_organization=settings.IMPORT_MAX_CONCURRENT_PER_ORG
+)
+
+def _normalize(row: Dict[Optional[str], Any]) -> Dict[str, str]:
+    normalized = {}
+    for key, value in row.items():
+        # Colonnes en trop (clé None) et cellules vides ignorées
+        if key is None or not isinstance(value, str) or not value.strip():
+            continue
+        key = key.strip().lower().replace(" ", "_")
+        normalized[HEADER_ALIASES.get(key, key)] = value.strip()
+    return normalized
+
+class ImportService:
+    @staticmethod
+    def import_dir() -> str:
+        path = os.path.join(settings.UPLOAD_DIR, "imports")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    async def store_upload(chunks: AsyncIterator[bytes], file_path: str) -> int:
+        """Écrire le corps reçu sur disque au fil de l'eau, sans dépasser MAX_FILE_SIZE."""
+        size = 0
+        try:
+            with open(file_path, "wb") as fh:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > settings.MAX_FILE_SIZE:
+                        raise SynctraException(
+                            message=f"Fichier trop volumineux (maximum {settings.MAX_FILE_SIZE} octets)",
+                            status_code=413,
+                            error_code="FILE_TOO_LARGE"
+                        )
+                    fh.write(chunk)
+        except BaseException:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        return size
+
+    @staticmethod
+    async def create_job(
+        db: Session,
+        project: Project,
+        user_id: Optional[str],
+        chunks: AsyncIterator[bytes]
+    ) -> ImportJob:
+        """Recevoir le CSV, créer le job d'import et le placer dans la file d'exécution."""
+
+        job = ImportJob(
+            organization_id=project.organization_id,
+            project_id=project.id,
+            created_by=user_id,
+            status="pending",
+            bytes_processed=0,
+            rows_processed=0,
+            rows_created=0,
+            rows_failed=0,
+            errors=[]
+        )
+        db.add(job)
+        db.flush()
+
+        file_path = os.path.join(ImportService.import_dir(), f"{job.id}.csv")
+        try:
+            job.file_size = await ImportService.store_upload(chunks, file_path)
+        except BaseException:
+            db.rollback()
+            raise
+        job.file_path = file_path
+        db.commit()
+        db.refresh(job)
+
+        ImportService.enqueue(job)
+        return job
+
+    @staticmethod
+    def enqueue(job: ImportJob):
+        import_queue.submit(str(job.organization_id), ImportService.run_job, str(job.id))
+
+    @staticmethod
+    def resume_pending_jobs():
+        """Relancer les imports en attente ou abandonnés ; ils reprennent après le dernier lot validé."""
+
+        db = SessionLocal()
+        try:
+            jobs = db.query(ImportJob).filter(ImportJob.status == "pending").order_by(
+                ImportJob.created_at
+            ).all()
+            for job in jobs:
+                ImportService.enqueue(job)
+        finally:
+            db.close()
+
+        ImportService.reclaim_stale_jobs()
+
+    @staticmethod
+    def reclaim_stale_jobs() -> int:
+        """
+        Remettre en file les imports « running » sans progression depuis
+        IMPORT_STALE_JOB_TIMEOUT secondes (updated_at avance à chaque lot).
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.IMPORT_STALE_JOB_TIMEOUT)
+
+        db = SessionLocal()
+        try:
+            stale = db.query(ImportJob).filter(
+                ImportJob.status == "running",
+                ImportJob.updated_at < stale_before
+            ).order_by(ImportJob.created_at).all()
+
+            reclaimed = 0
+            for job in stale:
+                claimed = db.query(ImportJob).filter(
+                    ImportJob.id == job.id,
+                    ImportJob.status == "running",
+                    ImportJob.updated_at < stale_before
+                ).update({"status": "pending"}, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    logger.warning("Reprise de l'import abandonné %s", job.id)
+                    ImportService.enqueue(job)
+                    reclaimed += 1
+            return reclaimed
+        finally:
+            db.close()
+
+    @staticmethod
+    def _import_batch(
+        db: Session,
+        project: Project,
+        created_by: Optional[str],
+        batch: List[Tuple[int, Dict[str, str]]]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        # Liens non validés ici : ils le sont avec la progression du job
+        results = BulkLinkService.create_dashboard_links(
+            db, project, [row for _, row in batch], created_by, commit=False
+        )
+        created = 0
+        errors = []
+        for (line, _), result in zip(batch, results):
+            if result["status"] == "created":
+                created += 1
+            else:
+                errors.append({"line": line, "error": result.get("error")})
+        return created, errors
+
+    @staticmethod
+    def run_job(job_id: str):
+        """Importer le CSV d'un job par lots via la création en masse (exécuté en arrière-plan)."""
+
+        db = SessionLocal()
+        try:
+            claimed = db.query(ImportJob).filter(
+                ImportJob.id == job_id,
+                ImportJob.status == "pending"
+            ).update(
+                {"status": "running", "started_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+            if not claimed:
+                return
+
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            project = db.query(Project).filter(Project.id == job.project_id).first()
+            errors = list(job.errors or [])
+            rows_processed = job.rows_processed or 0
+            rows_created = job.rows_created or 0
+            rows_failed = job.rows_failed or 0
+
+            with open(job.file_path, "rb") as raw:
+                text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+                reader = csv.DictReader(text)
+                # Reprise : les lignes des lots déjà validés sont sautées
+                rows = islice(reader, rows_processed, None)
+
+                while True:
+                    batch = []
+                    for row in islice(rows, settings.IMPORT_BATCH_SIZE):
+                        batch.append((reader.line_num, _normalize(row)))
+                    if not batch:
+                        break
+
+                    created, batch_errors = ImportService._import_batch(db, project, job.created_by, batch)
+                    rows_processed += len(batch)
+                    rows_created += created
+                    rows_failed += len(batch) - created
+                    errors.extend(batch_errors[:max(settings.IMPORT_MAX_REPORTED_ERRORS - len(errors), 0)])
+
+                    job.rows_processed = rows_processed
+                    job.rows_created = rows_created
+                    job.rows_failed = rows_failed
+                    job.errors = list(errors)
+                    job.bytes_processed = raw.tell()
+                    # Liens du lot et progression dans la même transaction : une reprise
+                    # après un arrêt ne recrée jamais un lot déjà validé
+                    db.commit()
+
+            job.status = "completed"
+            job.bytes_processed = job.file_size
+            job.completed_at = datetime.utcnow()
+            db.commit()
+
+            os.remove(job.file_path)
+        except Exception as exc:
+            logger.exception("Échec de l'import %s", job_id)
+            db.rollback()
+            db.query(ImportJob).filter(ImportJob.id == job_id).update(
+                {"status": "failed", "error": str(exc)[:1000], "completed_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
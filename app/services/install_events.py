@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import threading
+
+import redis
+
+from app.core.config import settings
+from app.core.database import get_redis, redis_breaker
+from app.services.deferred_context_store import MemoryContextStore
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "deferred_install:"
+STATUS_PREFIX = "deferred_install_status:"
+
+class InstallEventBroker:
+    """
+    Notification « app ouverte » vers les pages d'attente.
+
+    Chaque processus ne tient qu'un abonnement Redis (PSUBSCRIBE
+    deferred_install:*) lu par un thread, qui répartit les événements vers
+    les files asyncio des connexions SSE locales. Sans Redis, la publication
+    est distribuée directement en mémoire. Le dernier statut est aussi
+    conservé (TTL) pour une page qui se connecte après l'événement.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[threading.Thread] = None
+        self._statuses = MemoryContextStore(settings.DEFERRED_CONTEXT_MEMORY_MAX)
+
+    # Publication
+
+    def publish(self, tracking_id: str, event: Dict[str, Any]):
+        payload = json.dumps(event)
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    pipe = redis_client.pipeline(transaction=False)
+                    pipe.setex(STATUS_PREFIX + tracking_id, settings.INSTALL_STATUS_TTL, payload)
+                    pipe.publish(CHANNEL_PREFIX + tracking_id, payload)
+                    pipe.execute()
+                    if not self._listening():
+                        # Abonnés locaux inscrits pendant une panne de Redis
+                        self._dispatch(tracking_id, event)
+                    return
+            except redis.RedisError:
+                logger.warning("Publication de l'événement d'installation en mémoire (Redis indisponible)")
+
+        self._statuses.put(tracking_id, event, settings.INSTALL_STATUS_TTL)
+        self._dispatch(tracking_id, event)
+
+    def status(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        """Dernier événement publié pour ce suivi, s'il n'a pas expiré."""
+        redis_client = get_redis()
+        if redis_client:
+            try:
+                with redis_breaker.guard():
+                    raw = redis_client.get(STATUS_PREFIX + tracking_id)
+                    if raw:
+                        return json.loads(raw)
+            except redis.RedisError:
+                pass
+        return self._statuses.get(tracking_id)
+
+    # Abonnement
+
+    def subscribe(self, tracking_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(tracking_id, []).append(queue)
+        self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, tracking_id: str, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(tracking_id, [])
+            if queue in queues:
+                queues.remove(queue)
+            if not queues:
+                self._subscribers.pop(tracking_id, None)
+
+    def _dispatch(self, tracking_id: str, event: Dict[str, Any]):
+        """Livrer un événement aux connexions locales (appelable depuis n'importe quel thread)."""
+        with self._lock:
+            queues = list(self._subscribers.get(tracking_id, []))
+            loop = self._loop
+        if not queues or loop is None or loop.is_closed():
+            return
+        for queue in queues:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        if not queue.full():
+            queue.put_nowait(event)
+
+    def _listening(self) -> bool:
+        return bool(self._listener and self._listener.is_alive())
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listening():
+                return
+            if not get_redis():
+                return
+            self._listener = threading.Thread(target=self._listen, name="install-events", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        redis_client = get_redis()
+        if not redis_client:
+            return
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            with redis_breaker.guard():
+                pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                while True:
+                    # Attente bornée : pas de lecture bloquante soumise au socket_timeout du client
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message or message.get("type") != "pmessage":
+                        continue
+                    tracking_id = message["channel"][len(CHANNEL_PREFIX):]
+                    try:
+                        self._dispatch(tracking_id, json.loads(message["data"]))
+                    except ValueError:
+                        continue
+        except redis.RedisError:
+            # Le prochain abonné relancera l'écoute
+            logger.warning("Abonnement aux événements d'installation interrompu")
+        finally:
+            pubsub.close()
+
+install_events = InstallEventBroker()
@@ -3,7 +3,7 @@ import string
 from typing import Optional
 from sqlalchemy.orm import Session
 
-from app.models.dynamic_link import DynamicLink
+from app.services.short_code_allocator import short_code_allocator
 
 class LinkGenerator:
     @staticmethod
@@ -12,17 +12,10 @@ class LinkGenerator:
         return ''.join(secrets.choice(characters) for _ in range(length))
     
     @staticmethod
-    def generate_unique_short_code(db: Session, length: int = 8) -> str:
-        max_attempts = 10
-        for _ in range(max_attempts):
-            short_code = LinkGenerator.generate_short_code(length)
-            existing = db.query(DynamicLink).filter(
-                DynamicLink.short_code == short_code
-            ).first()
-            if not existing:
-                return short_code
-        
-        return LinkGenerator.generate_short_code(length + 2)
+    def generate_unique_short_code(db: Session = None, length: int = 8) -> str:
+        # Unicité garantie par construction (séquence + permutation, longueur distincte
+        # des codes aléatoires historiques) : aucune requête
+        return short_code_allocator.allocate()
     
     @staticmethod
     def build_short_url(short_code: str, domain: str) -> str:
@@ -0,0 +1,168 @@
+from sqlalchemy import column, desc, func, literal_column, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Query
+import logging
+
+from app.models.dynamic_link import DynamicLink
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "dynamic_links_search"
+# Clé entière stable de chaque lien dans l'index : le rowid implicite de
+# dynamic_links (clé primaire texte) peut être renuméroté par un VACUUM
+KEYS_TABLE = "dynamic_links_search_keys"
+LEGACY_FTS_TABLE = "dynamic_links_fts"
+MIN_INDEXED_LENGTH = 3  # Les trigrammes ne couvrent pas les termes plus courts
+
+# Même expression dans l'index et dans les requêtes, sinon Postgres ne l'utilise pas
+PG_DOCUMENT = "(coalesce(title, '') || ' ' || short_code || ' ' || original_url)"
+PG_QUALIFIED_DOCUMENT = (
+    "(coalesce(dynamic_links.title, '') || ' ' || dynamic_links.short_code"
+    " || ' ' || dynamic_links.original_url)"
+)
+
+_KEY_OF_OLD = f"(SELECT search_key FROM {KEYS_TABLE} WHERE link_id = old.id)"
+
+SQLITE_LEGACY_DROP = [
+    "DROP TRIGGER IF EXISTS dynamic_links_fts_insert",
+    "DROP TRIGGER IF EXISTS dynamic_links_fts_delete",
+    "DROP TRIGGER IF EXISTS dynamic_links_fts_update",
+    f"DROP TABLE IF EXISTS {LEGACY_FTS_TABLE}",
+]
+
+SQLITE_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {KEYS_TABLE} (
+        search_key INTEGER PRIMARY KEY,
+        link_id VARCHAR(36) NOT NULL UNIQUE
+    )""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, short_code, original_url, tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS dynamic_links_search_insert AFTER INSERT ON dynamic_links BEGIN
+        INSERT INTO {KEYS_TABLE}(link_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, title, short_code, original_url)
+        VALUES (
+            (SELECT search_key FROM {KEYS_TABLE} WHERE link_id = new.id),
+            new.title, new.short_code, new.original_url
+        );
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS dynamic_links_search_delete AFTER DELETE ON dynamic_links BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_KEY_OF_OLD};
+        DELETE FROM {KEYS_TABLE} WHERE link_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS dynamic_links_search_update
+        AFTER UPDATE OF id, title, short_code, original_url ON dynamic_links BEGIN
+        UPDATE {FTS_TABLE} SET title = new.title, short_code = new.short_code, original_url = new.original_url
+        WHERE rowid = {_KEY_OF_OLD};
+        UPDATE {KEYS_TABLE} SET link_id = new.id WHERE link_id = old.id;
+    END""",
+]
+
+# Indexation des liens existants, à la création de l'index
+SQLITE_BUILD = [
+    f"INSERT INTO {KEYS_TABLE}(link_id) SELECT id FROM dynamic_links",
+    f"""INSERT INTO {FTS_TABLE}(rowid, title, short_code, original_url)
+        SELECT k.search_key, d.title, d.short_code, d.original_url
+        FROM dynamic_links d JOIN {KEYS_TABLE} k ON k.link_id = d.id""",
+]
+
+PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS idx_link_search_trgm ON dynamic_links USING gin ({PG_DOCUMENT} gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS idx_link_search_tsv ON dynamic_links USING gin (to_tsvector('simple', {PG_DOCUMENT}))",
+]
+
+class LinkSearchService:
+    """
+    Recherche de liens sur le titre, le code court et l'URL d'origine.
+
+    - SQLite : table FTS5 (tokenizer trigram) synchronisée par triggers, reliée
+      aux liens par une clé entière propre à l'index (stable après VACUUM).
+    - Postgres : index GIN pg_trgm et tsvector sur la même expression.
+
+    Sans index disponible (SQLite sans trigram, rôle Postgres ne pouvant pas
+    créer l'extension pg_trgm), la recherche se replie sur ILIKE.
+    """
+
+    def __init__(self):
+        self.sqlite_fts_available = False
+        self.pg_trgm_available = False
+
+    def ensure_index(self, conn: Connection):
+        """Créer les index de recherche (et indexer les liens existants à la première création)."""
+        dialect = conn.dialect.name
+        try:
+            if dialect == "sqlite":
+                created = not conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+                ), {"name": KEYS_TABLE}).first()
+                # Ancien index adossé au rowid de dynamic_links : remplacé
+                for statement in SQLITE_LEGACY_DROP:
+                    conn.execute(text(statement))
+                for statement in SQLITE_DDL:
+                    conn.execute(text(statement))
+                if created:
+                    for statement in SQLITE_BUILD:
+                        conn.execute(text(statement))
+                self.sqlite_fts_available = True
+            elif dialect == "postgresql":
+                for statement in PG_DDL:
+                    conn.execute(text(statement))
+                self.pg_trgm_available = True
+            conn.commit()
+        except DBAPIError:
+            # SQLite antérieur à 3.34 (pas de tokenizer trigram) ou rôle Postgres
+            # sans droit CREATE sur la base : recherche par ILIKE
+            conn.rollback()
+            logger.warning("Index de recherche des liens indisponible, repli sur ILIKE")
+
+    def _ilike(self, query: Query, term: str) -> Query:
+        return query.filter(
+            (DynamicLink.title.ilike(f"%{term}%")) |
+            (DynamicLink.short_code.ilike(f"%{term}%")) |
+            (DynamicLink.original_url.ilike(f"%{term}%"))
+        ).order_by(desc(DynamicLink.created_at))
+
+    def apply(self, query: Query, term: str) -> Query:
+        """Filtrer une requête sur DynamicLink par le terme et la trier par pertinence."""
+        term = term.strip()
+        if not term:
+            return query
+
+        dialect = query.session.get_bind().dialect.name
+        if len(term) < MIN_INDEXED_LENGTH:
+            return self._ilike(query, term)
+
+        if dialect == "sqlite" and self.sqlite_fts_available:
+            fts = table(FTS_TABLE, column("rowid"))
+            keys = table(KEYS_TABLE, column("search_key"), column("link_id"))
+            phrase = '"' + term.replace('"', '""') + '"'
+            matches = select(
+                keys.c.link_id,
+                func.bm25(literal_column(FTS_TABLE)).label("score")
+            ).select_from(
+                fts.join(keys, keys.c.search_key == fts.c.rowid)
+            ).where(
+                literal_column(FTS_TABLE).op("MATCH")(phrase)
+            ).subquery("link_matches")
+
+            # bm25 : plus petit = plus pertinent
+            return query.join(
+                matches, matches.c.link_id == DynamicLink.id
+            ).order_by(matches.c.score, desc(DynamicLink.created_at))
+
+        if dialect == "postgresql" and self.pg_trgm_available:
+            document = literal_column(PG_QUALIFIED_DOCUMENT)
+            vector = func.to_tsvector("simple", document)
+            ts_query = func.plainto_tsquery("simple", term)
+            return query.filter(
+                document.ilike(f"%{term}%") | vector.op("@@")(ts_query)
+            ).order_by(
+                desc(func.ts_rank(vector, ts_query) + func.similarity(document, term)),
+                desc(DynamicLink.created_at)
+            )
+
+        return self._ilike(query, term)
+
+link_search = LinkSearchService()
@@ -0,0 +1,99 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.models.dynamic_link import DynamicLink
+from app.models.project import Project
+from app.services.click_partitioning import click_partitions
+from app.services.link_generator import LinkGenerator
+
+# Colonnes recopiées telles quelles, dans l'ordre des réponses existantes
+_DASHBOARD_FIELDS = (
+    "original_url", "title", "description",
+    "android_package", "android_fallback_url",
+    "ios_bundle_id", "ios_fallback_url", "desktop_fallback_url",
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content"
+)
+_dashboard_values = attrgetter(*_DASHBOARD_FIELDS)
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+class LinkSerializer:
+    """
+    Représentations JSON des liens, partagées par les endpoints dashboard et
+    SDK : dictionnaires de types simples, prêts pour orjson.
+    """
+
+    @staticmethod
+    def click_counts(db: Session, link_ids: List[str]) -> Dict[str, int]:
+        """
+        Nombre de clics de plusieurs liens en une requête, à jour et clics
+        archivés compris, sans charger les clics.
+        """
+        if not link_ids:
+            return {}
+        clicks = click_partitions.clicks_for_range(db)
+        rows = db.query(clicks.link_id, func.count(clicks.id)).filter(
+            clicks.link_id.in_(link_ids)
+        ).group_by(clicks.link_id).all()
+        return {link_id: count for link_id, count in rows}
+
+    @staticmethod
+    def dashboard_link(link: DynamicLink, domain: str, click_count: int = 0) -> Dict[str, Any]:
+        data = {
+            "id": str(link.id),
+            "short_code": link.short_code,
+            "short_url": LinkGenerator.build_short_url(link.short_code, domain)
+        }
+        data.update(zip(_DASHBOARD_FIELDS, _dashboard_values(link)))
+        data["expires_at"] = _iso(link.expires_at)
+        data["is_active"] = link.is_active
+        data["click_count"] = click_count
+        data["created_at"] = _iso(link.created_at)
+        data["updated_at"] = _iso(link.updated_at)
+        return data
+
+    @staticmethod
+    def dashboard_links(db: Session, project: Project, links: Iterable[DynamicLink]) -> List[Dict[str, Any]]:
+        links = list(links)
+        domain = project.custom_domain or settings.DOMAIN
+        click_counts = LinkSerializer.click_counts(db, [link.id for link in links])
+        return [
+            LinkSerializer.dashboard_link(link, domain, click_counts.get(link.id, 0))
+            for link in links
+        ]
+
+    @staticmethod
+    def sdk_link(
+        link: DynamicLink,
+        domain: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        campaign_id: Optional[str] = None,
+        referral_code: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Mêmes clés, dans le même ordre, que DeepLinkResponse. Le modèle ne
+        stocke ni paramètres, ni campagne, ni code de parrainage : vides par défaut.
+        """
+        return {
+            "originalUrl": link.original_url,
+            "parameters": parameters or {},
+            "fallbackUrl": link.desktop_fallback_url,
+            "iosAppStoreUrl": link.ios_fallback_url,
+            "androidPlayStoreUrl": link.android_fallback_url,
+            "expiresAt": link.expires_at,
+            "campaignId": campaign_id,
+            "referralCode": referral_code,
+            "id": str(link.id),
+            "shortUrl": LinkGenerator.build_short_url(link.short_code, domain),
+            "createdAt": link.created_at,
+            "isActive": link.is_active
+        }
+
+    @staticmethod
+    def sdk_links(project: Project, links: Iterable[DynamicLink]) -> List[Dict[str, Any]]:
+        domain = project.custom_domain or settings.DOMAIN
+        return [LinkSerializer.sdk_link(link, domain) for link in links]
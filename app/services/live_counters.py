@@ -0,0 +1,219 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+
+import redis
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_redis, redis_breaker
+from app.models.dynamic_link import DynamicLink
+from app.services.click_partitioning import click_partitions
+
+logger = logging.getLogger(__name__)
+
+RING_MINUTES = 24 * 60
+KEY_TTL = RING_MINUTES * 60 + 120
+EPOCH = datetime(1970, 1, 1)
+# Compteurs incrémentés, par dernière minute d'activité : la réconciliation
+# corrige aussi ceux qui n'ont aucun clic en base sur la fenêtre
+ACTIVE_KEYS = "live:active"
+
+# Chaque clé est un anneau de 1440 créneaux (un par minute). Le champ m:<slot>
+# mémorise la minute occupant le créneau : une minute plus récente le réinitialise.
+# La dernière clé est l'index des compteurs actifs.
+_INCREMENT_SCRIPT = """
+local slot = ARGV[1]
+local minute = ARGV[2]
+local ttl = tonumber(ARGV[3])
+local index = KEYS[#KEYS]
+for i = 1, #KEYS - 1 do
+    local key = KEYS[i]
+    if redis.call('HGET', key, 'm:' .. slot) ~= minute then
+        redis.call('HSET', key, 'm:' .. slot, minute, 'c:' .. slot, 0)
+    end
+    redis.call('HINCRBY', key, 'c:' .. slot, 1)
+    redis.call('EXPIRE', key, ttl)
+    redis.call('ZADD', index, minute, key)
+end
+redis.call('EXPIRE', index, ttl)
+return 1
+"""
+
+def project_key(project_id: str) -> str:
+    return f"live:project:{project_id}"
+
+def link_key(project_id: str, link_id: str) -> str:
+    return f"live:project:{project_id}:link:{link_id}"
+
+def _epoch_minute(moment: datetime) -> int:
+    """Minute depuis l'epoch d'un horodatage UTC naïf."""
+    return int((moment - EPOCH).total_seconds() // 60)
+
+def _minute_bucket(dialect: str, column):
+    if dialect == "postgresql":
+        return func.to_char(
+            func.date_trunc("minute", func.timezone("UTC", column)),
+            "YYYY-MM-DD HH24:MI"
+        )
+    return func.strftime("%Y-%m-%d %H:%M", column)
+
+class LiveCounterService:
+    """
+    Compteurs de clics temps réel dans Redis, par lien et par projet,
+    agrégés à la minute sur les dernières 24 heures.
+    """
+
+    def __init__(self):
+        self._script = None
+
+    def _increment(self, redis_client, keys: List[str], minute: int):
+        if self._script is None:
+            self._script = redis_client.register_script(_INCREMENT_SCRIPT)
+        self._script(
+            keys=keys + [ACTIVE_KEYS],
+            args=[minute % RING_MINUTES, minute, KEY_TTL],
+            client=redis_client
+        )
+
+    def record_click(self, project_id: str, link_id: str, clicked_at: Optional[datetime] = None):
+        redis_client = get_redis()
+        if not redis_client:
+            return
+
+        minute = _epoch_minute(clicked_at) if clicked_at else int(time.time() // 60)
+        try:
+            with redis_breaker.guard():
+                self._increment(
+                    redis_client,
+                    [link_key(project_id, link_id), project_key(project_id)],
+                    minute
+                )
+        except redis.RedisError:
+            # Les compteurs seront rattrapés par la réconciliation
+            logger.warning("Compteur temps réel non incrémenté pour le lien %s", link_id)
+
+    def _read(self, redis_client, key: str, current_minute: int) -> Dict[int, int]:
+        raw = redis_client.hgetall(key)
+        oldest = current_minute - RING_MINUTES + 1
+        counts = {}
+        for slot in range(RING_MINUTES):
+            minute = raw.get(f"m:{slot}")
+            if minute is None:
+                continue
+            minute = int(minute)
+            if oldest <= minute <= current_minute:
+                counts[minute] = int(raw.get(f"c:{slot}", 0))
+        return counts
+
+    def get_live_stats(self, project_id: str, link_id: Optional[str] = None, step: int = 5) -> Optional[Dict]:
+        """Totaux et série temporelle lus uniquement depuis Redis (None si Redis est indisponible)."""
+        redis_client = get_redis()
+        if not redis_client:
+            return None
+
+        step = max(1, min(step, 60))
+        current_minute = int(time.time() // 60)
+        key = link_key(project_id, link_id) if link_id else project_key(project_id)
+        try:
+            with redis_breaker.guard():
+                counts = self._read(redis_client, key, current_minute)
+        except redis.RedisError:
+            return None
+
+        # Séries alignées sur le pas demandé, de la plus ancienne à la plus récente
+        first_bucket = (current_minute - RING_MINUTES + 1) // step * step
+        series = []
+        for bucket in range(first_bucket, current_minute + 1, step):
+            series.append({
+                "timestamp": datetime.utcfromtimestamp(bucket * 60),
+                "count": sum(counts.get(minute, 0) for minute in range(bucket, bucket + step))
+            })
+
+        return {
+            "project_id": project_id,
+            "link_id": link_id,
+            "total_24h": sum(counts.values()),
+            "last_hour": sum(c for minute, c in counts.items() if minute > current_minute - 60),
+            "current_minute": counts.get(current_minute, 0),
+            "step_minutes": step,
+            "series": series,
+            "generated_at": datetime.utcnow()
+        }
+
+    def _durable_counts(self, db: Session, since: datetime, until: datetime) -> List[Tuple[str, str, str, int]]:
+        clicks = click_partitions.clicks_for_range(db, since, until)
+        bucket = _minute_bucket(db.get_bind().dialect.name, clicks.clicked_at).label("minute")
+        return db.query(
+            DynamicLink.project_id,
+            clicks.link_id,
+            bucket,
+            func.count(clicks.id)
+        ).join(DynamicLink, clicks.link_id == DynamicLink.id).filter(
+            clicks.clicked_at >= since,
+            clicks.clicked_at < until
+        ).group_by(DynamicLink.project_id, clicks.link_id, bucket).all()
+
+    def reconcile(self, window_minutes: Optional[int] = None) -> int:
+        """
+        Réaligner les minutes closes récentes sur les clics enregistrés en base.
+
+        Chaque minute de la fenêtre est réécrite, à 0 si la base n'a aucun clic,
+        pour les compteurs ayant des clics en base et pour ceux incrémentés sur
+        la fenêtre (un sur-comptage sans clic en base est ainsi corrigé).
+        """
+        redis_client = get_redis()
+        if not redis_client:
+            return 0
+
+        window_minutes = window_minutes or settings.LIVE_COUNTER_RECONCILE_MINUTES
+        current_minute = int(time.time() // 60)
+        first_minute = current_minute - window_minutes
+        until = datetime.utcfromtimestamp(current_minute * 60)
+        since = until - timedelta(minutes=window_minutes)
+
+        db = SessionLocal()
+        try:
+            rows = self._durable_counts(db, since, until)
+        finally:
+            db.close()
+
+        try:
+            with redis_breaker.guard():
+                # Index élagué des compteurs sortis de l'anneau
+                redis_client.zremrangebyscore(ACTIVE_KEYS, "-inf", f"({current_minute - RING_MINUTES}")
+                active = redis_client.zrangebyscore(ACTIVE_KEYS, first_minute, "+inf")
+        except redis.RedisError:
+            logger.warning("Réconciliation des compteurs temps réel impossible")
+            return 0
+
+        per_key: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        # Compteurs incrémentés sur la fenêtre : réécrits même sans clic en base
+        for key in active:
+            per_key[key] = defaultdict(int)
+        for project_id, link_id, minute_label, count in rows:
+            minute = _epoch_minute(datetime.strptime(minute_label, "%Y-%m-%d %H:%M"))
+            per_key[link_key(project_id, link_id)][minute] += count
+            per_key[project_key(project_id)][minute] += count
+
+        pipe = redis_client.pipeline(transaction=False)
+        for key, minutes in per_key.items():
+            mapping = {}
+            for minute in range(first_minute, current_minute):
+                slot = minute % RING_MINUTES
+                mapping[f"m:{slot}"] = minute
+                mapping[f"c:{slot}"] = minutes.get(minute, 0)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, KEY_TTL)
+        try:
+            with redis_breaker.guard():
+                pipe.execute()
+        except redis.RedisError:
+            logger.warning("Réconciliation des compteurs temps réel impossible")
+            return 0
+        return len(per_key)
+
+live_counters = LiveCounterService()
@@ -0,0 +1,126 @@
+from sqlalchemy import select, delete, insert, func, case, distinct
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.dynamic_link import DynamicLink
+from app.models.link_click_rollup import LinkClickRollup
+from app.services.click_partitioning import click_partitions
+
+class RollupService:
+    @staticmethod
+    def refresh() -> int:
+        """Recalculer les agrégats des derniers jours (tâche périodique)."""
+        since = datetime.utcnow().date() - timedelta(days=settings.ROLLUP_LOOKBACK_DAYS)
+        return RollupService._rebuild(since)
+
+    @staticmethod
+    def backfill() -> int:
+        """Recalculer les agrégats sur tout l'historique des clics."""
+        return RollupService._rebuild(None)
+
+    @staticmethod
+    def _rebuild(since: Optional[date]) -> int:
+        # Suppression et réinsertion dans la même transaction : les lecteurs
+        # ne voient jamais une journée partiellement agrégée
+        db = SessionLocal()
+        try:
+            date_from = datetime(since.year, since.month, since.day) if since else None
+            clicks = click_partitions.clicks_for_range(db, date_from)
+            day = func.date(clicks.clicked_at)
+            platform = func.coalesce(clicks.platform, '')
+            country = func.coalesce(clicks.country, '')
+
+            aggregate = select(
+                clicks.link_id,
+                day,
+                platform,
+                country,
+                DynamicLink.project_id,
+                func.count(clicks.id),
+                func.count(distinct(clicks.ip_address)),
+                func.sum(case((clicks.converted == True, 1), else_=0)),
+                func.now()
+            ).join(DynamicLink, clicks.link_id == DynamicLink.id).group_by(
+                clicks.link_id, day, platform, country, DynamicLink.project_id
+            )
+
+            purge = delete(LinkClickRollup)
+            if date_from:
+                aggregate = aggregate.where(clicks.clicked_at >= date_from)
+                purge = purge.where(LinkClickRollup.bucket_date >= since)
+
+            db.execute(purge)
+            result = db.execute(
+                insert(LinkClickRollup).from_select(
+                    [
+                        "link_id", "bucket_date", "platform", "country", "project_id",
+                        "clicks", "unique_clicks", "conversions", "updated_at"
+                    ],
+                    aggregate
+                )
+            )
+            db.commit()
+            return result.rowcount or 0
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def link_analytics(
+        db: Session,
+        link_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict:
+        """Statistiques d'un lien lues uniquement dans les agrégats quotidiens."""
+
+        query = db.query(
+            LinkClickRollup.bucket_date,
+            LinkClickRollup.platform,
+            LinkClickRollup.country,
+            LinkClickRollup.clicks,
+            LinkClickRollup.unique_clicks,
+            LinkClickRollup.conversions
+        ).filter(LinkClickRollup.link_id == link_id)
+
+        if start_date:
+            query = query.filter(LinkClickRollup.bucket_date >= start_date.date())
+        if end_date:
+            query = query.filter(LinkClickRollup.bucket_date <= end_date.date())
+
+        totals = {"clicks": 0, "unique_clicks": 0, "conversions": 0}
+        platforms: Dict[str, int] = {}
+        countries: Dict[str, int] = {}
+        timeline: Dict[date, Dict[str, int]] = {}
+
+        for row in query:
+            totals["clicks"] += row.clicks
+            totals["unique_clicks"] += row.unique_clicks
+            totals["conversions"] += row.conversions
+            if row.platform:
+                platforms[row.platform] = platforms.get(row.platform, 0) + row.clicks
+            if row.country:
+                countries[row.country] = countries.get(row.country, 0) + row.clicks
+
+            point = timeline.setdefault(row.bucket_date, {"clicks": 0, "uniqueClicks": 0, "conversions": 0})
+            point["clicks"] += row.clicks
+            point["uniqueClicks"] += row.unique_clicks
+            point["conversions"] += row.conversions
+
+        return {
+            "totalClicks": totals["clicks"],
+            # Approximation : somme des IP distinctes par jour et par segment
+            "uniqueClicks": totals["unique_clicks"],
+            "conversions": totals["conversions"],
+            "platforms": platforms,
+            "countries": countries,
+            "timeline": [
+                {"date": bucket.isoformat(), **values}
+                for bucket, values in sorted(timeline.items())
+            ]
+        }
@@ -0,0 +1,131 @@
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
+import hashlib
+import hmac
+import logging
+import secrets
+import string
+import threading
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.short_code_sequence import ShortCodeSequence
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_NAME = "links"
+ALPHABET = string.ascii_letters + string.digits
+CODE_LENGTH = 8
+# Les codes aléatoires historiques (LinkGenerator.generate_short_code) ont 8
+# caractères : avec le préfixe, ceux de la séquence en ont 9 et ne peuvent pas
+# entrer en collision avec eux
+CODE_PREFIX = "0"
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH  # 62^8 ≈ 2,18e14 < 2^48
+HALF_BITS = 24
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 6
+
+class FeistelCipher:
+    """
+    Permutation à clé de [0, 62^8) : réseau de Feistel sur 48 bits (tours
+    HMAC-SHA256), ramené au domaine par cycle-walking. Deux entrées distinctes
+    donnent toujours deux sorties distinctes.
+    """
+
+    def __init__(self, key: bytes):
+        self._mac = hmac.new(key, digestmod=hashlib.sha256)
+
+    def _round(self, value: int, index: int) -> int:
+        mac = self._mac.copy()
+        mac.update(bytes([index]) + value.to_bytes(3, "big"))
+        return int.from_bytes(mac.digest()[:3], "big")
+
+    def _permute(self, value: int) -> int:
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for index in range(ROUNDS):
+            left, right = right, left ^ self._round(right, index)
+        return (left << HALF_BITS) | right
+
+    def encrypt(self, value: int) -> int:
+        result = self._permute(value)
+        # 2^48 / 62^8 ≈ 1,29 : en moyenne moins de deux passes
+        while result >= CODE_SPACE:
+            result = self._permute(result)
+        return result
+
+def to_base62(value: int) -> str:
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, remainder = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[remainder])
+    return CODE_PREFIX + "".join(reversed(chars))
+
+class ShortCodeAllocator:
+    """
+    Codes courts uniques sans requête par lien : chaque processus réserve un
+    bloc de SHORT_CODE_BLOCK_SIZE valeurs de la séquence en base (un UPDATE
+    atomique), puis chiffre chaque valeur pour obtenir un code d'apparence
+    aléatoire, hors de l'espace des codes aléatoires historiques.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._cipher: Optional[FeistelCipher] = None
+
+    def _lease(self, block: int) -> Tuple[int, int, str]:
+        table = ShortCodeSequence
+        db = SessionLocal()
+        try:
+            if db.get(table, SEQUENCE_NAME) is None:
+                try:
+                    db.add(table(name=SEQUENCE_NAME, next_value=0, secret=secrets.token_hex(32)))
+                    db.commit()
+                except IntegrityError:
+                    # Créée au même moment par un autre processus
+                    db.rollback()
+
+            reserve = update(table).where(table.name == SEQUENCE_NAME).values(
+                next_value=table.next_value + block
+            )
+            if db.get_bind().dialect.update_returning:
+                end, secret = db.execute(reserve.returning(table.next_value, table.secret)).one()
+            else:
+                # Le verrou d'écriture pris par l'UPDATE couvre la relecture
+                db.execute(reserve)
+                end, secret = db.execute(
+                    select(table.next_value, table.secret).where(table.name == SEQUENCE_NAME)
+                ).one()
+            db.commit()
+        finally:
+            db.close()
+
+        if end > CODE_SPACE:
+            raise RuntimeError("Espace des codes courts épuisé")
+        return end - block, end, secret
+
+    def allocate_many(self, count: int) -> List[str]:
+        """`count` codes distincts ; une requête seulement quand le bloc courant est épuisé."""
+        ranges = []
+        with self._lock:
+            reserved = 0
+            while reserved < count:
+                if self._next >= self._end:
+                    # Un gros lot réserve d'un coup tout ce qui lui manque
+                    block = max(settings.SHORT_CODE_BLOCK_SIZE, count - reserved)
+                    self._next, self._end, secret = self._lease(block)
+                    if self._cipher is None:
+                        self._cipher = FeistelCipher((settings.SHORT_CODE_SECRET or secret).encode())
+                take = min(count - reserved, self._end - self._next)
+                ranges.append(range(self._next, self._next + take))
+                self._next += take
+                reserved += take
+        # Chiffrement hors verrou : les valeurs réservées n'appartiennent qu'à cet appel
+        return [to_base62(self._cipher.encrypt(value)) for values in ranges for value in values]
+
+    def allocate(self) -> str:
+        return self.allocate_many(1)[0]
+
+short_code_allocator = ShortCodeAllocator()
@@ -72,9 +72,15 @@ class SubscriptionService:
     
     @staticmethod
     def check_links_limit(db: Session, project_id: str) -> bool:
+        remaining = SubscriptionService.remaining_links(db, project_id)
+        return remaining is None or remaining > 0
+    
+    @staticmethod
+    def remaining_links(db: Session, project_id: str) -> Optional[int]:
+        """Nombre de liens encore autorisés pour le projet (None = illimité)."""
         project = db.query(Project).filter(Project.id == project_id).first()
         if not project:
-            return False
+            return 0
             
         subscription = SubscriptionService.get_organization_subscription(db, project.organization_id)
         if not subscription:
@@ -82,21 +88,21 @@ class SubscriptionService:
             from app.models.organization import Organization
             org = db.query(Organization).filter(Organization.id == project.organization_id).first()
             if not org:
-                return False
+                return 0
             plan_type = PlanType.STARTER if org.plan_type == "free" else PlanType(org.plan_type)
         else:
             plan_type = PlanType(subscription.plan_type)
             
         plan_limits = SubscriptionService.get_plan_limits(plan_type)
         if plan_limits.max_links_per_project is None:
-            return True
+            return None
             
         current_links = db.query(DynamicLink).filter(
             DynamicLink.project_id == project_id,
             DynamicLink.is_active == True
         ).count()
         
-        return current_links < plan_limits.max_links_per_project
+        return max(plan_limits.max_links_per_project - current_links, 0)
     
     @staticmethod
     def has_feature_access(db: Session, organization_id: str, feature: str) -> bool:
@@ -1,32 +1,53 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
-from fastapi.staticfiles import StaticFiles
 from pydantic import ValidationError
 import time
 import uvicorn
 
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, ensure_indexes
 from app.api.v1.api import api_router
 from app.api.sdk.v1.api import api_router as sdk_api_router
 from app.api.v1.endpoints.redirect import router as redirect_router
 from app.api.v1.endpoints.admin import router as admin_api_router
 from app.api.v1.endpoints.admin_routes import router as admin_routes_router
 from app.core.exceptions import SynctraException
+from app.core.scheduler import scheduler
+from app.core.static_assets import HashedStaticFiles
+from app.services.export_service import ExportService, export_queue
+from app.services.import_service import ImportService, import_queue
+from app.services.click_partitioning import click_partitions
+from app.services.live_counters import live_counters
+from app.services.rollup_service import RollupService
+from app.services.admin_metrics import admin_metrics
+from app.services.link_search import link_search
+from app.services.deferred_link_store import deferred_link_store
+from app.services.deferred_cleanup import DeferredCleanupService
 
 Base.metadata.create_all(bind=engine)
 
+with engine.connect() as connection:
+    # create_all ne crée pas les nouveaux index sur des tables existantes
+    ensure_indexes(connection)
+    connection.commit()
+    # Les partitions de clics doivent exister avant le premier enregistrement
+    click_partitions.ensure_partitions(connection)
+    connection.commit()
+    link_search.ensure_index(connection)
+
 app = FastAPI(
     title="Synctra API",
     description="API pour la gestion des liens dynamiques et analytics",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -35,6 +56,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
 app.add_middleware(
@@ -42,6 +64,7 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(RateLimitMiddleware)
 
 @app.middleware("http")
@@ -79,8 +102,63 @@ async def synctra_exception_handler(request: Request, exc: SynctraException):
         content={"error": exc.error_code, "message": exc.message, "details": exc.details}
     )
 
+@app.on_event("startup")
+async def start_background_jobs():
+    # Reprendre les exports en attente ou abandonnés par un worker arrêté
+    ExportService.resume_pending_jobs()
+    ImportService.resume_pending_jobs()
+    
+    scheduler.register(
+        "export_reclaim",
+        settings.EXPORT_STALE_JOB_TIMEOUT,
+        ExportService.reclaim_stale_jobs
+    )
+    scheduler.register(
+        "import_reclaim",
+        settings.IMPORT_STALE_JOB_TIMEOUT,
+        ImportService.reclaim_stale_jobs
+    )
+    scheduler.register(
+        "click_partitions",
+        settings.CLICK_PARTITION_MAINTENANCE_INTERVAL,
+        click_partitions.run_maintenance
+    )
+    scheduler.register(
+        "live_counters_reconcile",
+        settings.LIVE_COUNTER_RECONCILE_INTERVAL,
+        live_counters.reconcile
+    )
+    scheduler.register(
+        "click_rollups",
+        settings.ROLLUP_INTERVAL,
+        RollupService.refresh
+    )
+    scheduler.register(
+        "admin_metrics",
+        settings.ADMIN_METRICS_REFRESH_INTERVAL,
+        admin_metrics.refresh
+    )
+    # Journal appliqué dans l'ordre : un seul worker à la fois
+    scheduler.register(
+        "deferred_link_audit",
+        settings.DEFERRED_AUDIT_FLUSH_INTERVAL,
+        deferred_link_store.flush_audit
+    )
+    scheduler.register(
+        "deferred_cleanup",
+        settings.DEFERRED_PURGE_INTERVAL,
+        DeferredCleanupService.run
+    )
+    await scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await scheduler.stop()
+    export_queue.shutdown()
+    import_queue.shutdown()
+
 # Servir les fichiers statiques
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", HashedStaticFiles(directory="static"), name="static")
 
 # Routes spécifiques d'abord (ordre important)
 app.include_router(admin_routes_router, prefix="/admin")
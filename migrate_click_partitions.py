@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script de migration - Convertir link_clicks en table partitionnée (Postgres)
+Sur SQLite, aucune migration n'est nécessaire : l'archivage par période
+est fait par la tâche de maintenance au démarrage de l'application.
+"""
+
+import sys
+
+from sqlalchemy import func, select, text
+
+from app.core.database import engine
+from app.models.link_click import LinkClick
+from app.services.click_partitioning import click_partitions
+
+LEGACY_TABLE = "link_clicks_legacy"
+
+def migrate_click_partitions():
+    """Recrée link_clicks en table partitionnée et y recopie les clics existants"""
+
+    if engine.dialect.name != "postgresql":
+        print("ℹ️  Base non Postgres : rien à migrer")
+        return True
+
+    with engine.begin() as conn:
+        if click_partitions.is_partitioned(conn):
+            print("ℹ️  link_clicks est déjà partitionnée")
+            return True
+
+        print("🔄 Renommage de la table existante...")
+        conn.execute(text(f"ALTER TABLE link_clicks RENAME TO {LEGACY_TABLE}"))
+        conn.execute(text(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT link_clicks_pkey TO {LEGACY_TABLE}_pkey"))
+        for index in LinkClick.__table__.indexes:
+            conn.execute(text(f"ALTER INDEX IF EXISTS {index.name} RENAME TO {index.name}_legacy"))
+
+        print("🔄 Création de la table partitionnée...")
+        LinkClick.__table__.create(conn)
+
+        # Clics sans date : rattachés à leur date de création (clé de partitionnement)
+        clicked_at = "COALESCE(clicked_at, created_at)"
+        oldest = conn.execute(text(f"SELECT MIN({clicked_at}) FROM {LEGACY_TABLE}")).scalar()
+        created = click_partitions.ensure_partitions(conn, since=oldest)
+        print(f"✅ {len(created)} partitions créées")
+
+        columns = [column.name for column in LinkClick.__table__.columns]
+        values = [clicked_at if name == "clicked_at" else name for name in columns]
+        conn.execute(text(
+            f"INSERT INTO link_clicks ({', '.join(columns)}) "
+            f"SELECT {', '.join(values)} FROM {LEGACY_TABLE}"
+        ))
+        copied = conn.execute(select(func.count()).select_from(LinkClick.__table__)).scalar()
+        expected = conn.execute(text(f"SELECT COUNT(*) FROM {LEGACY_TABLE}")).scalar()
+        if copied != expected:
+            # Annule toute la migration (transaction) : l'ancienne table est conservée
+            raise RuntimeError(f"{copied} clics recopiés sur {expected}, migration annulée")
+        print(f"✅ {copied} clics recopiés")
+
+        conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+
+    return True
+
+if __name__ == "__main__":
+    print("🔧 Migration - Partitionnement de link_clicks")
+    print("=" * 40)
+
+    try:
+        migrate_click_partitions()
+        print("\n🎉 Migration réussie !")
+    except Exception as e:
+        print(f"\n💥 Migration échouée : {e}")
+        sys.exit(1)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Script de migration - Calculer les agrégats quotidiens sur tout l'historique des clics
+La tâche périodique ne recalcule que les derniers jours (ROLLUP_LOOKBACK_DAYS).
+"""
+
+import sys
+
+from app.core.database import engine, Base
+from app.models.link_click_rollup import LinkClickRollup
+from app.services.rollup_service import RollupService
+
+def migrate_click_rollups():
+    """Crée la table des agrégats et la remplit à partir des clics existants"""
+
+    print("🔄 Création de la table link_click_rollups...")
+    Base.metadata.create_all(bind=engine, tables=[LinkClickRollup.__table__])
+
+    print("🔄 Calcul des agrégats...")
+    rows = RollupService.backfill()
+    print(f"✅ {rows} agrégats calculés")
+
+    return True
+
+if __name__ == "__main__":
+    print("🔧 Migration - Agrégats quotidiens des clics")
+    print("=" * 40)
+
+    try:
+        migrate_click_rollups()
+        print("\n🎉 Migration réussie !")
+    except Exception as e:
+        print(f"\n💥 Migration échouée : {e}")
+        sys.exit(1)
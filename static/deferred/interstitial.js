@@ -0,0 +1,82 @@
+(function () {
+    // Données propres au lien, injectées par le template
+    var config = JSON.parse(document.getElementById('synctra-interstitial').textContent);
+
+    // Stocker le tracking ID dans le localStorage
+    localStorage.setItem('synctra_tracking_id', config.trackingId);
+
+    var appOpened = false;
+    var startTime = Date.now();
+
+    // Essayer d'ouvrir l'app automatiquement si elle est installée
+    function tryOpenApp() {
+        var appScheme = '';
+
+        if (config.platform === 'ios' && config.iosBundleId) {
+            // Pour iOS, utiliser un custom scheme ou universal link
+            appScheme = config.iosBundleId + '://open?url=' + encodeURIComponent(config.originalUrl);
+        } else if (config.platform === 'android' && config.androidPackage) {
+            // Pour Android, utiliser intent URL
+            appScheme = 'intent://' + config.originalUrl + '#Intent;package=' + config.androidPackage + ';scheme=https;end';
+        }
+
+        if (appScheme) {
+            // Créer un iframe invisible pour tester l'ouverture
+            var iframe = document.createElement('iframe');
+            iframe.style.display = 'none';
+            iframe.src = appScheme;
+            document.body.appendChild(iframe);
+
+            // Détecter si l'app s'est ouverte
+            setTimeout(function () {
+                if (!appOpened && (Date.now() - startTime) < 3000) {
+                    // L'app ne s'est pas ouverte, on reste sur la page
+                    document.body.removeChild(iframe);
+                }
+            }, 2000);
+
+            // Détecter si l'utilisateur revient (app fermée)
+            window.addEventListener('focus', function () {
+                if (Date.now() - startTime > 1000) {
+                    appOpened = true;
+                }
+            });
+
+            // Détecter la perte de focus (app ouverte)
+            window.addEventListener('blur', function () {
+                appOpened = true;
+            });
+        }
+    }
+
+    function track(endpoint) {
+        fetch('/api/v1/deferred/' + endpoint, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({tracking_id: config.trackingId}),
+            keepalive: true
+        });
+    }
+
+    document.getElementById('install-btn').addEventListener('click', function () {
+        track('track-app-install');
+    });
+    document.getElementById('continue-web').addEventListener('click', function () {
+        track('track-web-continue');
+    });
+
+    // Une seule connexion tenue, notifiée dès l'ouverture de l'app après installation
+    if (window.EventSource) {
+        var source = new EventSource('/api/v1/deferred/install-status/' + encodeURIComponent(config.trackingId) + '/stream');
+        source.addEventListener('installed', function () {
+            source.close();
+            document.querySelector('.description').textContent = 'Application ouverte, vous pouvez fermer cette page.';
+        });
+        source.addEventListener('expired', function () {
+            source.close();
+        });
+    }
+
+    // Lancer la tentative d'ouverture après un délai
+    setTimeout(tryOpenApp, 500);
+})();
@@ -0,0 +1,78 @@
+from datetime import datetime
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Base SQLite jetable, configurée avant le premier import de l'application
+_DB_DIR = tempfile.mkdtemp(prefix="synctra-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.models.organization import Organization  # noqa: E402
+from app.models.project import Project  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user(db):
+    organization = Organization(name="Org", slug="org", plan_type="plus")
+    db.add(organization)
+    db.flush()
+    user = User(
+        email="owner@example.com",
+        password_hash="x",
+        first_name="Owner",
+        last_name="Test",
+        organization_id=organization.id
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+@pytest.fixture
+def project(db, user):
+    project = Project(name="Projet", organization_id=user.organization_id, api_key="test-key")
+    db.add(project)
+    db.commit()
+    return project
+
+@pytest.fixture
+def make_job(db, project):
+    """Créer un job (export, import) du projet avec le statut et la date de mise à jour donnés."""
+    def make(model, status, updated_at=None, **fields):
+        job = model(
+            organization_id=project.organization_id,
+            project_id=project.id,
+            status=status,
+            updated_at=updated_at or datetime.utcnow(),
+            **fields
+        )
+        db.add(job)
+        db.commit()
+        return job.id
+    return make
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    """Identifiants des jobs mis en file par le service donné, sans les exécuter."""
+    ids = []
+    def capture(service):
+        monkeypatch.setattr(service, "enqueue", staticmethod(lambda job: ids.append(job.id)))
+        return ids
+    return capture
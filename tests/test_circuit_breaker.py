@@ -0,0 +1,59 @@
+import pytest
+import redis
+
+from app.core.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from app.core.pagination import invalidate_counts
+import app.core.pagination as pagination
+import app.services.live_counters as live_counters_module
+from app.services.live_counters import live_counters
+
+class BrokenRedis:
+    """Client dont chaque commande échoue."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("down")
+        return fail
+
+def test_guard_counts_only_dependency_errors():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60, errors=(redis.RedisError,))
+
+    with pytest.raises(ValueError):
+        with breaker.guard():
+            raise ValueError("pas une erreur Redis")
+    assert breaker.state == CLOSED
+
+    for _ in range(2):
+        with pytest.raises(redis.RedisError):
+            with breaker.guard():
+                raise redis.ConnectionError("down")
+    assert breaker.state == OPEN
+
+def test_guard_success_resets_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60, errors=(redis.RedisError,))
+
+    with pytest.raises(redis.RedisError):
+        with breaker.guard():
+            raise redis.ConnectionError("down")
+    with breaker.guard():
+        pass
+    with pytest.raises(redis.RedisError):
+        with breaker.guard():
+            raise redis.ConnectionError("down")
+    assert breaker.state == CLOSED
+
+@pytest.mark.parametrize("call", [
+    lambda: live_counters.record_click("project", "link"),
+    lambda: invalidate_counts("project")
+])
+def test_redis_callers_feed_the_breaker(call, monkeypatch):
+    breaker = CircuitBreaker("redis", failure_threshold=1, reset_timeout=60, errors=(redis.RedisError,))
+    client = BrokenRedis()
+    for module in (live_counters_module, pagination):
+        monkeypatch.setattr(module, "redis_breaker", breaker)
+        monkeypatch.setattr(module, "get_redis", lambda: client)
+    monkeypatch.setattr(live_counters, "_script", None)
+
+    call()
+
+    assert breaker.state == OPEN
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.database import engine
+from app.models.dynamic_link import DynamicLink
+from app.models.link_click import LinkClick
+from app.services.analytics_service import AnalyticsService
+from app.services.bulk_link_service import BulkLinkService
+from app.services.click_partitioning import click_partitions
+from app.services.link_serializer import LinkSerializer
+
+ARCHIVED_AT = datetime(2020, 1, 15, 12, 0)
+
+@pytest.fixture
+def archive(db):
+    start = click_partitions.period_start(ARCHIVED_AT)
+    table = click_partitions._archive_table(click_partitions.partition_name(start))
+    with engine.connect() as conn:
+        table.create(conn, checkfirst=True)
+        conn.commit()
+        click_partitions.archive_names(conn, refresh=True)
+    yield table
+    with engine.connect() as conn:
+        table.drop(conn, checkfirst=True)
+        conn.commit()
+        click_partitions.archive_names(conn, refresh=True)
+
+@pytest.fixture
+def link(db, project, archive):
+    link = DynamicLink(project_id=project.id, short_code="archived", original_url="https://example.com")
+    db.add(link)
+    db.flush()
+    db.add(LinkClick(id="live-click", link_id=link.id, ip_address="1.1.1.1"))
+    db.execute(archive.insert().values(
+        id="archived-click", link_id=link.id, ip_address="2.2.2.2", converted=False, clicked_at=ARCHIVED_AT
+    ))
+    db.commit()
+    return link
+
+def test_reads_include_archived_clicks(db, project, link):
+    assert AnalyticsService.get_link_stats(db, link.id) == {"total_clicks": 2, "unique_clicks": 2}
+    assert AnalyticsService.get_project_stats(db, project.id)["total_clicks"] == 2
+    assert LinkSerializer.click_counts(db, [link.id]) == {link.id: 2}
+
+def test_update_click_reaches_archives(db, link, archive):
+    assert click_partitions.update_click(db, "archived-click", {"converted": True}, clicked_at=ARCHIVED_AT)
+    db.commit()
+    converted = db.execute(archive.select().where(archive.c.id == "archived-click")).first().converted
+    assert converted
+
+def test_delete_links_removes_archived_clicks(db, project, link, archive, monkeypatch):
+    # Liste des archives à relire pendant la suppression
+    monkeypatch.setattr(click_partitions, "_archive_names_loaded_at", 0.0)
+    assert BulkLinkService.delete_links(db, str(project.id), {"ids": [link.id]}) == 1
+    assert db.query(LinkClick).count() == 0
+    assert db.execute(archive.select()).first() is None
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core.database import Base
+from app.models.deferred_link import DeferredLink
+import app.services.deferred_link_store as store_module
+from app.services.deferred_link_store import deferred_link_store
+
+THREADS = 8
+
+@pytest.fixture(params=["returning", "compare_and_swap"])
+def session_factory(request, tmp_path, monkeypatch):
+    # Moteur dédié : un pool de connexions réelles, une par thread
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/deferred.db",
+        poolclass=QueuePool,
+        pool_size=THREADS,
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    if request.param == "compare_and_swap":
+        monkeypatch.setattr(engine.dialect, "update_returning", False)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _widen_race(conn, cursor, statement, parameters, context, executemany):
+        # Laisser tous les threads lire le candidat avant la première mise à jour
+        if statement.startswith("UPDATE"):
+            time.sleep(0.05)
+
+    Base.metadata.create_all(bind=engine, tables=[DeferredLink.__table__])
+    # Sans Redis : la consommation passe par la base
+    monkeypatch.setattr(store_module, "get_redis", lambda: None)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+def test_concurrent_consume_delivers_once(session_factory):
+    now = datetime.utcnow()
+    with session_factory() as db:
+        db.add(DeferredLink(
+            device_id="device",
+            package_name="com.example",
+            platform="android",
+            link_id="link",
+            original_url="https://example.com",
+            parameters={},
+            timestamp=now,
+            created_at=now,
+            expires_at=now + timedelta(hours=1)
+        ))
+        db.commit()
+
+    barrier = threading.Barrier(THREADS)
+
+    def consume(_):
+        with session_factory() as db:
+            barrier.wait()
+            return deferred_link_store.consume(db, "project", "device", "com.example", "android")
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(consume, range(THREADS)))
+
+    delivered = [result for result in results if result]
+    assert len(delivered) == 1
+    assert delivered[0]["original_url"] == "https://example.com"
+
+    with session_factory() as db:
+        assert db.query(DeferredLink).filter(DeferredLink.is_consumed == True).count() == 1
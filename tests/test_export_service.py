@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from app.models.export_job import ExportJob
+from app.services.export_service import ExportService
+
+def test_resume_only_reclaims_stale_running_jobs(db, make_job, enqueued):
+    jobs = enqueued(ExportService)
+    now = datetime.utcnow()
+    active = make_job(ExportJob, "running", now, format="csv")
+    stale = make_job(ExportJob, "running", now - timedelta(hours=1), format="csv")
+    pending = make_job(ExportJob, "pending", now, format="csv")
+
+    ExportService.resume_pending_jobs()
+
+    db.expire_all()
+    assert db.get(ExportJob, active).status == "running"
+    assert db.get(ExportJob, stale).status == "pending"
+    assert sorted(jobs) == sorted([stale, pending])
+
+def test_reclaim_is_done_once(make_job, enqueued):
+    jobs = enqueued(ExportService)
+    make_job(ExportJob, "running", datetime.utcnow() - timedelta(hours=1), format="csv")
+
+    assert ExportService.reclaim_stale_jobs() == 1
+    assert ExportService.reclaim_stale_jobs() == 0
+    assert len(jobs) == 1
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.models.dynamic_link import DynamicLink
+from app.models.import_job import ImportJob
+from app.services.import_service import ImportService
+
+def test_resume_only_reclaims_stale_running_jobs(db, make_job, enqueued):
+    jobs = enqueued(ImportService)
+    now = datetime.utcnow()
+    active = make_job(ImportJob, "running", now, rows_processed=1000)
+    stale = make_job(ImportJob, "running", now - timedelta(hours=1), rows_processed=1000)
+
+    ImportService.resume_pending_jobs()
+
+    db.expire_all()
+    assert db.get(ImportJob, active).status == "running"
+    assert db.get(ImportJob, stale).status == "pending"
+    # Reprise après le dernier lot validé
+    assert db.get(ImportJob, stale).rows_processed == 1000
+    assert jobs == [stale]
+
+def test_interrupted_batch_is_not_imported_twice(db, make_job, user, tmp_path, monkeypatch):
+    file_path = tmp_path / "links.csv"
+    file_path.write_text("url,title\nhttps://example.com/1,Un\nhttps://example.com/2,Deux\n")
+    job_id = make_job(
+        ImportJob,
+        "pending",
+        created_by=user.id,
+        file_path=str(file_path),
+        file_size=file_path.stat().st_size,
+        rows_processed=0,
+        rows_created=0,
+        rows_failed=0,
+        errors=[]
+    )
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 1)
+
+    import_batch = ImportService._import_batch
+    def crash_on_second_batch(db, project, created_by, batch):
+        result = import_batch(db, project, created_by, batch)
+        if batch[0][0] == 3:
+            raise RuntimeError("arrêt du worker")
+        return result
+    monkeypatch.setattr(ImportService, "_import_batch", staticmethod(crash_on_second_batch))
+    ImportService.run_job(job_id)
+
+    db.expire_all()
+    assert db.get(ImportJob, job_id).rows_processed == 1
+    assert db.query(DynamicLink).count() == 1
+
+    monkeypatch.setattr(ImportService, "_import_batch", staticmethod(import_batch))
+    db.get(ImportJob, job_id).status = "pending"
+    db.commit()
+    ImportService.run_job(job_id)
+
+    db.expire_all()
+    assert db.get(ImportJob, job_id).status == "completed"
+    assert sorted(link.title for link in db.query(DynamicLink)) == ["Deux", "Un"]
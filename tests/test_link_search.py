@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.dynamic_link import DynamicLink
+from app.services.link_search import LinkSearchService
+
+def test_search_survives_rowid_renumbering(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/search.db")
+    Base.metadata.create_all(bind=engine, tables=[DynamicLink.__table__])
+    search = LinkSearchService()
+    with engine.connect() as conn:
+        search.ensure_index(conn)
+    if not search.sqlite_fts_available:
+        pytest.skip("FTS5 trigram indisponible")
+
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for index in range(5):
+            db.add(DynamicLink(
+                project_id="project",
+                short_code=f"code{index}",
+                original_url=f"https://example.com/{index}",
+                title=f"Summer {index}" if index == 4 else f"Winter {index}"
+            ))
+        db.commit()
+        db.query(DynamicLink).filter(DynamicLink.short_code.in_(["code0", "code1"])).delete()
+        db.commit()
+
+    # Ce que peut faire un VACUUM au rowid implicite d'une table à clé texte
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE dynamic_links SET rowid = rowid + 100"))
+
+    with Session() as db:
+        found = search.apply(db.query(DynamicLink), "summer").all()
+        assert [link.short_code for link in found] == ["code4"]
+        found = search.apply(db.query(DynamicLink), "winter").all()
+        assert sorted(link.short_code for link in found) == ["code2", "code3"]
+    engine.dispose()
@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import links
+from app.core.deps import get_current_active_user, get_project_by_id
+from app.models.dynamic_link import DynamicLink
+from app.models.link_click import LinkClick
+from app.models.link_click_rollup import LinkClickRollup
+
+@pytest.fixture
+def client(db, project, user):
+    app = FastAPI()
+    app.include_router(links.router, prefix="/projects/{project_id}/links")
+    app.dependency_overrides[get_project_by_id] = lambda: project
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    return TestClient(app)
+
+def test_listing_returns_pagination_headers(client, db, project):
+    start = datetime(2026, 1, 1)
+    for index in range(3):
+        db.add(DynamicLink(
+            project_id=project.id,
+            short_code=f"code{index}",
+            original_url=f"https://example.com/{index}",
+            created_at=start + timedelta(minutes=index)
+        ))
+    db.commit()
+
+    response = client.get(f"/projects/{project.id}/links/?limit=2&include_total=true")
+
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "3"
+    assert response.headers["X-Next-Cursor"]
+    assert [link["short_code"] for link in response.json()["data"]] == ["code2", "code1"]
+
+    next_page = client.get(
+        f"/projects/{project.id}/links/",
+        params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+    )
+    assert [link["short_code"] for link in next_page.json()["data"]] == ["code0"]
+    assert "X-Next-Cursor" not in next_page.headers
+
+def test_listing_click_count_is_live(client, db, project):
+    link = DynamicLink(project_id=project.id, short_code="clicked", original_url="https://example.com")
+    db.add(link)
+    db.flush()
+    for _ in range(2):
+        db.add(LinkClick(link_id=link.id, platform="web"))
+    db.commit()
+
+    response = client.get(f"/projects/{project.id}/links/")
+
+    assert response.json()["data"][0]["click_count"] == 2
+
+def test_delete_link_removes_rollups_and_clicks(client, db, project):
+    link = DynamicLink(project_id=project.id, short_code="gone", original_url="https://example.com")
+    db.add(link)
+    db.flush()
+    db.add(LinkClick(link_id=link.id, platform="web"))
+    db.add(LinkClickRollup(link_id=link.id, project_id=project.id, bucket_date=date(2026, 1, 1), clicks=1))
+    db.commit()
+
+    response = client.delete(f"/projects/{project.id}/links/{link.id}")
+
+    assert response.status_code == 200
+    assert db.query(DynamicLink).count() == 0
+    assert db.query(LinkClick).count() == 0
+    assert db.query(LinkClickRollup).count() == 0
+
+def test_delete_link_refreshes_cached_total(client, db, project):
+    link = DynamicLink(project_id=project.id, short_code="counted", original_url="https://example.com")
+    db.add(link)
+    db.commit()
+    url = f"/projects/{project.id}/links/?include_total=true"
+    assert client.get(url).headers["X-Total-Count"] == "1"
+
+    client.delete(f"/projects/{project.id}/links/{link.id}")
+
+    assert client.get(url).headers["X-Total-Count"] == "0"
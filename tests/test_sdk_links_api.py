@@ -0,0 +1,21 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.sdk.v1.endpoints import links
+from app.core.sdk_auth import get_api_key_auth
+from app.models.dynamic_link import DynamicLink
+
+@pytest.fixture
+def client(db, project):
+    app = FastAPI()
+    app.include_router(links.router, prefix="/links")
+    app.dependency_overrides[get_api_key_auth] = lambda: project
+    return TestClient(app)
+
+def test_list_counts_total_only_on_request(client, db, project):
+    db.add(DynamicLink(project_id=project.id, short_code="listed", original_url="https://example.com"))
+    db.commit()
+
+    assert client.get("/links/").json()["data"]["total"] is None
+    assert client.get("/links/?includeTotal=true").json()["data"]["total"] == 1
@@ -0,0 +1,9 @@
+from app.services.link_generator import LinkGenerator
+from app.services.short_code_allocator import ShortCodeAllocator
+
+def test_allocated_codes_never_match_legacy_codes(db):
+    codes = ShortCodeAllocator().allocate_many(500)
+
+    assert len(set(codes)) == 500
+    legacy_length = len(LinkGenerator.generate_short_code())
+    assert all(len(code) != legacy_length for code in codes)